@@ -0,0 +1,121 @@
+"""
+Module: benchmarks.booking_contention
+
+Contention benchmark for the seat reservation step of booking creation.
+
+A pool of worker threads books single seats of the same ticket as fast as possible
+with two strategies:
+- locking: The previous implementation, select_for_update() on the ticket,
+  availability checked in Python and ticket.save().
+- guarded: ebs_app.services.reservations.reserve_seats, a guarded decrement.
+
+For every strategy it reports bookings/sec, the retries needed because the database
+was busy and whether the ticket was oversold.
+
+Note: SQLite serialises all writers on a database level lock and ignores
+select_for_update(), run against PostgreSQL to measure row level contention.
+
+Usage:
+    python -m benchmarks.booking_contention --workers 16 --bookings 50
+"""
+
+import argparse
+import threading
+
+
+def locking_reserve(ticket_id, count):
+    """
+    Previous reservation strategy, kept here as the benchmark baseline.
+    """
+    from ebs_app.models.tickets import Ticket
+    from ebs_app.exceptions import (
+        TicketNotAvailableAPIException,
+        BookedMoreSeatAPIException,
+    )
+
+    ticket = Ticket.objects.select_for_update().filter(id=ticket_id).first()
+    if ticket.availability == 0:
+        raise TicketNotAvailableAPIException()
+    if count > ticket.availability:
+        raise BookedMoreSeatAPIException()
+    ticket.availability = ticket.availability - count
+    ticket.save()
+
+
+def guarded_reserve(ticket_id, count):
+    """
+    Current reservation strategy.
+    """
+    from ebs_app.services.reservations import reserve_seats
+
+    reserve_seats([(ticket_id, count)])
+
+
+def run(strategy, workers, bookings):
+    """
+    Run a strategy with the given number of workers.
+
+    Args:
+        strategy (callable): The reservation function to be benchmarked.
+        workers (int): The number of concurrent worker threads.
+        bookings (int): The number of bookings attempted by every worker.
+
+    Returns:
+        dict: The measured results.
+    """
+    from rest_framework.exceptions import APIException
+    from benchmarks.utils import create_fixtures, retry_busy, run_workers
+
+    total = workers * bookings
+    _, (ticket,) = create_fixtures(availability=total)
+    results = {"booked": 0, "sold_out": 0, "retries": 0}
+    lock = threading.Lock()
+
+    def worker(_index):
+        outcome = {"booked": 0, "sold_out": 0, "retries": 0}
+        for _ in range(bookings):
+            try:
+                outcome["retries"] += retry_busy(strategy, ticket.id, 1)
+                outcome["booked"] += 1
+            except APIException:
+                outcome["sold_out"] += 1
+        with lock:
+            for key, value in outcome.items():
+                results[key] += value
+
+    elapsed = run_workers(worker, workers)
+
+    ticket.refresh_from_db()
+    return {
+        "strategy": strategy.__name__,
+        "workers": workers,
+        "attempted": total,
+        "booked": results["booked"],
+        "retries": results["retries"],
+        "bookings/sec": round(results["booked"] / elapsed, 1),
+        "oversold": ticket.availability < 0
+        or total - ticket.availability != results["booked"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--bookings", type=int, default=50)
+    args = parser.parse_args()
+
+    from benchmarks.utils import setup_django, report
+
+    teardown = setup_django()
+    try:
+        rows = [
+            run(strategy, args.workers, args.bookings)
+            for strategy in (locking_reserve, guarded_reserve)
+        ]
+    finally:
+        teardown()
+    report("Booking contention", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Module: benchmarks.booking_export
+
+Throughput and memory of the streamed booking export of an event.
+
+The database is seeded with --bookings bookings of two lines each for one event,
+see benchmarks.booking_relations. Then the booking lines are exported in every
+format, in --chunk-size chunks:
+- stream: booking_export.stream, the chunks consumed as the response would send them.
+- materialised: for comparison, all the lines read with one query into a list and
+  written as CSV at once, as an export without chunks would.
+
+For every mode it reports the rows per second, the peak of the Python heap during the
+export, traced in a second run so tracing does not slow the timed one, and the peak
+RSS of the process after the export. Streamed exports are run first, the peak RSS
+only grows when an export needs more memory than the seeding and the exports before.
+
+Usage:
+    python -m benchmarks.booking_export --bookings 1000000 --chunk-size 2000
+"""
+
+import argparse
+import csv
+import io
+import resource
+import time
+import tracemalloc
+
+
+def export_materialised(event_id):
+    """
+    Read all the booking lines of an event at once, then write them as CSV.
+    """
+    from ebs_app.models.bookings import SubBooking
+    from ebs_app.services.booking_export import COLUMNS
+
+    rows = list(
+        SubBooking.objects.filter(ticket__event_id=event_id)
+        .order_by("booking_id", "id")
+        .values_list(
+            "booking_id",
+            "booking__customer__user__email",
+            "ticket__ticket_type",
+            "count",
+            "price",
+            "booking__status",
+        )
+    )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    writer.writerows(rows)
+    yield buffer.getvalue()
+
+
+def consume(chunks):
+    """
+    Consume an export like a response would.
+
+    Returns:
+        tuple: The number of rows and bytes exported.
+    """
+    rows = size = 0
+    for chunk in chunks:
+        rows += chunk.count("\n" if isinstance(chunk, str) else b"\n")
+        size += len(chunk)
+    return rows, size
+
+
+def measure(name, export):
+    """
+    Time an export, then trace the peak of the Python heap in a second run.
+
+    Returns:
+        dict: The measured results.
+    """
+    started = time.perf_counter()
+    rows, size = consume(export())
+    elapsed = time.perf_counter() - started
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tracemalloc.start()
+    consume(export())
+    _, peak_heap = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "export": name,
+        "rows": rows,
+        "MB": round(size / 2**20, 1),
+        "seconds": round(elapsed, 2),
+        "rows/s": round(rows / elapsed),
+        "peak heap MB": round(peak_heap / 2**20, 1),
+        # ru_maxrss is in kilobytes on Linux.
+        "peak RSS MB": round(peak_rss / 2**10, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    from benchmarks.utils import setup_django, report
+
+    teardown = setup_django()
+    try:
+        from ebs_app.services import booking_export
+        from benchmarks.booking_relations import seed
+
+        _, tickets = seed(args.bookings, args.customers)
+        event_id = tickets[0].event_id
+        rows = [
+            measure(
+                f"stream {export_format}",
+                lambda export_format=export_format: booking_export.stream(
+                    event_id, export_format, chunk_size=args.chunk_size
+                ),
+            )
+            for export_format in booking_export.FORMATS
+        ]
+        rows.append(measure("materialised csv", lambda: export_materialised(event_id)))
+    finally:
+        teardown()
+    report(
+        f"Booking export of {args.bookings} bookings, chunks of {args.chunk_size}",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
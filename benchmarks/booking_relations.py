@@ -0,0 +1,156 @@
+"""
+Module: benchmarks.booking_relations
+
+Query count and latency of writing and reading bookings with their sub bookings.
+
+The database is seeded with --bookings bookings of two sub bookings each, spread
+over --customers customers. Then, as the customer owning the bookings:
+- insert: POST /bookings/ creating a two-line booking.
+- read: GET /bookings/<id>/ of a random seeded booking, sub bookings included.
+
+For both it reports the SQL queries per request and the median and p95 latency.
+
+Usage:
+    python -m benchmarks.booking_relations --bookings 1000000 --requests 200
+"""
+
+import argparse
+import random
+import statistics
+import time
+from unittest import mock
+
+
+SEED_BATCH_SIZE = 20000
+
+
+def seed(bookings, customers):
+    """
+    Seed the bookings with bulk inserts.
+
+    Returns:
+        tuple: The seeded customers and tickets.
+    """
+    from django.contrib.auth.models import User
+    from users.customer.models import Customer
+    from ebs_app.models.bookings import Booking, SubBooking
+    from ebs_app.models.choices import BookingStatus
+    from benchmarks.utils import create_fixtures
+
+    _, tickets = create_fixtures(ticket_count=2, availability=10**9)
+    users = User.objects.bulk_create(
+        [User(username=f"relations-{index}") for index in range(customers)]
+    )
+    customers = Customer.objects.bulk_create([Customer(user=user) for user in users])
+
+    for start in range(0, bookings, SEED_BATCH_SIZE):
+        created = Booking.objects.bulk_create(
+            [
+                Booking(
+                    customer=customers[index % len(customers)],
+                    status=BookingStatus.BOOKED,
+                    total_price=200,
+                )
+                for index in range(start, min(start + SEED_BATCH_SIZE, bookings))
+            ]
+        )
+        SubBooking.objects.bulk_create(
+            [
+                SubBooking(booking=booking, ticket=ticket, count=1, price=ticket.price)
+                for booking in created
+                for ticket in tickets
+            ]
+        )
+    return customers, tickets
+
+
+def measure(name, requests):
+    """
+    Time a request function and count its queries.
+
+    Args:
+        name (str): The name of the measured operation.
+        requests (list): Callables sending one request each.
+
+    Returns:
+        dict: The measured results.
+    """
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    latencies = []
+    queries = 0
+    for request in requests:
+        reset_queries()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = request()
+            latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code in (200, 201), response.content
+        queries += len(captured)
+    latencies.sort()
+    return {
+        "operation": name,
+        "requests": len(requests),
+        "queries/request": round(queries / len(requests), 1),
+        "median ms": round(statistics.median(latencies), 2),
+        "p95 ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    from benchmarks.utils import setup_django, report
+
+    teardown = setup_django()
+    try:
+        from rest_framework.test import APIClient
+        from ebs_app.models.bookings import Booking
+
+        started = time.perf_counter()
+        customers, tickets = seed(args.bookings, args.customers)
+        print(
+            f"Seeded {args.bookings} bookings in {time.perf_counter() - started:.0f}s"
+        )
+
+        customer = customers[0]
+        client = APIClient()
+        client.force_authenticate(user=customer.user)
+        payload = {
+            "sub_bookings": [{"ticket": ticket.id, "count": 1} for ticket in tickets]
+        }
+        booking_ids = list(
+            Booking.objects.filter(customer=customer).values_list("id", flat=True)
+        )
+        rng = random.Random(0)
+        with mock.patch("ebs_app.tasks.send_booking_confirmation_email.delay"):
+            rows = [
+                measure(
+                    "insert",
+                    [
+                        lambda: client.post("/api/v1/bookings/", payload, format="json")
+                        for _ in range(args.requests)
+                    ],
+                ),
+                measure(
+                    "read",
+                    [
+                        lambda booking_id=rng.choice(booking_ids): client.get(
+                            f"/api/v1/bookings/{booking_id}/"
+                        )
+                        for _ in range(args.requests)
+                    ],
+                ),
+            ]
+    finally:
+        teardown()
+    report(f"Booking relations, {args.bookings} bookings", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Module: benchmarks.bulk_booking
+
+Throughput benchmark of the bulk booking endpoint against the per-booking endpoint.
+
+The same number of two-line bookings is created through the API in two ways:
+- single: One POST /bookings/ and one POST /bookings/<id>/confirm/ per booking,
+  as a box-office integration had to do before the bulk endpoint existed.
+- bulk: POST /bookings/bulk/ with --batch bookings per request.
+
+For every way it reports bookings/sec and the SQL queries per booking. Celery
+enqueues are replaced by no-ops, so no broker is needed.
+
+Usage:
+    python -m benchmarks.bulk_booking --bookings 500 --batch 250
+"""
+
+import argparse
+import time
+from unittest import mock
+
+
+def run_single(client, customer, tickets, bookings):
+    """
+    Create the bookings one HTTP call at a time, as the customer.
+    """
+    client.force_authenticate(user=customer.user)
+    for _ in range(bookings):
+        response = client.post(
+            "/api/v1/bookings/",
+            {"sub_bookings": [{"ticket": ticket.id, "count": 1} for ticket in tickets]},
+            format="json",
+        )
+        assert response.status_code == 201, response.content
+        response = client.post(f"/api/v1/bookings/{response.data['id']}/confirm/")
+        assert response.status_code == 200, response.content
+
+
+def run_bulk(client, customer, tickets, bookings, batch):
+    """
+    Create the bookings through the bulk endpoint, as a staff user.
+    """
+    from django.contrib.auth.models import User
+
+    client.force_authenticate(
+        user=User.objects.create(username=f"box-{time.monotonic_ns()}", is_staff=True)
+    )
+    item = {
+        "customer": customer.id,
+        "sub_bookings": [{"ticket": ticket.id, "count": 1} for ticket in tickets],
+    }
+    for start in range(0, bookings, batch):
+        response = client.post(
+            "/api/v1/bookings/bulk/",
+            {"bookings": [item] * min(batch, bookings - start)},
+            format="json",
+        )
+        assert response.data["failed"] == 0, response.content
+
+
+def measure(name, function, bookings, *args):
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+    from benchmarks.utils import create_fixtures
+
+    customer, tickets = create_fixtures(ticket_count=2, availability=bookings)
+    # The query log is capped, start every run with an empty one.
+    reset_queries()
+    with mock.patch("ebs_app.tasks.send_booking_confirmation_email.delay"), mock.patch(
+        "ebs_app.tasks.send_bulk_booking_confirmation_emails.delay"
+    ), CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        function(APIClient(), customer, tickets, bookings, *args)
+        elapsed = time.perf_counter() - started
+    return {
+        "endpoint": name,
+        "bookings": bookings,
+        "bookings/sec": round(bookings / elapsed, 1),
+        "queries/booking": round(len(queries) / bookings, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--bookings", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=250)
+    args = parser.parse_args()
+
+    from benchmarks.utils import setup_django, report
+
+    teardown = setup_django()
+    try:
+        rows = [
+            measure("single", run_single, args.bookings),
+            measure("bulk", run_bulk, args.bookings, args.batch),
+        ]
+    finally:
+        teardown()
+    rows[1]["speedup"] = round(rows[1]["bookings/sec"] / rows[0]["bookings/sec"], 1)
+    rows[0]["speedup"] = 1.0
+    report("Bulk booking", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Module: benchmarks.event_search
+
+Latency of the full-text event search against filtering the event table.
+
+The database is seeded with --events synthetic events, with names, descriptions and
+venues drawn from a fixed vocabulary, and the search index is rebuilt. Then for
+--queries common queries, a kind of event and maybe the prefix of a word matching
+thousands of events, and --queries rare queries, naming the number of one event, it
+reports the median and p95 latency of:
+- index: ebs_app.services.event_search.search, ranked, 20 results.
+- scan: the events whose name, description or venue contains every word, with
+  icontains filters, the way clients filtered the event list, 20 results.
+- index+filters: the index search with a date range and a venue.
+
+Usage:
+    python -m benchmarks.event_search --events 1000000 --queries 100
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+SEED_BATCH_SIZE = 20000
+
+ADJECTIVES = [
+    "summer",
+    "winter",
+    "late",
+    "open",
+    "grand",
+    "little",
+    "electric",
+    "acoustic",
+    "royal",
+    "secret",
+    "midnight",
+    "sunday",
+    "golden",
+    "wild",
+    "silent",
+    "urban",
+]
+KINDS = [
+    "jazz",
+    "rock",
+    "opera",
+    "ballet",
+    "comedy",
+    "festival",
+    "concert",
+    "gala",
+    "quiz",
+    "cinema",
+    "theatre",
+    "party",
+    "market",
+    "tasting",
+    "lecture",
+    "workshop",
+]
+WORDS = [
+    "live",
+    "music",
+    "food",
+    "drinks",
+    "family",
+    "friendly",
+    "outdoor",
+    "stage",
+    "band",
+    "orchestra",
+    "night",
+    "tickets",
+    "guests",
+    "special",
+    "première",
+    "tour",
+    "dance",
+    "wine",
+    "street",
+    "art",
+    "classic",
+    "modern",
+    "show",
+    "season",
+]
+VENUES = [
+    f"{name} {kind}"
+    for name in ("Blue", "Red", "Old", "New", "Grand", "Royal")
+    for kind in ("Hall", "Arena", "Theatre", "Park", "Club")
+]
+
+
+def seed(events, rng):
+    """
+    Seed the events with bulk inserts and rebuild the search index.
+
+    Returns:
+        float: The seconds taken by the index rebuild.
+    """
+    from ebs_app.models.events import Event
+    from ebs_app.services import event_search
+
+    start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    for offset in range(0, events, SEED_BATCH_SIZE):
+        Event.objects.bulk_create(
+            [
+                Event(
+                    event_name=f"{rng.choice(ADJECTIVES)} {rng.choice(KINDS)} {index}",
+                    event_description=" ".join(rng.choices(WORDS, k=12)),
+                    venue=rng.choice(VENUES),
+                    event_date_time=start + timedelta(minutes=index),
+                )
+                for index in range(offset, min(offset + SEED_BATCH_SIZE, events))
+            ]
+        )
+    started = time.perf_counter()
+    event_search.rebuild(batch_size=SEED_BATCH_SIZE)
+    return time.perf_counter() - started
+
+
+def measure(name, queries, function):
+    latencies, results = [], 0
+    for terms in queries:
+        started = time.perf_counter()
+        results += len(function(terms))
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "search": name,
+        "queries": len(queries),
+        "results/query": round(results / len(queries), 1),
+        "median ms": round(statistics.median(latencies), 2),
+        "p95 ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--events", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    from benchmarks.utils import setup_django, report
+
+    teardown = setup_django()
+    try:
+        from django.db.models import Q
+        from ebs_app.models.events import Event
+        from ebs_app.services import event_search
+
+        rng = random.Random(0)
+        started = time.perf_counter()
+        rebuild_seconds = seed(args.events, rng)
+        print(
+            f"Seeded {args.events} events in {time.perf_counter() - started:.0f}s, "
+            f"index rebuilt in {rebuild_seconds:.1f}s"
+        )
+
+        # Common: a kind of event and the prefix of another word, thousands of
+        # matches to rank. Rare: the number of one event, a handful of matches.
+        common = [
+            [rng.choice(KINDS)]
+            if index % 2
+            else [rng.choice(ADJECTIVES), rng.choice(KINDS)[:3]]
+            for index in range(args.queries)
+        ]
+        rare = [
+            [rng.choice(KINDS), str(rng.randrange(args.events))]
+            for _ in range(args.queries)
+        ]
+        date_from = datetime(2030, 3, 1, tzinfo=timezone.utc)
+        date_to = date_from + timedelta(days=30)
+
+        def scan(terms):
+            queryset = Event.objects.all()
+            for term in terms:
+                queryset = queryset.filter(
+                    Q(event_name__icontains=term)
+                    | Q(event_description__icontains=term)
+                    | Q(venue__icontains=term)
+                )
+            return list(queryset.values_list("id", flat=True)[:20])
+
+        def filtered(terms):
+            return event_search.search(
+                terms, date_from=date_from, date_to=date_to, venue=VENUES[0]
+            )
+
+        rows = []
+        for name, queries in (("common", common), ("rare", rare)):
+            rows += [
+                measure(f"{name} index", queries, event_search.search),
+                measure(f"{name} scan", queries, scan),
+                measure(f"{name} index+filters", queries, filtered),
+            ]
+    finally:
+        teardown()
+    report(f"Event search, {args.events} events", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Module: benchmarks.json_rendering
+
+Render time and bytes on the wire of booking list responses.
+
+The database is seeded with the largest --rows bookings of two sub bookings each,
+serialised once as the booking list serialises them. Then for every response size:
+- render: the JSONRenderer of DRF, and FastJSONRenderer with the pure-Python and the
+  orjson encoders, best of --runs.
+- wire: the bytes of the rendered response, and of its gzip and brotli encodings
+  as CompressionMiddleware sends them, with the time taken to compress.
+
+Usage:
+    python -m benchmarks.json_rendering --rows 1000 10000 --runs 5
+"""
+
+import argparse
+import time
+
+
+def best_of(runs, function):
+    best, result = None, None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    from benchmarks.utils import setup_django, report
+
+    teardown = setup_django()
+    try:
+        from rest_framework.renderers import JSONRenderer
+        from ebs_app import middleware
+        from ebs_app.models.bookings import Booking
+        from ebs_app.renderers import StdlibEncoder, get_encoder
+        from ebs_app.serializers.booking_serializers import BookingSerializer
+        from ebs_app.serializers.values_serializers import BookingValuesSerializer
+        from benchmarks.values_serializers import seed
+
+        seed(max(args.rows))
+        serializer = BookingValuesSerializer(BookingSerializer())
+        bookings = serializer.serialize(
+            serializer.get_queryset(Booking.objects.order_by("-id"))
+        )
+        encoders = [
+            ("drf", JSONRenderer().render),
+            ("stdlib", StdlibEncoder().dumps),
+            (type(get_encoder()).__name__, get_encoder().dumps),
+        ]
+        config = middleware.get_config()
+        compressor = middleware.CompressionMiddleware(None)
+
+        render_rows, wire_rows = [], []
+        for rows in args.rows:
+            data = {"next": None, "previous": None, "results": bookings[:rows]}
+            for name, render in encoders:
+                elapsed, content = best_of(args.runs, lambda: render(data))
+                render_rows.append(
+                    {"rows": rows, "encoder": name, "best ms": round(elapsed * 1000, 1)}
+                )
+            wire_rows.append(
+                {"rows": rows, "encoding": "identity", "bytes": len(content), "ms": 0}
+            )
+            for encoding in ["gzip"] + (["br"] if middleware.brotli else []):
+                elapsed, compressed = best_of(
+                    args.runs, lambda: compressor.compress(encoding, content, config)
+                )
+                wire_rows.append(
+                    {
+                        "rows": rows,
+                        "encoding": encoding,
+                        "bytes": len(compressed),
+                        "ms": round(elapsed * 1000, 1),
+                    }
+                )
+    finally:
+        teardown()
+    report(f"Render time, best of {args.runs}", render_rows)
+    report("Bytes on the wire", wire_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Module: benchmarks.sharded_inventory
+
+Benchmark of sharded inventory counters for a hot ticket.
+
+Concurrent bookers claim single seats of one GENERAL_ADMISSION ticket, first with
+the availability kept in one row and then split across shards.
+
+Note: SQLite serialises all writers on a database level lock, so shards only pay off
+on a database with row level locking such as PostgreSQL. Point DJANGO_SETTINGS_MODULE
+at such a configuration to measure the real gain.
+
+Usage:
+    python -m benchmarks.sharded_inventory --workers 64 --bookings 20 --shards 1 16
+"""
+
+import argparse
+import threading
+
+
+def run(shard_count, workers, bookings):
+    """
+    Run the bookers against a ticket split across shard_count shards.
+
+    Args:
+        shard_count (int): The number of shards of the ticket.
+        workers (int): The number of concurrent bookers.
+        bookings (int): The number of single seat bookings attempted by every booker.
+
+    Returns:
+        dict: The measured results.
+    """
+    from ebs_app.models.tickets import Ticket
+    from ebs_app.services.reservations import configure_shards, reserve_seats
+    from benchmarks.utils import create_fixtures, retry_busy, run_workers
+
+    total = workers * bookings
+    _, (ticket,) = create_fixtures(availability=total)
+    configure_shards(ticket.id, shard_count)
+    results = {"booked": 0, "retries": 0}
+    lock = threading.Lock()
+
+    def worker(_index):
+        booked = retries = 0
+        for _ in range(bookings):
+            retries += retry_busy(reserve_seats, [(ticket.id, 1)])
+            booked += 1
+        with lock:
+            results["booked"] += booked
+            results["retries"] += retries
+
+    elapsed = run_workers(worker, workers)
+
+    remaining = (
+        Ticket.objects.with_availability().get(id=ticket.id).current_availability
+    )
+    return {
+        "shards": shard_count,
+        "workers": workers,
+        "attempted": total,
+        "booked": results["booked"],
+        "retries": results["retries"],
+        "bookings/sec": round(results["booked"] / elapsed, 1),
+        "oversold": total - remaining != results["booked"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--bookings", type=int, default=20)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 16])
+    args = parser.parse_args()
+
+    from benchmarks.utils import setup_django, report
+
+    teardown = setup_django()
+    try:
+        rows = [run(shards, args.workers, args.bookings) for shards in args.shards]
+    finally:
+        teardown()
+    report("Sharded inventory", rows)
+
+
+if __name__ == "__main__":
+    main()
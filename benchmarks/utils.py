@@ -0,0 +1,159 @@
+"""
+Module: benchmarks.utils
+
+Shared helpers for the benchmark scripts.
+
+Every benchmark runs against a throwaway database created with the test database
+machinery of Django, so the development database is never touched. With SQLite the
+throwaway database is a file, which lets worker threads open their own connections.
+
+Note: Run the benchmarks from the project root, e.g. `python -m benchmarks.booking_contention`.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import django
+
+
+def setup_django():
+    """
+    Configure Django and create the throwaway benchmark database.
+
+    Returns:
+        callable: A function tearing down the benchmark database.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project_ebs.settings")
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    # Allows the test client host, for benchmarks going through the API.
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    if connection.vendor == "sqlite":
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(
+            tempfile.mkdtemp(), "benchmark.sqlite3"
+        )
+        connection.settings_dict.setdefault("OPTIONS", {})["timeout"] = 30
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    def teardown():
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    return teardown
+
+
+def create_fixtures(ticket_count=1, availability=100, price=100):
+    """
+    Create a customer, an event and its tickets for a benchmark run.
+
+    Args:
+        ticket_count (int): The number of tickets to be created for the event.
+        availability (int): The availability of every ticket.
+        price (int): The price of every ticket.
+
+    Returns:
+        tuple: The customer and the list of created tickets.
+    """
+    from django.contrib.auth.models import User
+    from users.customer.models import Customer
+    from ebs_app.models.events import Event
+    from ebs_app.models.tickets import Ticket
+
+    user = User.objects.create(username=f"bench-{time.monotonic_ns()}")
+    customer = Customer.objects.create(user=user)
+    event = Event.objects.create(
+        event_name="Benchmark Event",
+        event_date_time="2030-01-01T20:00Z",
+        venue="Benchmark Venue",
+    )
+    tickets = [
+        Ticket.objects.create(
+            event=event,
+            total_allotment=availability,
+            availability=availability,
+            price=price,
+        )
+        for _ in range(ticket_count)
+    ]
+    return customer, tickets
+
+
+def retry_busy(function, *args, attempts=100):
+    """
+    Call function in a transaction, retrying when the database reports it is busy.
+
+    SQLite fails a transaction upgrading its read lock to a write lock instead of
+    waiting, a client would retry such a booking.
+
+    Returns:
+        int: The number of retries which were needed.
+    """
+    from django.db import transaction, OperationalError
+
+    for retries in range(attempts):
+        try:
+            with transaction.atomic():
+                function(*args)
+            return retries
+        except OperationalError:
+            time.sleep(0.001)
+    raise OperationalError("database stayed busy")
+
+
+def run_workers(target, workers):
+    """
+    Run target in concurrent worker threads released at the same time.
+
+    Every worker closes its own database connection when it is done.
+
+    Args:
+        target (callable): The function run by every worker, called with the worker index.
+        workers (int): The number of worker threads.
+
+    Returns:
+        float: The elapsed wall clock time in seconds.
+    """
+    from django.db import connection
+
+    barrier = threading.Barrier(workers + 1)
+
+    def worker(index):
+        barrier.wait()
+        try:
+            target(index)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def report(title, rows):
+    """
+    Print the results of a benchmark as an aligned table.
+
+    Args:
+        title (str): The title of the benchmark.
+        rows (list): A list of dicts sharing the same keys.
+    """
+    print(title)
+    if not rows:
+        return
+    headers = list(rows[0])
+    widths = [
+        max(len(str(header)), *(len(str(row[header])) for row in rows))
+        for header in headers
+    ]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(row[h]).ljust(w) for h, w in zip(headers, widths)))
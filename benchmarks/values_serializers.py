@@ -0,0 +1,158 @@
+"""
+Module: benchmarks.values_serializers
+
+Rows per second of serialising bookings and tickets with the ModelSerializers and
+with the values serializers of the list endpoints.
+
+The database is seeded with --rows bookings of two sub bookings each and --rows
+tickets, half of them sharded. Every run reads and serialises all the rows, the
+queries included, the way the list endpoints read a page:
+- model: BookingSerializer / TicketSerializer over select_related and
+  prefetch_related querysets.
+- values: BookingValuesSerializer / TicketValuesSerializer over values() rows.
+
+Usage:
+    python -m benchmarks.values_serializers --rows 10000 --runs 5
+"""
+
+import argparse
+import time
+
+
+def seed(rows):
+    """
+    Seed the bookings and the tickets with bulk inserts.
+    """
+    from django.contrib.auth.models import User
+    from users.customer.models import Customer
+    from ebs_app.models.bookings import Booking, SubBooking
+    from ebs_app.models.choices import BookingStatus
+    from ebs_app.models.tickets import Ticket
+    from ebs_app.services.reservations import configure_shards
+    from benchmarks.utils import create_fixtures
+
+    _, tickets = create_fixtures(ticket_count=rows, availability=1000)
+    for ticket in tickets[::2]:
+        configure_shards(ticket.id, 4)
+    tickets = list(Ticket.objects.order_by("id")[:2])
+
+    users = User.objects.bulk_create(
+        [User(username=f"values-{index}") for index in range(100)]
+    )
+    customers = Customer.objects.bulk_create([Customer(user=user) for user in users])
+    bookings = Booking.objects.bulk_create(
+        [
+            Booking(
+                customer=customers[index % len(customers)],
+                status=BookingStatus.BOOKED,
+                total_price=200,
+            )
+            for index in range(rows)
+        ]
+    )
+    SubBooking.objects.bulk_create(
+        [
+            SubBooking(booking=booking, ticket=ticket, count=1)
+            for booking in bookings
+            for ticket in tickets
+        ]
+    )
+
+
+def measure(name, path, serialize, rows, runs):
+    """
+    Time a serialisation of all the rows, best of runs.
+
+    Returns:
+        dict: The measured results.
+    """
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        data = serialize()
+        elapsed = time.perf_counter() - started
+        assert len(data) == rows, len(data)
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "serializer": name,
+        "path": path,
+        "rows": rows,
+        "best ms": round(best * 1000, 1),
+        "rows/sec": int(rows / best),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    from benchmarks.utils import setup_django, report
+
+    teardown = setup_django()
+    try:
+        from ebs_app.models.bookings import Booking
+        from ebs_app.models.tickets import Ticket
+        from ebs_app.serializers.booking_serializers import BookingSerializer
+        from ebs_app.serializers.ticket_serializers import TicketSerializer
+        from ebs_app.serializers.values_serializers import (
+            BookingValuesSerializer,
+            TicketValuesSerializer,
+        )
+
+        seed(args.rows)
+        bookings = (
+            Booking.objects.select_related("customer__user")
+            .prefetch_related("sub_bookings")
+            .order_by("-id")
+        )
+        tickets = Ticket.objects.with_availability().order_by("id")
+
+        def model(serializer_class, queryset):
+            return lambda: serializer_class(queryset.all(), many=True).data
+
+        def values(values_serializer_class, serializer_class, queryset):
+            def serialize():
+                serializer = values_serializer_class(serializer_class())
+                return serializer.serialize(serializer.get_queryset(queryset.all()))
+
+            return serialize
+
+        rows = [
+            measure(
+                "booking",
+                "model",
+                model(BookingSerializer, bookings),
+                args.rows,
+                args.runs,
+            ),
+            measure(
+                "booking",
+                "values",
+                values(BookingValuesSerializer, BookingSerializer, bookings),
+                args.rows,
+                args.runs,
+            ),
+            measure(
+                "ticket",
+                "model",
+                model(TicketSerializer, tickets),
+                args.rows,
+                args.runs,
+            ),
+            measure(
+                "ticket",
+                "values",
+                values(TicketValuesSerializer, TicketSerializer, tickets),
+                args.rows,
+                args.runs,
+            ),
+        ]
+    finally:
+        teardown()
+    report(f"Serialisation of {args.rows} rows, best of {args.runs}", rows)
+
+
+if __name__ == "__main__":
+    main()
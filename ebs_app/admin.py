@@ -1,7 +1,10 @@
 from django.contrib import admin
 from ebs_app.models.events import Event
-from ebs_app.models.bookings import Booking
+from ebs_app.models.bookings import Booking, SubBooking
 from ebs_app.models.tickets import Ticket
+from ebs_app.models.cancellations import EventCancellation
+from ebs_app.models.sales import SalesSummary
+from ebs_app.models.availability import EventAvailability
 
 
 # Register your models here.
@@ -25,6 +28,21 @@ class EventAdmin(admin.ModelAdmin):
     list_display = ["id", "event_name", "event_date_time", "venue"]
 
 
+class SubBookingInline(admin.TabularInline):
+    """
+    Inline admin for the sub bookings of a booking.
+
+    Fields:
+    - ticket: The booked ticket.
+    - count: The number of seats booked.
+    """
+
+    model = SubBooking
+    fields = ["ticket", "count"]
+    raw_id_fields = ["ticket"]
+    extra = 0
+
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     """
@@ -39,12 +57,13 @@ class BookingAdmin(admin.ModelAdmin):
     List Display Fields:
     - id: The primary key of the booking.
     - customer: The customer who made the booking.
-    - ticket: The ticket associated with the booking.
-    - count: The number of seats booked.
     - status: The booking status.
+
+    The sub bookings of a booking are edited inline.
     """
 
     list_display = ["id", "customer", "status"]
+    inlines = [SubBookingInline]
 
 
 @admin.register(Ticket)
@@ -62,8 +81,93 @@ class TicketAdmin(admin.ModelAdmin):
     - id: The primary key of the ticket.
     - event: The event associated with the ticket.
     - ticket_type: The type of the ticket.
-    - availability: The number of available tickets.
+    - current_availability: The number of available tickets, including sharded seats.
+    - current_held: The seats of pending bookings, including sharded seats.
+    - sold: The seats of booked bookings.
     - price: The price of the ticket.
     """
 
-    list_display = ["id", "event", "ticket_type", "availability", "price"]
+    list_display = [
+        "id",
+        "event",
+        "ticket_type",
+        "current_availability",
+        "current_held",
+        "sold",
+        "price",
+    ]
+    readonly_fields = ["held", "sold"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_availability()
+
+
+@admin.register(EventCancellation)
+class EventCancellationAdmin(admin.ModelAdmin):
+    """
+    Admin class for managing EventCancellation models.
+
+    This admin class allows following the jobs
+    cancelling the bookings of events called off.
+
+    List Display Fields:
+    - id: The primary key of the job.
+    - event: The event called off.
+    - status: The state of the job.
+    - cancelled: The number of bookings cancelled so far.
+    - total: The number of bookings to be cancelled.
+    - updated_at: When the job last made progress.
+    """
+
+    list_display = ["id", "event", "status", "cancelled", "total", "updated_at"]
+    list_filter = ["status"]
+
+
+@admin.register(SalesSummary)
+class SalesSummaryAdmin(admin.ModelAdmin):
+    """
+    Admin class for managing SalesSummary models.
+
+    This admin class allows checking the sales
+    rollups shown on the organiser dashboard.
+
+    List Display Fields:
+    - event: The event sold.
+    - ticket_type: The type of the tickets sold.
+    - sold: The seats of the booked bookings.
+    - revenue: The price of the sold seats.
+    - cancelled: The seats cancelled after confirmation.
+    - updated_at: When the sales last changed.
+    """
+
+    list_display = [
+        "event",
+        "ticket_type",
+        "sold",
+        "revenue",
+        "cancelled",
+        "updated_at",
+    ]
+    list_filter = ["ticket_type"]
+    raw_id_fields = ["event"]
+
+
+@admin.register(EventAvailability)
+class EventAvailabilityAdmin(admin.ModelAdmin):
+    """
+    Admin class for managing EventAvailability models.
+
+    This admin class allows checking the availability
+    rollups of the events.
+
+    List Display Fields:
+    - event: The event.
+    - remaining: The seats left across its tickets.
+    - cheapest_price: The lowest price with seats left.
+    - sold_out: Whether none of its tickets has seats left.
+    - updated_at: When the rollup was last refreshed.
+    """
+
+    list_display = ["event", "remaining", "cheapest_price", "sold_out", "updated_at"]
+    list_filter = ["sold_out"]
+    raw_id_fields = ["event"]
@@ -0,0 +1,86 @@
+"""
+Module: ebs_app.consumers
+
+This module contains the WebSocket consumers of the Event Booking System (EBS) application.
+
+Contents:
+- EventAvailabilityConsumer: Pushes the availability of the tickets of an event.
+  - Sends a snapshot of all the tickets of the event on connection.
+  - Forwards the changes collected by ebs_app.services.availability_push.
+
+Note: This module is part of the ebs_app package and should be imported accordingly.
+"""
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from ebs_app.models.events import Event
+from ebs_app.models.tickets import Ticket
+from ebs_app.services import availability_push
+
+
+class EventAvailabilityConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Event Availability Consumer:
+
+    ws/events/<event_id>/availability/
+
+    [Authentication Required]
+
+    Pushes the availability of the tickets of an event, instead of polling
+    GET /tickets/. Connections of anonymous users or to unknown events are rejected.
+
+    Message Structure:
+    {
+        "type": "snapshot",         # "snapshot" on connection, then "availability"
+        "event": 12,
+        "tickets": [
+            {"id": 1, "availability": 125},
+        ]
+    }
+
+    "availability" messages only carry the tickets which changed since the
+    previous message.
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        self.event_id = self.scope["url_route"]["kwargs"]["event_id"]
+        self.group_name = availability_push.group_name(self.event_id)
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+        # Join the group before reading the snapshot, so changes committed while it
+        # is read are pushed after it instead of being lost.
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        tickets = await self.get_tickets()
+        if tickets is None:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            await self.close()
+            return
+        await self.accept()
+        await self.send_json(
+            {"type": "snapshot", "event": self.event_id, "tickets": tickets}
+        )
+
+    async def disconnect(self, code):
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def availability_update(self, message):
+        await self.send_json(
+            {
+                "type": "availability",
+                "event": message["event"],
+                "tickets": message["tickets"],
+            }
+        )
+
+    @database_sync_to_async
+    def get_tickets(self):
+        if not Event.objects.filter(id=self.event_id).exists():
+            return None
+        return [
+            {"id": ticket.id, "availability": ticket.current_availability}
+            for ticket in Ticket.objects.with_availability()
+            .filter(event_id=self.event_id)
+            .order_by("id")
+        ]
@@ -70,3 +70,92 @@ class InvalidSubBookingDataAPIException(APIException):
 class AlreadyCancelledAPIException(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
     default_detail = "Ticket is already cancelled."
+
+
+class HoldExpiredAPIException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "The booking hold has expired."
+
+
+class BookingNotPendingAPIException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Booking is not pending confirmation."
+
+
+class TooManyBookingsAPIException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Too many bookings in a single request."
+
+
+class InvalidWaitingRoomTokenAPIException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Invalid waiting room token."
+
+
+class WaitingRoomTokenRequiredAPIException(APIException):
+    status_code = status.HTTP_403_FORBIDDEN
+    default_detail = "Please join the waiting room of this event to book it."
+
+
+class NotAdmittedYetAPIException(APIException):
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    default_detail = "You have not been admitted from the waiting room yet."
+
+
+class AdmissionExpiredAPIException(APIException):
+    status_code = status.HTTP_403_FORBIDDEN
+    default_detail = "Your waiting room admission has expired."
+
+
+class InvalidIdempotencyKeyAPIException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Please provide a valid Idempotency-Key."
+
+
+class IdempotencyKeyReusedAPIException(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used with a different request."
+
+
+class IdempotentRequestInProgressAPIException(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still in progress."
+
+
+class CancellationInProgressAPIException(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The bookings of this event are already being cancelled."
+
+
+class InvalidBookingFilterAPIException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Bookings can be filtered by event ID, ticket type and status."
+
+
+class InvalidFieldSelectionAPIException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Unknown field requested in ?fields= or ?expand=."
+
+
+class InvalidSearchQueryAPIException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Search with ?q=, optionally ?date_from=, ?date_to= (ISO 8601), ?venue= and ?limit=."
+
+
+class InvalidDateWindowAPIException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = (
+        "Filter events with ?date_from=, ?date_to=, ?on= (ISO 8601) and ?days=<N>."
+    )
+
+
+class InvalidSalesFilterAPIException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Sales can be filtered by event ID and ticket type."
+
+
+class InvalidExportFormatAPIException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = (
+        "Export the bookings with ?export_format=csv or ?export_format=ndjson."
+    )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from ebs_app.services import event_search
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the full-text search index of the events from the event table.
+
+    Run it after loading events by other means than the API, such as fixtures or bulk
+    imports. The previous index keeps serving searches until the rebuild commits.
+
+    Example:
+    python manage.py rebuild_event_search --batch-size 10000
+    """
+
+    help = "Rebuild the full-text search index of the events."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Events read and indexed at once.",
+        )
+
+    def handle(self, *args, **options):
+        indexed = event_search.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} events."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from ebs_app.services import sales_summary
+
+
+class Command(BaseCommand):
+    """
+    Recompute the sales summaries of the organiser dashboard from the bookings.
+
+    Run it once after the sales_summary migration to fill the summaries of the
+    existing bookings, the reconcile_sales_summary task keeps them in step afterwards.
+
+    Example:
+    python manage.py reconcile_sales_summary --batch-size 1000
+    """
+
+    help = "Recompute the sales summaries from the bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=sales_summary.DEFAULT_BATCH_SIZE,
+            help="Events reconciled per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        corrected = sales_summary.reconcile(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Corrected {corrected} sales summaries."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from ebs_app.services import inventory_front
+
+
+class Command(BaseCommand):
+    """
+    Load the inventory front counters of all unsharded tickets from the database.
+
+    Run it when the application starts, before the tickets go on sale. Tickets missing
+    from the counters are otherwise loaded on their first booking.
+
+    Example:
+    python manage.py warm_inventory_front
+    """
+
+    help = "Load the inventory front counters from the database."
+
+    def handle(self, *args, **options):
+        if not inventory_front.is_enabled():
+            raise CommandError("The inventory front is not enabled.")
+        loaded = inventory_front.warm_up()
+        self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} ticket counters."))
@@ -0,0 +1,167 @@
+"""
+Module: ebs_app.middleware
+
+This module contains the response compression of the API.
+
+Responses of at least MIN_SIZE bytes are compressed with the encoding the client
+prefers among the ones it accepts in its Accept-Encoding header. Brotli ("br") is
+offered when the brotli package is installed, gzip always. On equal preference of
+the client, the order of ENCODINGS decides. Booking and event lists are repetitive
+JSON, they shrink to a fraction of their size.
+
+Like the GZipMiddleware of Django, which this middleware replaces:
+- Responses with a Content-Encoding already are left alone.
+- Vary: Accept-Encoding is added, so caches keep one copy per encoding.
+- A strong ETag is made weak, conditional GETs still match it.
+- gzip output is padded with random bytes against BREACH attacks.
+- Compressed responses larger than the original are not used.
+- Streamed responses are compressed chunk by chunk, asynchronous streams are not
+  compressed.
+
+Settings:
+    EBS_COMPRESSION = {
+        "ENABLED": True,
+        "MIN_SIZE": 1024,               # Smallest response body compressed, in bytes
+        "ENCODINGS": ["br", "gzip"],    # Offered encodings, by server preference
+        "BROTLI_QUALITY": 5,            # 0 to 11, faster to smaller
+    }
+
+Contents:
+- CompressionMiddleware: Compresses the responses.
+- get_encodings: Returns the encodings offered by the server.
+- negotiate: Picks the encoding of a response from the Accept-Encoding header.
+"""
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_CONFIG = {
+    "ENABLED": True,
+    "MIN_SIZE": 1024,
+    "ENCODINGS": ["br", "gzip"],
+    "BROTLI_QUALITY": 5,
+}
+
+GZIP_MAX_RANDOM_BYTES = 100
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "EBS_COMPRESSION", {})}
+
+
+def get_encodings(config):
+    """
+    Return the configured encodings the server can produce.
+
+    Returns:
+        list: The encodings, brotli is left out when the brotli package is missing.
+    """
+    return [
+        encoding
+        for encoding in config["ENCODINGS"]
+        if encoding == "gzip" or (encoding == "br" and brotli is not None)
+    ]
+
+
+def negotiate(accept_encoding, encodings):
+    """
+    Pick the encoding of a response.
+
+    Args:
+        accept_encoding (str): The Accept-Encoding header of the request.
+        encodings (list): The encodings offered by the server, by preference.
+
+    Returns:
+        str: The encoding with the highest quality value for the client,
+            or None when the client accepts none of them.
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Compresses the responses with the encoding negotiated with the client.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        config = get_config()
+        if not config["ENABLED"] or response.has_header("Content-Encoding"):
+            return response
+        if not response.streaming and len(response.content) < config["MIN_SIZE"]:
+            return response
+        if response.streaming and response.is_async:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), get_encodings(config)
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                encoding, response.streaming_content, config
+            )
+            # The compressed size is not known until the stream ends.
+            del response.headers["Content-Length"]
+        else:
+            content = self.compress(encoding, response.content, config)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers["Content-Length"] = str(len(content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def compress(self, encoding, content, config):
+        if encoding == "br":
+            return brotli.compress(content, quality=config["BROTLI_QUALITY"])
+        return compress_string(content, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+
+    def compress_stream(self, encoding, chunks, config):
+        if encoding == "gzip":
+            yield from compress_sequence(chunks, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+            return
+        compressor = brotli.Compressor(quality=config["BROTLI_QUALITY"])
+        for chunk in chunks:
+            # Flushed per chunk, so clients get the rows as they are streamed.
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.4 on 2026-10-17 23:40
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ebs_app", "0013_remove_subbooking_booking"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="shard_count",
+            field=models.PositiveSmallIntegerField(
+                default=1,
+                validators=[
+                    django.core.validators.MinValueValidator(1),
+                    django.core.validators.MaxValueValidator(64),
+                ],
+            ),
+        ),
+        migrations.CreateModel(
+            name="TicketShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.PositiveSmallIntegerField()),
+                ("availability", models.IntegerField(default=0)),
+                (
+                    "ticket",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shards",
+                        to="ebs_app.ticket",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="ticketshard",
+            constraint=models.UniqueConstraint(
+                fields=("ticket", "index"), name="unique_ticket_shard_index"
+            ),
+        ),
+    ]
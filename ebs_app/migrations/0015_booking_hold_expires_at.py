@@ -0,0 +1,23 @@
+# Generated by Django 4.2.4 on 2026-10-17 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ebs_app", "0014_ticket_shards"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="hold_expires_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["status", "hold_expires_at"], name="booking_hold_expiry_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.4 on 2026-10-18 00:30
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_booking(apps, schema_editor):
+    """
+    Point every sub booking at the booking linking it in the many-to-many table.
+
+    A sub booking always belonged to a single booking, should it be linked twice the
+    oldest link wins. Sub bookings which no booking links to are deleted.
+    """
+    SubBooking = apps.get_model("ebs_app", "SubBooking")
+    Through = apps.get_model("ebs_app", "Booking").sub_bookings.through
+    SubBooking.objects.update(
+        booking_id=Subquery(
+            Through.objects.filter(subbooking_id=OuterRef("pk"))
+            .order_by("id")
+            .values("booking_id")[:1]
+        )
+    )
+    SubBooking.objects.filter(booking__isnull=True).delete()
+    _check_constraints(schema_editor)
+
+
+def restore_links(apps, schema_editor):
+    SubBooking = apps.get_model("ebs_app", "SubBooking")
+    Through = apps.get_model("ebs_app", "Booking").sub_bookings.through
+    Through.objects.bulk_create(
+        Through(booking_id=booking_id, subbooking_id=sub_booking_id)
+        for sub_booking_id, booking_id in SubBooking.objects.values_list(
+            "id", "booking_id"
+        ).iterator()
+    )
+    _check_constraints(schema_editor)
+
+
+def _check_constraints(schema_editor):
+    """
+    Fire the deferred foreign key checks of the rows written so far.
+
+    PostgreSQL refuses to ALTER a table with pending trigger events, which the
+    following schema changes of the migration do in the same transaction.
+    """
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ebs_app", "0015_booking_hold_expires_at"),
+    ]
+
+    operations = [
+        # The related name is only final once the many-to-many field is gone.
+        migrations.AddField(
+            model_name="subbooking",
+            name="booking",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="ebs_app.booking",
+            ),
+        ),
+        migrations.RunPython(backfill_booking, restore_links),
+        migrations.RemoveField(
+            model_name="booking",
+            name="sub_bookings",
+        ),
+        migrations.AlterField(
+            model_name="subbooking",
+            name="booking",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="sub_bookings",
+                to="ebs_app.booking",
+            ),
+        ),
+    ]
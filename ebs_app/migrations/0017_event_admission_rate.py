@@ -0,0 +1,23 @@
+# Generated by Django 4.2.4 on 2026-10-18 00:08
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ebs_app", "0016_subbooking_booking"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="admission_rate",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Customers admitted by the waiting room per minute.",
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+    ]
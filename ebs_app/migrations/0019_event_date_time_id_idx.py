@@ -0,0 +1,18 @@
+# Generated by Django 4.2.4 on 2026-10-18 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ebs_app", "0018_event_cancellation"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["event_date_time", "id"], name="event_date_time_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.4 on 2026-10-18 00:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ebs_app", "0019_event_date_time_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(fields=["status", "id"], name="booking_status_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="subbooking",
+            index=models.Index(
+                fields=["booking", "ticket"], name="subbooking_booking_ticket_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["event", "ticket_type"], name="ticket_event_type_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,62 @@
+from django.db import migrations
+
+TABLE = "ebs_app_event_search"
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE {TABLE} USING fts5(
+        event_name, event_description, venue,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    INSERT INTO {TABLE} (rowid, event_name, event_description, venue)
+    SELECT id, event_name, event_description, venue FROM ebs_app_event
+    """,
+]
+
+POSTGRESQL_FORWARD = [
+    f"""
+    CREATE TABLE {TABLE} (
+        event_id integer PRIMARY KEY REFERENCES ebs_app_event (id) ON DELETE CASCADE,
+        document tsvector NOT NULL
+    )
+    """,
+    f"CREATE INDEX {TABLE}_document_idx ON {TABLE} USING GIN (document)",
+    f"""
+    INSERT INTO {TABLE} (event_id, document)
+    SELECT id,
+        setweight(to_tsvector('english', event_name), 'A')
+        || setweight(to_tsvector('english', venue), 'B')
+        || setweight(to_tsvector('english', event_description), 'C')
+    FROM ebs_app_event
+    """,
+]
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Create and fill the full-text index of the events, see
+    ebs_app.services.event_search. Other databases get no index.
+    """
+    statements = {
+        "sqlite": SQLITE_FORWARD,
+        "postgresql": POSTGRESQL_FORWARD,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ebs_app", "0021_event_ticket_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
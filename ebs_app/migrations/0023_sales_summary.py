@@ -0,0 +1,76 @@
+# Generated by Django 4.2.4 on 2026-10-18 01:03
+
+from django.db import migrations, models
+from django.db.models.functions import Now
+import django.db.models.deletion
+
+
+def backfill_confirmed_at(apps, schema_editor):
+    """
+    Mark the bookings already BOOKED as confirmed now.
+
+    Bookings cancelled before the migration cannot be told from released holds and
+    stay unconfirmed, they do not count as cancelled sales.
+    """
+    Booking = apps.get_model("ebs_app", "Booking")
+    Booking.objects.filter(status="BOOKED").update(confirmed_at=Now())
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ebs_app", "0022_event_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="confirmed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_confirmed_at, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name="SalesSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "ticket_type",
+                    models.CharField(
+                        choices=[
+                            ("GENERAL_ADMISSION", "General Admission"),
+                            ("VIP", "VIP"),
+                            ("PREMIUM", "Premium"),
+                            ("SUPER_DELUX", "Super Delux"),
+                            ("ROYAL", "Royal"),
+                        ],
+                        max_length=51,
+                    ),
+                ),
+                ("sold", models.IntegerField(default=0)),
+                ("revenue", models.IntegerField(default=0)),
+                ("cancelled", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales",
+                        to="ebs_app.event",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="salessummary",
+            constraint=models.UniqueConstraint(
+                fields=("event", "ticket_type"), name="sales_summary_event_type_uniq"
+            ),
+        ),
+    ]
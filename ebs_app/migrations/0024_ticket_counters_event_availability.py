@@ -0,0 +1,100 @@
+# Generated by Django 4.2.4 on 2026-10-18 01:13
+
+from django.db import migrations, models
+from django.db.models import Exists, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Now
+import django.db.models.deletion
+
+
+def _sum(rows, group, field):
+    return Coalesce(
+        Subquery(rows.values(group).annotate(total=Sum(field)).values("total")), 0
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    """
+    Count the seats of the existing bookings in the held and sold counters of their
+    tickets, and compute the availability rollups of the existing events.
+    """
+    Ticket = apps.get_model("ebs_app", "Ticket")
+    TicketShard = apps.get_model("ebs_app", "TicketShard")
+    SubBooking = apps.get_model("ebs_app", "SubBooking")
+    Event = apps.get_model("ebs_app", "Event")
+    EventAvailability = apps.get_model("ebs_app", "EventAvailability")
+
+    lines = SubBooking.objects.filter(ticket=OuterRef("pk"))
+    Ticket.objects.update(
+        held=_sum(lines.filter(booking__status="PENDING"), "ticket", "count"),
+        sold=_sum(lines.filter(booking__status="BOOKED"), "ticket", "count"),
+    )
+
+    EventAvailability.objects.bulk_create(
+        [
+            EventAvailability(event_id=event_id)
+            for event_id in Event.objects.values_list("id", flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+    tickets = Ticket.objects.filter(event=OuterRef("event_id"))
+    available = tickets.annotate(
+        left=F("availability")
+        + _sum(
+            TicketShard.objects.filter(ticket=OuterRef("pk")), "ticket", "availability"
+        )
+    ).filter(left__gt=0)
+    EventAvailability.objects.update(
+        remaining=_sum(tickets, "event", "availability")
+        + _sum(
+            TicketShard.objects.filter(ticket__event=OuterRef("event_id")),
+            "ticket__event",
+            "availability",
+        ),
+        cheapest_price=Subquery(available.order_by("price").values("price")[:1]),
+        sold_out=Exists(tickets) & ~Exists(available),
+        updated_at=Now(),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ebs_app", "0023_sales_summary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventAvailability",
+            fields=[
+                (
+                    "event",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="availability",
+                        serialize=False,
+                        to="ebs_app.event",
+                    ),
+                ),
+                ("remaining", models.IntegerField(default=0)),
+                ("cheapest_price", models.IntegerField(blank=True, null=True)),
+                ("sold_out", models.BooleanField(default=False)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="held",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="sold",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="ticketshard",
+            name="held",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.4 on 2026-10-18 01:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ebs_app", "0024_ticket_counters_event_availability"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="front_flushed",
+            field=models.IntegerField(default=0),
+        ),
+    ]
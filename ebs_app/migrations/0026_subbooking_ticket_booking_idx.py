@@ -0,0 +1,28 @@
+# Generated by Django 4.2.4 on 2026-10-18 01:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ebs_app", "0025_ticket_front_flushed"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="subbooking",
+            index=models.Index(
+                fields=["ticket", "booking"], name="subbooking_ticket_booking_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="subbooking",
+            name="ticket",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="ebs_app.ticket",
+            ),
+        ),
+    ]
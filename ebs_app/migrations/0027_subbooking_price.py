@@ -0,0 +1,33 @@
+# Generated by Django 4.2.4 on 2026-10-18 02:31
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_prices(apps, schema_editor):
+    """
+    Price the seats of the existing booking lines at the current price of their
+    ticket, the price they were booked at is not known.
+    """
+    Ticket = apps.get_model("ebs_app", "Ticket")
+    SubBooking = apps.get_model("ebs_app", "SubBooking")
+    SubBooking.objects.update(
+        price=Subquery(
+            Ticket.objects.filter(id=OuterRef("ticket_id")).values("price")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ebs_app", "0026_subbooking_ticket_booking_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subbooking",
+            name="price",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_prices, migrations.RunPython.noop),
+    ]
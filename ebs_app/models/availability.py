@@ -0,0 +1,37 @@
+"""
+Event Availability Model
+"""
+from django.db import models
+from ebs_app.models.events import Event
+
+
+class EventAvailability(models.Model):
+    """
+    EventAvailability Model:
+
+    Represents the availability of all the tickets of an event, so the seats left of
+    an event are read from one row, see ebs_app.services.event_availability.
+
+    Fields:
+    - event (OneToOneField):
+        The event, also the primary key.
+    - remaining (IntegerField):
+        The seats left across all the tickets of the event.
+    - cheapest_price (IntegerField):
+        The lowest price of the tickets with seats left, empty when none is left.
+    - sold_out (BooleanField):
+        Whether the event has tickets and none of them has seats left.
+    - updated_at (DateTimeField):
+        When the availability was last refreshed.
+    """
+
+    event = models.OneToOneField(
+        Event, primary_key=True, on_delete=models.CASCADE, related_name="availability"
+    )
+    remaining = models.IntegerField(default=0)
+    cheapest_price = models.IntegerField(null=True, blank=True)
+    sold_out = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.event_id} - {self.remaining}"
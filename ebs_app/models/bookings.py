@@ -2,6 +2,7 @@
 Ticket Booking Model
 """
 from django.db import models
+from django.db.models import Exists, OuterRef
 from users.customer.models import Customer
 from ebs_app.models.tickets import Ticket
 from ebs_app.models.choices import BookingStatus
@@ -9,15 +10,103 @@ from ebs_app.models.choices import BookingStatus
 
 
 class SubBooking(models.Model):
+    """
+    SubBooking Model:
+
+    Represents a line item of a booking, a number of seats of a single ticket.
+
+    Fields:
+    - booking (ForeignKey):
+        The booking the line item belongs to.
+    - ticket (ForeignKey):
+        The booked ticket.
+    - count (IntegerField):
+        The number of seats booked.
+    - price (IntegerField):
+        The price of a seat when the line was booked, later price changes of the
+        ticket do not change the revenue of the line.
+
+    Indexes:
+    - (booking, ticket): Whether a booking has a line of some tickets,
+        without reading the lines.
+    - (ticket, booking): The bookings with a line of some tickets, without reading
+        the lines. Also serves the lookups of the lines of a ticket.
+    """
+
+    booking = models.ForeignKey(
+        "Booking",
+        null=False,
+        blank=False,
+        on_delete=models.CASCADE,
+        related_name="sub_bookings",
+    )
     ticket = models.ForeignKey(
-        Ticket, null=False, blank=False, on_delete=models.CASCADE
+        Ticket, null=False, blank=False, on_delete=models.CASCADE, db_index=False
     )
     count = models.IntegerField(default=0, null=False, blank=False)
+    price = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["booking", "ticket"], name="subbooking_booking_ticket_idx"
+            ),
+            models.Index(
+                fields=["ticket", "booking"], name="subbooking_ticket_booking_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.ticket.id} - {self.count}"
 
 
+class BookingQuerySet(models.QuerySet):
+    def with_lines(
+        self, organiser=None, event=None, ticket_type=None, by_booking=False
+    ):
+        """
+        Keep the bookings with a line of the matching tickets.
+
+        The matching tickets are selected once through the event and ticket indexes.
+        The bookings are then read from the lines of those tickets through the
+        (ticket, booking) index of the lines, so the bookings of other tickets are
+        never read. With by_booking, every booking of the queryset is checked instead
+        with a lookup of the (booking, ticket) index of its lines, for querysets
+        already narrowed down to a few bookings, such as those of a customer.
+
+        Neither reads the sub booking rows themselves.
+
+        Args:
+            organiser (EventOrganiser): Tickets of the events of the organiser.
+            event (int): Tickets of the event with the given ID.
+            ticket_type (str): Tickets of the given type.
+            by_booking (bool): Whether the lines are looked up booking by booking.
+
+        Returns:
+            QuerySet: The bookings with at least one matching line.
+        """
+        tickets = Ticket.objects.all()
+        if organiser is not None:
+            tickets = tickets.filter(event__event_organiser=organiser)
+        if event is not None:
+            tickets = tickets.filter(event_id=event)
+        if ticket_type is not None:
+            tickets = tickets.filter(ticket_type=ticket_type)
+        if by_booking:
+            return self.filter(
+                Exists(
+                    SubBooking.objects.filter(
+                        booking=OuterRef("pk"), ticket__in=tickets.values("id")
+                    )
+                )
+            )
+        return self.filter(
+            id__in=SubBooking.objects.filter(ticket__in=tickets.values("id")).values(
+                "booking_id"
+            )
+        )
+
+
 
 class Booking(models.Model):
     """
@@ -28,14 +117,21 @@ class Booking(models.Model):
     Fields:
     - customer (ForeignKey):
         The associated customer who made the booking.
-    - ticket (ForeignKey):
-        The associated ticket for which the booking is made.
-    - count (IntegerField):
-        The number of tickets purchased in the booking.
+    - sub_bookings (reverse ForeignKey):
+        The line items of the booking, see SubBooking.
     - status (CharField):
         The current status of the booking (e.g., PENDING, CONFIRMED).
     - is_cancelled (BooleanField):
         Indicates whether the booking has been cancelled.
+    - hold_expires_at (DateTimeField):
+        When the seats held by a PENDING booking are released, unless it is confirmed.
+    - confirmed_at (DateTimeField):
+        When the booking became BOOKED, kept once it is cancelled, so the sales
+        summary tells cancelled sales from released holds.
+
+    Managers:
+    - objects (BookingQuerySet): Adds with_lines, the bookings with a line of
+        the tickets of an organiser, an event or a ticket type.
 
     Properties:
     - total_price (property):
@@ -53,7 +149,6 @@ class Booking(models.Model):
     customer = models.ForeignKey(
         Customer, null=False, blank=False, on_delete=models.CASCADE
     )
-    sub_bookings = models.ManyToManyField(SubBooking, related_name="bookings")
     status = models.CharField(
         max_length=20,
         choices=BookingStatus.choices,
@@ -62,6 +157,18 @@ class Booking(models.Model):
     )
     total_price = models.IntegerField(default=0)
     is_cancelled = models.BooleanField(default=False)
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = BookingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "hold_expires_at"], name="booking_hold_expiry_idx"
+            ),
+            models.Index(fields=["status", "id"], name="booking_status_id_idx"),
+        ]
 
     # @property
     # def total_price(self):
@@ -0,0 +1,63 @@
+"""
+Event Cancellation Model
+"""
+from django.db import models
+from users.event_organiser.models import EventOrganiser
+from ebs_app.models.events import Event
+from ebs_app.models.choices import JobStatus
+
+
+class EventCancellation(models.Model):
+    """
+    EventCancellation Model:
+
+    Represents the background job cancelling all the bookings of an event.
+
+    Fields:
+    - event (ForeignKey):
+        The event whose bookings are cancelled.
+    - requested_by (ForeignKey):
+        The event organiser who called the event off.
+    - status (CharField):
+        The state of the job (QUEUED, RUNNING, DONE or FAILED).
+    - total (IntegerField):
+        The number of bookings to be cancelled when the job was requested.
+    - cancelled (IntegerField):
+        The number of bookings cancelled so far.
+    - last_booking_id (BigIntegerField):
+        The ID of the last booking processed, a failed job resumes after it.
+    - error (TextField):
+        Why the job failed.
+    - created_at, updated_at, finished_at (DateTimeField):
+        When the job was requested, last made progress and finished.
+
+    Properties:
+    - progress (property):
+        The percentage of bookings cancelled.
+    """
+
+    event = models.ForeignKey(
+        Event, on_delete=models.CASCADE, related_name="cancellations"
+    )
+    requested_by = models.ForeignKey(
+        EventOrganiser, null=True, on_delete=models.SET_NULL
+    )
+    status = models.CharField(
+        max_length=20, choices=JobStatus.choices, default=JobStatus.QUEUED
+    )
+    total = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+    last_booking_id = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def progress(self):
+        if not self.total:
+            return 100.0
+        return round(min(self.cancelled, self.total) * 100 / self.total, 1)
+
+    def __str__(self):
+        return f"{self.id} - {self.event_id} - {self.status}"
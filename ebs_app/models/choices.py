@@ -16,3 +16,10 @@ class BookingStatus(models.TextChoices):
     BOOKED = "BOOKED", "Booked"
     CANCELLED = "CANCELLED", "Cancelled"
     PENDING = "PENDING", "Pending"
+
+
+class JobStatus(models.TextChoices):
+    QUEUED = "QUEUED", "Queued"
+    RUNNING = "RUNNING", "Running"
+    DONE = "DONE", "Done"
+    FAILED = "FAILED", "Failed"
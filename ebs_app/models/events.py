@@ -2,6 +2,7 @@
 Event Model
 """
 
+from django.core.validators import MinValueValidator
 from django.db import models
 from users.event_organiser.models import EventOrganiser
 
@@ -23,6 +24,14 @@ class Event(models.Model):
         The venue where the event will take place.
     - event_organiser (ForeignKey):
         The event organiser associated with the event.
+    - admission_rate (PositiveIntegerField):
+        Customers admitted by the waiting room per minute (optional),
+        bookings are not gated by the waiting room when empty.
+    - updated_at (DateTimeField):
+        When the event was last modified, the validator of conditional GETs.
+
+    Indexes:
+    - (event_date_time, id): Cursor pagination of events by date.
 
     Methods:
     - __str__():
@@ -40,6 +49,20 @@ class Event(models.Model):
     event_organiser = models.ForeignKey(
         EventOrganiser, null=True, on_delete=models.CASCADE
     )
+    admission_rate = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1)],
+        help_text="Customers admitted by the waiting room per minute.",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["event_date_time", "id"], name="event_date_time_id_idx"
+            )
+        ]
 
     def __self__(self):
         return f"{self.id} - {self.event_name}"
@@ -0,0 +1,60 @@
+"""
+Sales Summary Model
+"""
+from django.db import models
+from ebs_app.models.events import Event
+from ebs_app.models.choices import TicketChoices
+
+
+class SalesSummary(models.Model):
+    """
+    SalesSummary Model:
+
+    Represents the sales of a ticket type of an event, kept up to date by the booking
+    paths, see ebs_app.services.sales_summary.
+
+    Fields:
+    - event (ForeignKey):
+        The event sold.
+    - ticket_type (CharField):
+        The type of the tickets sold.
+    - sold (IntegerField):
+        The seats of the BOOKED bookings.
+    - revenue (IntegerField):
+        The price of the sold seats.
+    - cancelled (IntegerField):
+        The seats of the bookings cancelled after they were confirmed.
+    - updated_at (DateTimeField):
+        When the sales last changed.
+
+    Constraints:
+    - (event, ticket_type): Unique, one summary per ticket type of an event.
+
+    Properties:
+    - cancellation_rate (property):
+        The percentage of the confirmed seats which were cancelled.
+    """
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="sales")
+    ticket_type = models.CharField(max_length=51, choices=TicketChoices.choices)
+    sold = models.IntegerField(default=0)
+    revenue = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "ticket_type"], name="sales_summary_event_type_uniq"
+            )
+        ]
+
+    @property
+    def cancellation_rate(self):
+        confirmed = self.sold + self.cancelled
+        if not confirmed:
+            return 0.0
+        return round(self.cancelled * 100 / confirmed, 1)
+
+    def __str__(self):
+        return f"{self.event_id} - {self.ticket_type} - {self.sold}"
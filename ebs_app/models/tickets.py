@@ -2,11 +2,81 @@
 Ticket Model
 """
 
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Now
 from ebs_app.models.choices import TicketChoices
 from ebs_app.models.events import Event
 
 
+MAX_TICKET_SHARDS = 64
+
+
+class TicketQuerySet(models.QuerySet):
+    def add_availability(self, deltas):
+        """
+        Add a per ticket delta to the availability with a single UPDATE.
+
+        Args:
+            deltas (dict): The change of availability per ticket id.
+
+        Returns:
+            int: The number of updated tickets.
+        """
+        return self.add_counters(availability=deltas)
+
+    def add_counters(self, **deltas):
+        """
+        Add per ticket deltas to the seat counters with a single UPDATE.
+
+        Args:
+            **deltas (dict): The change per ticket id of the availability, held
+                or sold counters, keyed by counter.
+
+        Returns:
+            int: The number of updated tickets.
+        """
+        deltas = {field: changes for field, changes in deltas.items() if changes}
+        ticket_ids = {ticket_id for changes in deltas.values() for ticket_id in changes}
+        if not ticket_ids:
+            return 0
+        return self.filter(id__in=sorted(ticket_ids)).update(
+            updated_at=Now(),
+            **{
+                field: F(field)
+                + Case(
+                    *[
+                        When(id=ticket_id, then=Value(delta))
+                        for ticket_id, delta in changes.items()
+                    ],
+                    default=Value(0),
+                    output_field=models.IntegerField(),
+                )
+                for field, changes in deltas.items()
+            },
+        )
+
+    def with_availability(self):
+        """
+        Annotate the seats available and held in the shards of every ticket,
+        so current_availability and current_held do not query the shards row by row.
+        """
+        return self.annotate(
+            shard_availability=Coalesce(Subquery(_sum_shards("availability")), 0),
+            shard_held=Coalesce(Subquery(_sum_shards("held")), 0),
+        )
+
+
+def _sum_shards(field):
+    return (
+        TicketShard.objects.filter(ticket=OuterRef("pk"))
+        .values("ticket")
+        .annotate(total=Sum(field))
+        .values("total")
+    )
+
+
 class Ticket(models.Model):
     """
     Ticket Model:
@@ -22,8 +92,36 @@ class Ticket(models.Model):
         The total number of tickets allotted for this type.
     - availability (IntegerField):
         The current number of available tickets for booking.
+        For sharded tickets, the seats which are not distributed to any shard.
+    - held (IntegerField):
+        The seats of PENDING bookings. For sharded tickets, the seats held from the
+        shards are counted by the shards, and given back through this column.
+    - sold (IntegerField):
+        The seats of BOOKED bookings.
+    - front_flushed (IntegerField):
+        The seats claimed from the inventory front and written to the counters of the
+        ticket, see ebs_app.services.inventory_front.
     - price (IntegerField):
         The price of the ticket.
+    - shard_count (PositiveSmallIntegerField):
+        The number of TicketShard counters the availability is split across.
+        1 means the ticket is not sharded.
+    - updated_at (DateTimeField):
+        When the ticket was last modified, including its availability.
+        Seats claimed from the shards touch the updated_at of the shards instead.
+
+    Indexes:
+    - (event, ticket_type): The tickets of the events of an organiser, by type.
+
+    Properties:
+    - is_sharded (property): Whether the availability is split across shards.
+    - current_availability (property):
+        The seats left, including the seats held by the shards.
+    - current_held (property):
+        The seats of PENDING bookings, including the ones counted by the shards.
+
+    The held and sold counters are only written by the booking engine, editing the
+    availability or the allotment of a ticket leaves them untouched.
 
     Methods:
     - __str__(): Returns a formatted string representation of the ticket.
@@ -42,6 +140,96 @@ class Ticket(models.Model):
     total_allotment = models.IntegerField(default=100, null=False, blank=False)
     availability = models.IntegerField(default=0, null=False, blank=False)
     price = models.IntegerField(default=0, null=False, blank=False)
+    held = models.IntegerField(default=0)
+    sold = models.IntegerField(default=0)
+    front_flushed = models.IntegerField(default=0)
+    shard_count = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[MinValueValidator(1), MaxValueValidator(MAX_TICKET_SHARDS)],
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TicketQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["event", "ticket_type"], name="ticket_event_type_idx")
+        ]
+
+    @property
+    def is_sharded(self):
+        return self.shard_count > 1
+
+    @property
+    def current_availability(self):
+        """
+        Calculate the seats left for the ticket.
+
+        Returns:
+            int: The availability column plus the seats held by the shards.
+        """
+        if not self.is_sharded:
+            return self.availability
+        shard_availability = getattr(self, "shard_availability", None)
+        if shard_availability is None:
+            shard_availability = (
+                self.shards.aggregate(total=Sum("availability"))["total"] or 0
+            )
+        return self.availability + shard_availability
+
+    @property
+    def current_held(self):
+        """
+        Calculate the seats of PENDING bookings of the ticket.
+
+        Returns:
+            int: The held column plus the seats held from the shards.
+        """
+        if not self.is_sharded:
+            return self.held
+        shard_held = getattr(self, "shard_held", None)
+        if shard_held is None:
+            shard_held = self.shards.aggregate(total=Sum("held"))["total"] or 0
+        return self.held + shard_held
 
     def __str__(self):
         return f"{self.ticket_type} - {self.event.event_name}"
+
+
+class TicketShard(models.Model):
+    """
+    TicketShard Model:
+
+    Represents a slice of the availability of a sharded ticket.
+
+    Bookings of a sharded ticket claim seats from a random shard,
+    so concurrent buyers of a popular ticket do not all update the same row.
+
+    Fields:
+    - ticket (ForeignKey):
+        The ticket the shard belongs to.
+    - index (PositiveSmallIntegerField):
+        The position of the shard, from 0 to shard_count - 1.
+    - availability (IntegerField):
+        The number of seats held by the shard.
+    - held (IntegerField):
+        The seats claimed from the shard by PENDING bookings.
+    - updated_at (DateTimeField):
+        When the seats of the shard last changed.
+    """
+
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="shards")
+    index = models.PositiveSmallIntegerField()
+    availability = models.IntegerField(default=0)
+    held = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ticket", "index"], name="unique_ticket_shard_index"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.ticket_id} - {self.index}"
@@ -0,0 +1,69 @@
+"""
+Module: ebs_app.pagination
+
+This module contains the cursor pagination of the list endpoints.
+
+Pages are read from a cursor holding the position of the last row of the previous
+page, so a page is fetched with "WHERE <ordering> > <position> ORDER BY <ordering>
+LIMIT <page size>" on an indexed column. Deep pages cost the same as the first page,
+unlike offset pagination which reads and skips all the rows before the page.
+
+Clients pick the page size with ?page_size=, up to EBS_MAX_PAGE_SIZE, and follow the
+"next" and "previous" links of the response.
+
+Settings:
+    REST_FRAMEWORK["PAGE_SIZE"]: Rows per page by default.
+    EBS_MAX_PAGE_SIZE: Largest page size a client can ask for, defaults to 500.
+
+Contents:
+- IdCursorPagination: Pages ordered by id, the default of all list endpoints.
+- BookingCursorPagination: Bookings, newest first.
+- EventCursorPagination: Events, soonest first.
+- SalesCursorPagination: Sales summaries, by event and ticket type.
+"""
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+DEFAULT_MAX_PAGE_SIZE = 500
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Cursor pagination over the primary key.
+    """
+
+    ordering = "id"
+    page_size_query_param = "page_size"
+
+    @property
+    def max_page_size(self):
+        return getattr(settings, "EBS_MAX_PAGE_SIZE", DEFAULT_MAX_PAGE_SIZE)
+
+
+class BookingCursorPagination(IdCursorPagination):
+    """
+    Cursor pagination of bookings, the latest bookings come first.
+    """
+
+    ordering = "-id"
+
+
+class EventCursorPagination(IdCursorPagination):
+    """
+    Cursor pagination of events by date, on the (event_date_time, id) index.
+
+    The cursor holds the event_date_time of the last event of the page, the id
+    keeps the order of events on the same date stable across pages.
+    """
+
+    ordering = ("event_date_time", "id")
+
+
+class SalesCursorPagination(IdCursorPagination):
+    """
+    Cursor pagination of sales summaries by event, on the (event, ticket_type)
+    unique index.
+    """
+
+    ordering = ("event_id", "ticket_type")
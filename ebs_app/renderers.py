@@ -0,0 +1,137 @@
+"""
+Module: ebs_app.renderers
+
+This module contains the JSON renderer of the API.
+
+FastJSONRenderer renders responses with a pluggable encoder. The default encoder uses
+orjson, which serialises large lists several times faster than the json module and
+writes UTF-8 bytes directly. Without orjson installed, the pure-Python encoder is used
+instead, with a warning. Both give the same output as the JSONRenderer of DRF:
+compact, UTF-8, with the types DRF knows, such as datetimes and decimals, converted by
+the DRF encoder. Pretty printed responses, such as the browsable API, are rendered by
+the JSONRenderer of DRF.
+
+Settings:
+    EBS_JSON_RENDERER = {
+        "ENCODER": "ebs_app.renderers.OrjsonEncoder",   # Or StdlibEncoder, or the
+                                                        # dotted path of a class
+                                                        # with a dumps(data) method
+                                                        # returning bytes
+    }
+
+Contents:
+- FastJSONRenderer: The JSON renderer of the API.
+- OrjsonEncoder: Encodes with orjson.
+- StdlibEncoder: Encodes with the json module, the pure-Python fallback.
+- get_encoder: Returns the configured encoder.
+"""
+
+import json
+import logging
+from functools import lru_cache
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "ENCODER": "ebs_app.renderers.OrjsonEncoder",
+}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "EBS_JSON_RENDERER", {})}
+
+
+def escape_line_separators(content):
+    # Like DRF, \u2028 and \u2029 are escaped so the output is a strict subset
+    # of JavaScript.
+    if b"\xe2\x80" in content:
+        content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+    return content
+
+
+class StdlibEncoder:
+    """
+    Encodes with the json module, exactly as the JSONRenderer of DRF.
+    """
+
+    def dumps(self, data):
+        content = json.dumps(
+            data,
+            cls=encoders.JSONEncoder,
+            ensure_ascii=not api_settings.UNICODE_JSON,
+            allow_nan=not api_settings.STRICT_JSON,
+            separators=(",", ":") if api_settings.COMPACT_JSON else (", ", ": "),
+        )
+        return (
+            content.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+        )
+
+
+class OrjsonEncoder:
+    """
+    Encodes with orjson.
+
+    Dates and times are passed to the DRF encoder, so they are formatted as DRF
+    formats them. Data orjson cannot encode, such as integers over 64 bits, is
+    encoded by the json module instead.
+
+    Raises:
+        ImportError: If orjson is not installed.
+    """
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+        self.options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        self.default = encoders.JSONEncoder().default
+        self.fallback = StdlibEncoder()
+
+    def dumps(self, data):
+        if not api_settings.UNICODE_JSON or not api_settings.COMPACT_JSON:
+            return self.fallback.dumps(data)
+        try:
+            content = self.orjson.dumps(data, default=self.default, option=self.options)
+        except self.orjson.JSONEncodeError:
+            return self.fallback.dumps(data)
+        return escape_line_separators(content)
+
+
+def get_encoder():
+    """
+    Return the configured encoder, or the pure-Python encoder when the configured
+    one cannot be imported.
+
+    Returns:
+        object: An encoder with a dumps(data) method returning bytes.
+    """
+    return _load_encoder(get_config()["ENCODER"])
+
+
+@lru_cache(maxsize=None)
+def _load_encoder(path):
+    try:
+        return import_string(path)()
+    except ImportError:
+        logger.warning("JSON encoder %s is not available, using the json module", path)
+        return StdlibEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders JSON with the configured encoder, see get_encoder.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return get_encoder().dumps(data)
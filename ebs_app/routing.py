@@ -0,0 +1,13 @@
+"""
+WebSocket routes of ebs_app
+"""
+
+from django.urls import path
+from ebs_app.consumers import EventAvailabilityConsumer
+
+websocket_urlpatterns = [
+    path(
+        "ws/events/<int:event_id>/availability/",
+        EventAvailabilityConsumer.as_asgi(),
+    ),
+]
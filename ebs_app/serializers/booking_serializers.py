@@ -6,18 +6,28 @@ from rest_framework.serializers import ModelSerializer
 from ebs_app.models.bookings import Booking, SubBooking
 from users.customer.serializers import CustomerSerializers
 from ebs_app.serializers.ticket_serializers import TicketSerializer
+from ebs_app.sparse_fields import SparseFieldsSerializerMixin
 
 
 class SubBookingSerializer(ModelSerializer):
     class Meta:
         model = SubBooking
-        fields = "__all__"
+        fields = ["id", "ticket", "count"]
 
 
-class BookingSerializer(ModelSerializer):
+class BookingSerializer(SparseFieldsSerializerMixin, ModelSerializer):
     customer = CustomerSerializers(read_only=True)
     sub_bookings = SubBookingSerializer(many=True, required=False, read_only=True)
 
     class Meta:
         model = Booking
-        fields = ["id", "customer", "sub_bookings", "status", "total_price"]
+        fields = [
+            "id",
+            "customer",
+            "sub_bookings",
+            "status",
+            "total_price",
+            "hold_expires_at",
+        ]
+        expandable_fields = {"customer": "customer__user"}
+        prefetch_fields = {"sub_bookings": "sub_bookings"}
@@ -2,14 +2,62 @@
 Event Serializer
 """
 
-from rest_framework.serializers import ModelSerializer
+from django.db.models import Prefetch
+from rest_framework.serializers import ModelSerializer, FloatField
+from ebs_app.models.availability import EventAvailability
 from ebs_app.models.events import Event
+from ebs_app.models.tickets import Ticket
+from ebs_app.models.cancellations import EventCancellation
 from users.event_organiser.serializers import EventOrganiserSerializers
+from ebs_app.serializers.ticket_serializers import TicketSerializer
+from ebs_app.sparse_fields import SparseFieldsSerializerMixin
 
 
-class EventSerializer(ModelSerializer):
+def prefetch_tickets():
+    # The shard availability of every ticket is read in the same query.
+    return Prefetch(
+        "ticket_set", queryset=Ticket.objects.with_availability().order_by("id")
+    )
+
+
+class EventAvailabilitySerializer(ModelSerializer):
+    class Meta:
+        model = EventAvailability
+        fields = ["remaining", "cheapest_price", "sold_out", "updated_at"]
+
+
+class EventSerializer(SparseFieldsSerializerMixin, ModelSerializer):
     event_organiser = EventOrganiserSerializers(read_only=True)
+    tickets = TicketSerializer(many=True, read_only=True, source="ticket_set")
+    # Null until the rollup of a new event is first refreshed.
+    availability = EventAvailabilitySerializer(read_only=True, allow_null=True)
 
     class Meta:
         model = Event
         fields = "__all__"
+        expandable_fields = {
+            "event_organiser": "event_organiser__user",
+            "availability": "availability",
+        }
+        optional_fields = ("tickets", "availability")
+        prefetch_fields = {"tickets": prefetch_tickets}
+        field_columns = {"availability": []}
+
+
+class EventCancellationSerializer(ModelSerializer):
+    progress = FloatField(read_only=True)
+
+    class Meta:
+        model = EventCancellation
+        fields = [
+            "id",
+            "event",
+            "status",
+            "total",
+            "cancelled",
+            "progress",
+            "error",
+            "created_at",
+            "updated_at",
+            "finished_at",
+        ]
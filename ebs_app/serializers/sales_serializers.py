@@ -0,0 +1,25 @@
+"""
+Sales Summary Serializer
+"""
+
+from rest_framework.serializers import CharField, FloatField, ModelSerializer
+from ebs_app.models.sales import SalesSummary
+
+
+class SalesSummarySerializer(ModelSerializer):
+    event_name = CharField(source="event.event_name", read_only=True)
+    cancellation_rate = FloatField(read_only=True)
+
+    class Meta:
+        model = SalesSummary
+        fields = [
+            "id",
+            "event",
+            "event_name",
+            "ticket_type",
+            "sold",
+            "revenue",
+            "cancelled",
+            "cancellation_rate",
+            "updated_at",
+        ]
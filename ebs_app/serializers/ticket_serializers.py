@@ -4,9 +4,32 @@ Ticket Serializer
 
 from rest_framework.serializers import ModelSerializer
 from ebs_app.models.tickets import Ticket
+from ebs_app.sparse_fields import SparseFieldsSerializerMixin
 
 
-class TicketSerializer(ModelSerializer):
+class TicketSerializer(SparseFieldsSerializerMixin, ModelSerializer):
     class Meta:
         model = Ticket
-        fields = "__all__"
+        exclude = ["front_flushed"]
+        read_only_fields = ["held", "sold"]
+        field_columns = {
+            "availability": ["availability", "shard_count"],
+            "held": ["held", "shard_count"],
+        }
+
+    def update(self, instance, validated_data):
+        # The counters are written concurrently by the booking engine,
+        # only the edited columns are saved.
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=[*validated_data, "updated_at"])
+        return instance
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Sharded tickets hold part of their seats in the shards.
+        if "availability" in data:
+            data["availability"] = instance.current_availability
+        if "held" in data:
+            data["held"] = instance.current_held
+        return data
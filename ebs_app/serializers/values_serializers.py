@@ -0,0 +1,273 @@
+"""
+Module: ebs_app.serializers.values_serializers
+
+This module contains the read-only fast path of the high-volume list endpoints.
+
+Serialising a page with a ModelSerializer builds model instances from the rows, then
+looks up and converts every field of every instance, through the nested serializers
+of the related objects. A values serializer reads the same fields as plain dicts with
+values(), joins the nested objects in the same query, and builds the response from a
+field mapping compiled once per response from the ModelSerializer of the view:
+
+    (name, column, converter)   e.g. ("hold_expires_at", "hold_expires_at",
+                                      DateTimeField.to_representation)
+
+Converters are only called for the fields whose representation differs from the
+column value, such as dates. Related rows serialised as lists, such as the sub
+bookings of a booking, are read with one more values() query for the whole page.
+
+The output is identical to the output of the ModelSerializer, including the fields
+trimmed by ?fields= and ?expand=, see ebs_app.sparse_fields.
+
+Settings:
+    EBS_VALUES_SERIALIZERS = {
+        "ENABLED": True,            # False serves the lists with the ModelSerializers
+    }
+
+Contents:
+- ValuesSerializer: Builds the representation of values() rows.
+- BookingValuesSerializer: The fast path of BookingSerializer.
+- TicketValuesSerializer: The fast path of TicketSerializer.
+- ValuesListViewMixin: Viewsets serving their list action through a values serializer.
+"""
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import fields
+from rest_framework.relations import RelatedField
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+DEFAULT_CONFIG = {
+    "ENABLED": True,
+}
+
+# Fields whose representation is the column value itself.
+IDENTITY_FIELDS = (
+    fields.IntegerField,
+    fields.CharField,
+    fields.BooleanField,
+    fields.ChoiceField,
+)
+
+# Ticket counters with a part kept in the shards of sharded tickets.
+SHARDED_COUNTERS = ("availability", "held")
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "EBS_VALUES_SERIALIZERS", {})}
+
+
+class ValuesSerializer:
+    """
+    Builds the representation of values() rows, like a ModelSerializer of the rows.
+
+    Args:
+        serializer (ModelSerializer): The serializer whose output is reproduced,
+            with the fields it holds for the request.
+
+    Raises:
+        ImproperlyConfigured: If the serializer has a field which cannot be read
+            from a column, such as a SerializerMethodField.
+    """
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.field_names = list(serializer.fields)
+        self.plan, self.many = _compile(serializer)
+
+    def get_columns(self):
+        """
+        Return the columns read from the rows.
+
+        Returns:
+            list: The values() lookups of the fields, the primary key included.
+        """
+        columns = [self.model._meta.pk.name]
+        _add_columns(columns, self.plan)
+        return columns
+
+    def get_queryset(self, queryset, ordering=()):
+        """
+        Turn a queryset into a values() queryset of the columns of the fields.
+
+        Args:
+            queryset (QuerySet): The rows of the response.
+            ordering (iterable): Fields read from the rows besides the serializer,
+                such as the position of the pagination cursor.
+
+        Returns:
+            QuerySet: The values() queryset.
+        """
+        columns = self.get_columns()
+        for field in ordering:
+            if field.lstrip("-") not in columns:
+                columns.append(field.lstrip("-"))
+        return queryset.select_related(None).prefetch_related(None).values(*columns)
+
+    def serialize(self, rows):
+        """
+        Build the representation of rows.
+
+        Args:
+            rows (iterable): The values() rows.
+
+        Returns:
+            list: The representations of the rows, in order.
+        """
+        rows = list(rows)
+        related = self.get_related(rows)
+        return [self.to_representation(row, related) for row in rows]
+
+    def get_related(self, rows):
+        """
+        Read the related rows serialised as lists, with one query per relation.
+
+        Returns:
+            dict: The representations of the related rows, by field name and by
+                primary key of the row they belong to.
+        """
+        pk = self.model._meta.pk.name
+        ids = [row[pk] for row in rows]
+        related = {}
+        for name, relation, plan in self.many:
+            related[name] = groups = {}
+            if not ids:
+                continue
+            link = relation.field.attname
+            columns = [relation.related_model._meta.pk.name, link]
+            _add_columns(columns, plan)
+            children = (
+                relation.related_model._default_manager.filter(**{f"{link}__in": ids})
+                .order_by(relation.related_model._meta.pk.name)
+                .values(*columns)
+            )
+            for child in children:
+                groups.setdefault(child[link], []).append(_build(plan, child, {}))
+        return related
+
+    def to_representation(self, row, related):
+        pk = row[self.model._meta.pk.name]
+        return _build(
+            self.plan,
+            row,
+            {name: groups.get(pk, []) for name, groups in related.items()},
+        )
+
+
+class BookingValuesSerializer(ValuesSerializer):
+    """
+    The fast path of BookingSerializer, the customer is joined in the same query
+    and the sub bookings of the page are read with one more query.
+    """
+
+
+class TicketValuesSerializer(ValuesSerializer):
+    """
+    The fast path of TicketSerializer.
+
+    The availability and the held seats of sharded tickets add the seats of their
+    shards, read from the shard_availability and shard_held annotations of
+    Ticket.objects.with_availability().
+    """
+
+    def get_columns(self):
+        columns = super().get_columns()
+        sharded = [name for name in SHARDED_COUNTERS if name in self.field_names]
+        if sharded:
+            columns += ["shard_count", *(f"shard_{name}" for name in sharded)]
+        return columns
+
+    def to_representation(self, row, related):
+        data = super().to_representation(row, related)
+        for name in SHARDED_COUNTERS:
+            if name in data and row["shard_count"] > 1:
+                data[name] += row[f"shard_{name}"]
+        return data
+
+
+class ValuesListViewMixin:
+    """
+    Viewset mixin serving the list action through values_serializer_class.
+
+    The page is read and paginated as values() rows, the other actions keep using
+    the serializer_class of the viewset.
+    """
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if not get_config()["ENABLED"]:
+            return super().list(request, *args, **kwargs)
+
+        values_serializer = self.values_serializer_class(self.get_serializer())
+        ordering = getattr(self.paginator, "ordering", ())
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        rows = values_serializer.get_queryset(
+            self.filter_queryset(self.get_queryset()), ordering
+        )
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.serialize(page))
+        return Response(values_serializer.serialize(rows))
+
+
+def _compile(serializer, prefix=""):
+    """
+    Compile the fields of a serializer into (name, column, converter) entries.
+
+    Nested serializers become (name, column of the relation, entries of the nested
+    fields), lists of related rows are returned apart as (name, relation, entries).
+    """
+    plan, many = [], []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == "*" or isinstance(field, fields.SerializerMethodField):
+            raise ImproperlyConfigured(
+                f"{type(serializer).__name__}.{name} cannot be read from a column."
+            )
+        column = prefix + field.source.replace(".", "__")
+        if isinstance(field, ListSerializer):
+            if prefix:
+                raise ImproperlyConfigured(
+                    f"Nested lists are not supported, {type(serializer).__name__}.{name}."
+                )
+            relation = serializer.Meta.model._meta.get_field(field.source)
+            nested, _ = _compile(field.child)
+            plan.append((name, None, None))
+            many.append((name, relation, nested))
+        elif isinstance(field, BaseSerializer):
+            nested, _ = _compile(field, prefix=f"{column}__")
+            plan.append((name, column, nested))
+        elif isinstance(field, (RelatedField, IDENTITY_FIELDS)):
+            plan.append((name, column, None))
+        else:
+            plan.append((name, column, field.to_representation))
+    return plan, many
+
+
+def _add_columns(columns, plan):
+    for _, column, converter in plan:
+        if column is not None and column not in columns:
+            columns.append(column)
+        if isinstance(converter, list):
+            _add_columns(columns, converter)
+
+
+def _build(plan, row, related):
+    data = {}
+    for name, column, converter in plan:
+        if column is None:
+            data[name] = related[name]
+            continue
+        value = row[column]
+        if value is None or converter is None:
+            data[name] = value
+        elif isinstance(converter, list):
+            data[name] = _build(converter, row, related)
+        else:
+            data[name] = converter(value)
+    return data
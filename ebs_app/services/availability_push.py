@@ -0,0 +1,141 @@
+"""
+Module: ebs_app.services.availability_push
+
+This module pushes the availability of tickets to the WebSocket clients watching
+their event, see ebs_app.consumers.EventAvailabilityConsumer.
+
+The reservation engine marks the tickets it changes once its transaction commits.
+Marked tickets are collected for WINDOW seconds and then flushed together: their
+availability is read with one query and one message per event is sent to the channel
+layer group of the event, carrying the tickets which changed. A burst of a thousand
+bookings of an event sends a handful of messages instead of a thousand.
+
+Marked tickets are collected per process, every web worker flushes its own changes.
+The channel layer has to be shared by the web workers and the WebSocket servers,
+such as channels_redis, the in-memory layer only reaches clients of the same process.
+
+Settings:
+    CHANNEL_LAYERS: The Channels layer the messages are sent to.
+    EBS_AVAILABILITY_PUSH = {
+        "ENABLED": True,
+        "WINDOW": 0.5,              # Seconds changes are collected for, 0 flushes
+                                    # every change right away
+    }
+
+Contents:
+- group_name: The channel layer group of an event.
+- tickets_changed: Marks tickets to be pushed once the transaction commits.
+- flush: Pushes the availability of the marked tickets.
+- clear: Drops the marked tickets.
+"""
+
+import logging
+from threading import Lock, Timer
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connections, transaction
+from ebs_app.models.tickets import Ticket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "ENABLED": True,
+    "WINDOW": 0.5,
+}
+
+MESSAGE_TYPE = "availability.update"
+
+_lock = Lock()
+_pending = set()
+_timer = None
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "EBS_AVAILABILITY_PUSH", {})}
+
+
+def group_name(event_id):
+    return f"event_availability_{event_id}"
+
+
+def tickets_changed(ticket_ids):
+    """
+    Mark tickets whose availability changed, once the current transaction commits.
+
+    Args:
+        ticket_ids (iterable): The IDs of the changed tickets.
+    """
+    if not get_config()["ENABLED"]:
+        return
+    ticket_ids = set(ticket_ids)
+    if ticket_ids:
+        transaction.on_commit(lambda: _mark(ticket_ids))
+
+
+def _mark(ticket_ids):
+    global _timer
+    window = get_config()["WINDOW"]
+    timer = None
+    with _lock:
+        _pending.update(ticket_ids)
+        if window > 0 and _timer is None:
+            timer = _timer = Timer(window, _flush_in_background)
+            timer.daemon = True
+    if timer is not None:
+        timer.start()
+    elif window <= 0:
+        flush()
+
+
+def flush():
+    """
+    Push the availability of the marked tickets to the groups of their events.
+
+    Returns:
+        int: The number of messages sent, one per event.
+    """
+    global _timer
+    with _lock:
+        ticket_ids = set(_pending)
+        _pending.clear()
+        _timer = None
+    if not ticket_ids:
+        return 0
+
+    events = {}
+    for ticket in (
+        Ticket.objects.with_availability()
+        .filter(id__in=ticket_ids)
+        .only("id", "event_id", "availability", "shard_count")
+        .order_by("id")
+    ):
+        events.setdefault(ticket.event_id, []).append(
+            {"id": ticket.id, "availability": ticket.current_availability}
+        )
+
+    channel_layer = get_channel_layer()
+    for event_id, tickets in events.items():
+        async_to_sync(channel_layer.group_send)(
+            group_name(event_id),
+            {"type": MESSAGE_TYPE, "event": event_id, "tickets": tickets},
+        )
+    return len(events)
+
+
+def clear():
+    global _timer
+    with _lock:
+        _pending.clear()
+        if _timer is not None:
+            _timer.cancel()
+        _timer = None
+
+
+def _flush_in_background():
+    try:
+        flush()
+    except Exception:
+        logger.exception("Pushing ticket availability failed")
+    finally:
+        connections.close_all()
@@ -0,0 +1,175 @@
+"""
+Module: ebs_app.services.booking_export
+
+This module streams the bookings of an event as CSV or NDJSON, for door lists and
+accounting, one flat row per booking line:
+
+    booking,customer_email,ticket_type,count,price,status
+    1042,fan@example.com,VIP,2,50,BOOKED
+
+The bookings of the event are walked in chunks ordered by id. The booking id range of
+a chunk is found from the (ticket, booking) index of the lines of every ticket of the
+event, then the lines of the tickets of the event in that range are read through the
+same index, with their booking and the email of its customer, in one query. A chunk
+is encoded and handed to the response before the next one is read, so an export
+takes constant memory however many bookings the event has, the lines of other events
+are never read, and no database cursor or transaction stays open while the client
+reads the response. The types of the tickets of the event are read once up front.
+Seats are exported at the price their line was booked at, like the sales summaries,
+so a later price change of a ticket does not rewrite past bookings.
+
+Chunks are read one after the other, bookings changing during the export are
+exported with their state at the time their chunk is read.
+
+Settings:
+    EBS_BOOKING_EXPORT_CHUNK_SIZE: Bookings read per chunk, defaults to 2000.
+
+Contents:
+- FORMATS: The content type of every export format.
+- COLUMNS: The columns of the exported rows.
+- export_rows: Reads the rows of the bookings of an event, chunk by chunk.
+- stream: Encodes the rows of the bookings of an event in an export format.
+"""
+
+import csv
+import io
+from django.conf import settings
+from ebs_app.models.bookings import SubBooking
+from ebs_app.models.tickets import Ticket
+from ebs_app.renderers import get_encoder
+
+DEFAULT_CHUNK_SIZE = 2000
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+COLUMNS = ("booking", "customer_email", "ticket_type", "count", "price", "status")
+
+# Cells starting with these characters are read as formulas by spreadsheets.
+FORMULA_PREFIXES = ("=", "+", "-", "@")
+
+
+def export_rows(event_id, chunk_size=None):
+    """
+    Read the booking lines of an event, in booking order, chunk by chunk.
+
+    Args:
+        event_id (int): The ID of the event.
+        chunk_size (int): The number of bookings read per chunk,
+            defaults to EBS_BOOKING_EXPORT_CHUNK_SIZE.
+
+    Yields:
+        list: The rows of the lines of a chunk of bookings, as tuples of COLUMNS.
+    """
+    chunk_size = chunk_size or getattr(
+        settings, "EBS_BOOKING_EXPORT_CHUNK_SIZE", DEFAULT_CHUNK_SIZE
+    )
+    tickets = dict(
+        Ticket.objects.filter(event_id=event_id).values_list("id", "ticket_type")
+    )
+    if not tickets:
+        return
+    for first_id, last_id in _booking_ranges(list(tickets), chunk_size):
+        lines = (
+            SubBooking.objects.filter(
+                ticket_id__in=list(tickets),
+                booking_id__gte=first_id,
+                booking_id__lte=last_id,
+            )
+            .order_by("booking_id", "id")
+            .values_list(
+                "booking_id",
+                "ticket_id",
+                "count",
+                "price",
+                "booking__status",
+                "booking__customer__user__email",
+            )
+        )
+        rows = []
+        for booking_id, ticket_id, count, price, booking_status, email in lines:
+            rows.append(
+                (booking_id, email, tickets[ticket_id], count, price, booking_status)
+            )
+        yield rows
+
+
+def _booking_ranges(ticket_ids, chunk_size):
+    """
+    Yield the (first, last) booking IDs of every chunk of the bookings with a line of
+    the given tickets, in id order.
+
+    The lines of every ticket are read in booking order from the (ticket, booking)
+    index, at most chunk_size of them per ticket and chunk. A chunk ends at the last
+    booking all the tickets were read up to, so it holds every booking of the tickets
+    up to there, and at most chunk_size of them.
+    """
+    last_id = 0
+    while True:
+        booking_ids = set()
+        end = None
+        for ticket_id in ticket_ids:
+            read = list(
+                SubBooking.objects.filter(ticket_id=ticket_id, booking_id__gt=last_id)
+                .order_by("booking_id")
+                .values_list("booking_id", flat=True)[:chunk_size]
+            )
+            booking_ids.update(read)
+            if len(read) == chunk_size:
+                end = read[-1] if end is None else min(end, read[-1])
+        chunk = sorted(
+            booking_id for booking_id in booking_ids if end is None or booking_id <= end
+        )[:chunk_size]
+        if not chunk:
+            return
+        yield chunk[0], chunk[-1]
+        last_id = chunk[-1]
+
+
+def stream(event_id, export_format, chunk_size=None):
+    """
+    Encode the booking lines of an event, chunk by chunk.
+
+    Args:
+        event_id (int): The ID of the event.
+        export_format (str): One of FORMATS.
+        chunk_size (int): The number of bookings read per chunk.
+
+    Returns:
+        iterator: The encoded chunks, starting with the header row for CSV.
+    """
+    chunks = export_rows(event_id, chunk_size)
+    if export_format == "ndjson":
+        return _stream_ndjson(chunks)
+    return _stream_csv(chunks)
+
+
+def _stream_csv(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for rows in chunks:
+        writer.writerows(
+            (booking_id, _escape_formula(email), *rest)
+            for booking_id, email, *rest in rows
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # The header alone, when the event has no bookings.
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _stream_ndjson(chunks):
+    encoder = get_encoder()
+    for rows in chunks:
+        yield b"".join(encoder.dumps(dict(zip(COLUMNS, row))) + b"\n" for row in rows)
+
+
+def _escape_formula(value):
+    if value and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
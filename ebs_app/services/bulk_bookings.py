@@ -0,0 +1,325 @@
+"""
+Module: ebs_app.services.bulk_bookings
+
+This module creates many bookings at once for the box-office and partner channels.
+
+All the items of a request are validated together and allocated against a single
+locked snapshot of the requested tickets. Seats are then taken with one set based
+UPDATE, and bookings and their sub bookings are inserted with bulk_create.
+Every item succeeds or fails on its own, a failing item does not affect the others.
+When the inventory front is enabled, seats of unsharded tickets are claimed from it
+item by item instead, like reserve_seats does for a single booking.
+
+Bulk bookings are BOOKED right away, partner channels have already taken payment,
+their seats are added to the sold counters of the tickets and to the sales summary
+in the same transaction.
+
+Settings:
+    EBS_BULK_BOOKING_MAX_ITEMS: Bookings accepted per request, defaults to 500.
+
+Contents:
+- create_bulk_bookings: Creates the bookings of a bulk request.
+"""
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from ebs_app.models.bookings import Booking, SubBooking
+from ebs_app.models.choices import BookingStatus
+from ebs_app.models.tickets import Ticket, TicketShard
+from ebs_app.services import (
+    availability_push,
+    event_availability,
+    inventory_front,
+    sales_summary,
+)
+from ebs_app.services.reservations import (
+    booking_transaction,
+    claim_from_front,
+    claim_seats,
+    merge_lines,
+)
+from ebs_app.tasks import send_bulk_booking_confirmation_emails
+from users.customer.models import Customer
+from ebs_app.exceptions import (
+    NoCustomerAPIException,
+    NoTicketAPIException,
+    InvalidSubBookingDataAPIException,
+    TicketNotFoundAPIException,
+    TicketNotAvailableAPIException,
+    BookedMoreSeatAPIException,
+    TooManyBookingsAPIException,
+)
+
+DEFAULT_MAX_ITEMS = 500
+
+
+def create_bulk_bookings(items):
+    """
+    Create the bookings of a bulk request.
+
+    Item Structure:
+    {
+        "customer": 12,                                  # ID of the customer
+        "sub_bookings": [{"ticket": 123, "count": 2}]    # Lines of the booking
+    }
+
+    Args:
+        items (list): The requested bookings.
+
+    Returns:
+        list: One result per item, in request order. Successful items carry the created
+            booking, failed items the error detail and its status code.
+
+    Raises:
+        InvalidSubBookingDataAPIException: If items is not a non empty list.
+        TooManyBookingsAPIException: If there are more items than allowed.
+    """
+    if not isinstance(items, list) or not items:
+        raise InvalidSubBookingDataAPIException()
+    if len(items) > getattr(settings, "EBS_BULK_BOOKING_MAX_ITEMS", DEFAULT_MAX_ITEMS):
+        raise TooManyBookingsAPIException()
+
+    results = [None] * len(items)
+    parsed = {}
+    for index, item in enumerate(items):
+        try:
+            parsed[index] = _parse_item(item)
+        except APIException as exc:
+            results[index] = _failure(index, exc)
+
+    emails = dict(
+        Customer.objects.filter(
+            id__in={customer_id for customer_id, _ in parsed.values()}
+        ).values_list("id", "user__email")
+    )
+    for index, (customer_id, _) in list(parsed.items()):
+        if customer_id not in emails:
+            results[index] = _failure(index, NoCustomerAPIException())
+            del parsed[index]
+
+    with booking_transaction():
+        tickets = _lock_tickets({t for _, lines in parsed.values() for t in lines})
+        available = _available_seats(tickets)
+        use_front = inventory_front.is_enabled()
+
+        accepted = {}
+        taken = {}
+        for index, (customer_id, lines) in parsed.items():
+            try:
+                if any(ticket_id not in tickets for ticket_id in lines):
+                    raise TicketNotFoundAPIException()
+                front_lines = {
+                    ticket_id: count
+                    for ticket_id, count in lines.items()
+                    if use_front and not tickets[ticket_id].is_sharded
+                }
+                database_lines = {
+                    ticket_id: count
+                    for ticket_id, count in lines.items()
+                    if ticket_id not in front_lines
+                }
+                _check_seats(database_lines, available, taken)
+                if front_lines and not claim_from_front(front_lines):
+                    # The front is unavailable, the rest of the request uses the database.
+                    use_front = False
+                    _check_seats(front_lines, available, taken)
+                    database_lines = lines
+            except APIException as exc:
+                results[index] = _failure(index, exc)
+                continue
+            for ticket_id, count in database_lines.items():
+                taken[ticket_id] = taken.get(ticket_id, 0) + count
+            accepted[index] = (customer_id, lines)
+
+        sold = merge_lines(
+            line for _, lines in accepted.values() for line in lines.items()
+        )
+        _take_seats(tickets, taken, sold)
+        bookings = _insert_bookings(tickets, accepted)
+
+    for index, booking in bookings.items():
+        results[index] = {
+            "index": index,
+            "status_code": 201,
+            "booking": {
+                "id": booking.id,
+                "customer": booking.customer_id,
+                "status": booking.status,
+                "total_price": booking.total_price,
+            },
+        }
+
+    if bookings:
+        send_bulk_booking_confirmation_emails.delay(
+            [
+                [next(iter(accepted[index][1])), emails[booking.customer_id]]
+                for index, booking in bookings.items()
+            ]
+        )
+    return results
+
+
+def _parse_item(item):
+    """
+    Validate the structure of a requested booking.
+
+    Returns:
+        tuple: The customer id and the merged lines of the booking.
+    """
+    if not isinstance(item, dict):
+        raise InvalidSubBookingDataAPIException()
+    customer_id = item.get("customer")
+    sub_bookings = item.get("sub_bookings")
+    if not isinstance(customer_id, int):
+        raise NoCustomerAPIException()
+    if not isinstance(sub_bookings, list) or not sub_bookings:
+        raise InvalidSubBookingDataAPIException()
+
+    lines = []
+    for sub_booking in sub_bookings:
+        if not isinstance(sub_booking, dict):
+            raise InvalidSubBookingDataAPIException()
+        ticket_id = sub_booking.get("ticket")
+        count = sub_booking.get("count")
+        if not ticket_id:
+            raise NoTicketAPIException()
+        if not isinstance(ticket_id, int) or not isinstance(count, int) or count <= 0:
+            raise InvalidSubBookingDataAPIException()
+        lines.append((ticket_id, count))
+    return customer_id, merge_lines(lines)
+
+
+def _failure(index, exc):
+    return {"index": index, "status_code": exc.status_code, "detail": exc.detail}
+
+
+def _lock_tickets(ticket_ids):
+    """
+    Lock the requested tickets, and the shards of sharded ones, in primary key order.
+    """
+    tickets = {
+        ticket.id: ticket
+        for ticket in Ticket.objects.select_for_update()
+        .filter(id__in=ticket_ids)
+        .order_by("pk")
+    }
+    sharded = [ticket_id for ticket_id, ticket in tickets.items() if ticket.is_sharded]
+    if sharded:
+        list(
+            TicketShard.objects.select_for_update()
+            .filter(ticket_id__in=sharded)
+            .order_by("pk")
+            .values_list("id")
+        )
+    return tickets
+
+
+def _available_seats(tickets):
+    """
+    Compute the seats left per ticket from the locked rows.
+    """
+    available = {
+        ticket_id: ticket.availability for ticket_id, ticket in tickets.items()
+    }
+    for line in (
+        TicketShard.objects.filter(
+            ticket_id__in=[t for t, ticket in tickets.items() if ticket.is_sharded]
+        )
+        .values("ticket")
+        .annotate(total=Sum("availability"))
+        .order_by("ticket")
+    ):
+        available[line["ticket"]] += line["total"]
+    return available
+
+
+def _check_seats(lines, available, taken):
+    """
+    Check the lines of an item against the seats not yet allocated to earlier items.
+
+    Raises:
+        TicketNotAvailableAPIException: If a ticket has no seats left.
+        BookedMoreSeatAPIException: If a line asks for more seats than are left.
+    """
+    for ticket_id, count in lines.items():
+        left = available[ticket_id] - taken.get(ticket_id, 0)
+        if left <= 0:
+            raise TicketNotAvailableAPIException()
+        if count > left:
+            raise BookedMoreSeatAPIException()
+
+
+def _take_seats(tickets, taken, sold):
+    """
+    Take the allocated seats and count them as sold, with a single UPDATE of the
+    tickets.
+
+    Seats claimed from the shards or from the inventory front are counted as held
+    by the claim, they are moved from held to sold.
+    """
+    unsharded = {
+        ticket_id: -count
+        for ticket_id, count in taken.items()
+        if not tickets[ticket_id].is_sharded
+    }
+    for ticket_id, count in taken.items():
+        if tickets[ticket_id].is_sharded:
+            # Shards are locked, the claim cannot miss.
+            claim_seats(tickets[ticket_id], count)
+    Ticket.objects.add_counters(
+        availability=unsharded,
+        held={
+            ticket_id: -(count + unsharded.get(ticket_id, 0))
+            for ticket_id, count in sold.items()
+            if count + unsharded.get(ticket_id, 0)
+        },
+        sold=sold,
+    )
+    inventory_front.sync_counters(unsharded)
+    availability_push.tickets_changed(taken)
+    event_availability.tickets_changed(taken)
+
+
+def _insert_bookings(tickets, accepted):
+    """
+    Insert the accepted bookings with their sub bookings, and record their sales.
+
+    Returns:
+        dict: The created bookings keyed by item index.
+    """
+    now = timezone.now()
+    bookings = dict(
+        zip(
+            accepted,
+            Booking.objects.bulk_create(
+                [
+                    Booking(
+                        customer_id=customer_id,
+                        status=BookingStatus.BOOKED,
+                        confirmed_at=now,
+                        total_price=sum(
+                            tickets[ticket_id].price * count
+                            for ticket_id, count in lines.items()
+                        ),
+                    )
+                    for customer_id, lines in accepted.values()
+                ]
+            ),
+        )
+    )
+    SubBooking.objects.bulk_create(
+        [
+            SubBooking(
+                booking=bookings[index],
+                ticket_id=ticket_id,
+                count=count,
+                price=tickets[ticket_id].price,
+            )
+            for index, (customer_id, lines) in accepted.items()
+            for ticket_id, count in lines.items()
+        ]
+    )
+    sales_summary.record_sales([booking.id for booking in bookings.values()])
+    return bookings
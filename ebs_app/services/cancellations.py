@@ -0,0 +1,228 @@
+"""
+Module: ebs_app.services.cancellations
+
+This module cancels bookings and gives their seats back to the tickets.
+
+A booking is cancelled with a guarded update, only a booking which is not cancelled yet
+is flipped. The update locks the booking row, so of two concurrent cancellations the
+second one waits for the first, finds the booking cancelled and fails, and the seats are
+only given back once. The seats of all the lines are then restored with one increment
+per ticket, taken off the held or sold counters of the tickets, and the sales summary of
+confirmed bookings is updated in the same transaction. The number of queries does not
+depend on the number of lines of the booking.
+
+Events called off are cancelled by an EventCancellation job run by a Celery worker.
+The bookings of the event are walked in chunks ordered by id, every chunk is locked,
+flipped, restocked and notified in its own transaction together with the progress
+of the job, so a job never holds one giant transaction nor loads all the bookings of
+the event, and a failed job resumes after the last committed chunk.
+
+Settings:
+    EBS_EVENT_CANCELLATION_CHUNK_SIZE: Bookings cancelled per chunk, defaults to 1000.
+
+Contents:
+- cancel_booking: Cancels a booking of a customer.
+- start_event_cancellation: Queues the cancellation of all the bookings of an event.
+- run_event_cancellation: Runs a queued event cancellation.
+"""
+
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from ebs_app.models.bookings import Booking
+from ebs_app.models.cancellations import EventCancellation
+from ebs_app.models.choices import BookingStatus, JobStatus
+from ebs_app.services import sales_summary
+from ebs_app.services.reservations import release_bookings
+from ebs_app.tasks import cancel_event_bookings, send_event_cancelled_email
+from ebs_app.exceptions import (
+    AlreadyCancelledAPIException,
+    CancellationNotAllowedAPIException,
+    ContentNotFoundAPIException,
+    CancellationInProgressAPIException,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+@transaction.atomic
+def cancel_booking(booking_id, customer):
+    """
+    Cancel a booking of a customer and give its seats back.
+
+    Args:
+        booking_id (int): The ID of the booking to be cancelled.
+        customer (Customer): The customer cancelling the booking.
+
+    Raises:
+        ContentNotFoundAPIException: If the booking does not exist.
+        CancellationNotAllowedAPIException: If the booking belongs to another customer.
+        AlreadyCancelledAPIException: If the booking is already cancelled.
+    """
+    cancelled = (
+        Booking.objects.filter(id=booking_id, customer=customer)
+        .exclude(status=BookingStatus.CANCELLED)
+        .update(status=BookingStatus.CANCELLED, is_cancelled=True, hold_expires_at=None)
+    )
+    if not cancelled:
+        _raise_cancel_error(booking_id, customer)
+
+    release_bookings([booking_id])
+    sales_summary.record_cancellations([booking_id])
+
+
+def _raise_cancel_error(booking_id, customer):
+    """
+    Raise the API exception explaining why the guarded update did not match.
+    """
+    booking = Booking.objects.filter(id=booking_id).values("customer_id").first()
+    if booking is None:
+        raise ContentNotFoundAPIException()
+    if booking["customer_id"] != customer.id:
+        raise CancellationNotAllowedAPIException()
+    raise AlreadyCancelledAPIException()
+
+
+def _event_bookings(event_id):
+    """
+    Return the bookings with a line of the given event which are not cancelled yet.
+
+    The lines are looked up booking by booking, a chunk reads the bookings after the
+    previous one until it is full instead of all the bookings of the event.
+    """
+    return Booking.objects.with_lines(event=event_id, by_booking=True).exclude(
+        status=BookingStatus.CANCELLED
+    )
+
+
+@transaction.atomic
+def start_event_cancellation(event, organiser):
+    """
+    Queue the cancellation of all the bookings of an event.
+
+    Args:
+        event (Event): The event called off.
+        organiser (EventOrganiser): The organiser calling the event off.
+
+    Returns:
+        EventCancellation: The queued job.
+
+    Raises:
+        CancellationInProgressAPIException: If the event is already being cancelled.
+    """
+    if EventCancellation.objects.filter(
+        event=event, status__in=[JobStatus.QUEUED, JobStatus.RUNNING]
+    ).exists():
+        raise CancellationInProgressAPIException()
+    job = EventCancellation.objects.create(
+        event=event, requested_by=organiser, total=_event_bookings(event.id).count()
+    )
+    transaction.on_commit(lambda: cancel_event_bookings.delay(job.id))
+    return job
+
+
+def run_event_cancellation(job_id, chunk_size=None):
+    """
+    Cancel the bookings of an event chunk by chunk.
+
+    Every chunk is committed together with the progress of the job. Customers of a
+    chunk are notified with one batched task once the chunk is committed.
+
+    Args:
+        job_id (int): The ID of the EventCancellation job.
+        chunk_size (int): Bookings per chunk, defaults to EBS_EVENT_CANCELLATION_CHUNK_SIZE.
+
+    Returns:
+        EventCancellation: The finished job.
+    """
+    chunk_size = chunk_size or getattr(
+        settings, "EBS_EVENT_CANCELLATION_CHUNK_SIZE", DEFAULT_CHUNK_SIZE
+    )
+    job = EventCancellation.objects.select_related("event").get(id=job_id)
+    if job.status == JobStatus.DONE:
+        return job
+    EventCancellation.objects.filter(id=job.id).update(
+        status=JobStatus.RUNNING, error="", updated_at=timezone.now()
+    )
+    event = {
+        "event_name": job.event.event_name,
+        "event_venue": job.event.venue,
+        "event_time": str(job.event.event_date_time),
+    }
+    try:
+        while _cancel_chunk(job, event, chunk_size) == chunk_size:
+            pass
+    except Exception as exc:
+        logger.exception("Event cancellation %s failed", job.id)
+        EventCancellation.objects.filter(id=job.id).update(
+            status=JobStatus.FAILED, error=str(exc), updated_at=timezone.now()
+        )
+        raise
+    EventCancellation.objects.filter(id=job.id).update(
+        status=JobStatus.DONE, finished_at=timezone.now(), updated_at=timezone.now()
+    )
+    job.refresh_from_db()
+    return job
+
+
+def _cancel_chunk(job, event, chunk_size):
+    """
+    Cancel the next chunk of bookings of an event job.
+
+    When the guarded update flips fewer bookings than selected, some were cancelled
+    by their customer in the meantime: the chunk is rolled back and selected again
+    without them, so only the bookings it flips are restocked and notified.
+
+    Returns:
+        int: The number of bookings looked at, fewer than chunk_size for the last chunk.
+    """
+    while True:
+        with transaction.atomic():
+            chunk = _next_chunk(job, chunk_size)
+            if not chunk:
+                return 0
+            booking_ids = [booking_id for booking_id, _ in chunk]
+
+            cancelled = (
+                Booking.objects.filter(id__in=booking_ids)
+                .exclude(status=BookingStatus.CANCELLED)
+                .update(
+                    status=BookingStatus.CANCELLED,
+                    is_cancelled=True,
+                    hold_expires_at=None,
+                )
+            )
+            if cancelled != len(booking_ids):
+                transaction.set_rollback(True)
+                continue
+            release_bookings(booking_ids)
+            sales_summary.record_cancellations(booking_ids)
+
+            job.last_booking_id = booking_ids[-1]
+            job.cancelled += cancelled
+            job.save(update_fields=["last_booking_id", "cancelled", "updated_at"])
+
+            emails = sorted({email for _, email in chunk if email})
+            transaction.on_commit(
+                lambda: send_event_cancelled_email.delay(event, emails)
+            )
+            return len(chunk)
+
+
+def _next_chunk(job, chunk_size):
+    """
+    Select and lock the next chunk of bookings of an event job.
+
+    Returns:
+        list: The (id, customer email) of the bookings of the chunk.
+    """
+    return list(
+        _event_bookings(job.event_id)
+        .select_for_update(of=("self",))
+        .filter(id__gt=job.last_booking_id)
+        .order_by("id")
+        .values_list("id", "customer__user__email")[:chunk_size]
+    )
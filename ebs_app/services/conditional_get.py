@@ -0,0 +1,160 @@
+"""
+Module: ebs_app.services.conditional_get
+
+This module answers conditional GETs of polled endpoints with 304 Not Modified.
+
+The validators of a response are computed from the rows it serves, before the body is
+built: the row of a detail, or the rows of the page of a list. The page is read like the
+paginator of the list reads it, through its cursor, but only the primary keys, the
+ordering columns and the latest updated_at of every row and of the related rows it
+depends on, such as the shards of a ticket, in one query. A request costs the size of
+its page however many rows the list has, and every page has its own ETag.
+
+The ETag covers the primary keys of the rows and the links of the page, so it changes
+whenever a row of the page is added, removed or modified, or the page gains or loses
+a neighbour. Last-Modified has the one second resolution of HTTP dates and is only
+used by clients without the ETag.
+
+Responses carry ETag and Last-Modified headers. Requests with a matching
+If-None-Match, or without it and with an If-Modified-Since not older than the rows,
+get an empty 304 response and the view is not run.
+
+Contents:
+- conditional_response: Runs a view unless the client has its response already.
+- get_validators: Computes the ETag and Last-Modified of a queryset.
+- get_page_validators: Computes the ETag and Last-Modified of the page of a list.
+- not_modified: Answers 304 Not Modified to a client with the current response.
+"""
+
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date, quote_etag
+
+VALIDATOR_HEADERS = ("ETag", "Last-Modified")
+
+
+def get_validators(queryset, modified_fields=("updated_at",)):
+    """
+    Compute the validators of the rows of a queryset with one aggregate query.
+
+    Args:
+        queryset (QuerySet): The rows behind the response.
+        modified_fields (iterable): The updated_at fields the response depends on,
+            lookups across relations such as "shards__updated_at" are allowed.
+
+    Returns:
+        dict: The ETag and Last-Modified headers, empty when the queryset is empty.
+    """
+    stats = queryset.order_by().aggregate(
+        count=Count("pk", distinct=True),
+        **{
+            f"modified_{index}": Max(field)
+            for index, field in enumerate(modified_fields)
+        },
+    )
+    return _validators(stats.pop("count"), stats.values())
+
+
+def get_page_validators(request, queryset, view, modified_fields=("updated_at",)):
+    """
+    Compute the validators of the page of a list, from the rows of the page only.
+
+    Args:
+        request (Request): The incoming GET request.
+        queryset (QuerySet): The filtered rows of the list.
+        view (GenericAPIView): The list view, whose paginator picks the page.
+        modified_fields (iterable): The updated_at fields the response depends on.
+
+    Returns:
+        dict: The ETag and Last-Modified headers, empty when the page is empty.
+    """
+    paginator = view.paginator
+    if paginator is None:
+        return get_validators(queryset, modified_fields)
+    ordering = [
+        field.lstrip("-") for field in paginator.get_ordering(request, queryset, view)
+    ]
+    modified = {
+        f"modified_{index}": Max(field) for index, field in enumerate(modified_fields)
+    }
+    page = paginator.paginate_queryset(
+        queryset.values("pk", *ordering).annotate(**modified), request, view=view
+    )
+    if not page:
+        return {}
+    keys = [row["pk"] for row in page]
+    links = (paginator.get_previous_link(), paginator.get_next_link())
+    return _validators(
+        f"{keys}:{links}", [row[name] for row in page for name in modified]
+    )
+
+
+def _validators(rows, modified):
+    modified = [value for value in modified if value is not None]
+    if not rows or not modified:
+        return {}
+    last_modified = max(modified)
+    etag = hashlib.md5(f"{rows}:{last_modified.isoformat()}".encode()).hexdigest()
+    return {
+        "ETag": quote_etag(etag),
+        "Last-Modified": http_date(int(last_modified.timestamp())),
+    }
+
+
+def not_modified(request, validators):
+    """
+    Return a 304 Not Modified response if the client has the current response.
+
+    Args:
+        request (Request): The incoming GET request.
+        validators (dict): The ETag and Last-Modified headers of the current response.
+
+    Returns:
+        HttpResponseNotModified: Or None when the response has to be sent.
+    """
+    if not validators:
+        return None
+    response = get_conditional_response(
+        request,
+        etag=validators["ETag"],
+        last_modified=parse_http_date(validators["Last-Modified"]),
+    )
+    if response is not None:
+        set_validators(response, validators)
+    return response
+
+
+def set_validators(response, validators):
+    for header, value in validators.items():
+        response[header] = value
+
+
+def conditional_response(
+    request, queryset, view, modified_fields=("updated_at",), list_view=None
+):
+    """
+    Run a view unless the client already has its response.
+
+    Args:
+        request (Request): The incoming GET request.
+        queryset (QuerySet): The rows behind the response.
+        view (callable): Runs the view and returns its response.
+        modified_fields (iterable): The updated_at fields the response depends on.
+        list_view (GenericAPIView): The list view serving a page of the queryset,
+            the validators are then computed over the rows of that page.
+
+    Returns:
+        Response: 304 Not Modified, or the response of the view with its validators.
+    """
+    if list_view is None:
+        validators = get_validators(queryset, modified_fields)
+    else:
+        validators = get_page_validators(request, queryset, list_view, modified_fields)
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+    response = view()
+    if response.status_code == 200:
+        set_validators(response, validators)
+    return response
@@ -0,0 +1,102 @@
+"""
+Module: ebs_app.services.date_windows
+
+This module reads the date windows of event queries from the query string.
+
+Query Parameters:
+    date_from: ISO 8601 date or datetime, the events from this time.
+    date_to: ISO 8601 date or datetime, the events before this time, a date includes
+        the whole day.
+    on: ISO 8601 date, the events of that day.
+    days: The events of the next N days from now.
+
+Parameters given together narrow the window down. Dates without a time are days of
+the current time zone.
+
+Contents:
+- parse_moment: Parses an ISO 8601 date or datetime.
+- get_window: Returns the date window of a request.
+"""
+
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from ebs_app.exceptions import InvalidDateWindowAPIException
+
+MAX_DAYS = 3660
+
+
+def parse_moment(value, end_of_day=False):
+    """
+    Parse an ISO 8601 date or datetime.
+
+    Args:
+        value (str): The date or datetime, or an empty value.
+        end_of_day (bool): Whether a date stands for the end of the day rather than
+            its start.
+
+    Returns:
+        datetime: The aware datetime, or None for an empty value.
+
+    Raises:
+        ValueError: If the value is not a valid date or datetime.
+    """
+    if not value:
+        return None
+    day = parse_date(value)
+    moment = parse_datetime(value) if day is None else None
+    if moment is None:
+        if day is None:
+            raise ValueError(f"Invalid date: {value}")
+        if end_of_day:
+            day += timedelta(days=1)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def get_window(params, upcoming=False, now=None):
+    """
+    Read the date window of a request.
+
+    Args:
+        params (QueryDict): The query parameters of the request.
+        upcoming (bool): Whether the window starts now at the earliest.
+        now (datetime): The current time, defaults to timezone.now().
+
+    Returns:
+        tuple: The start and the end of the window, None when open.
+
+    Raises:
+        InvalidDateWindowAPIException: If a parameter is invalid.
+    """
+    now = timezone.now() if now is None else now
+    try:
+        bounds = [
+            (parse_moment(params.get("date_from")), None),
+            (None, parse_moment(params.get("date_to"), end_of_day=True)),
+        ]
+        if params.get("on"):
+            if parse_date(params["on"]) is None:
+                raise ValueError(f"Invalid date: {params['on']}")
+            bounds.append(
+                (
+                    parse_moment(params["on"]),
+                    parse_moment(params["on"], end_of_day=True),
+                )
+            )
+    except ValueError:
+        raise InvalidDateWindowAPIException()
+
+    if "days" in params:
+        days = params["days"]
+        if not days.isdigit() or not 0 < int(days) <= MAX_DAYS:
+            raise InvalidDateWindowAPIException()
+        bounds.append((now, now + timedelta(days=int(days))))
+    if upcoming:
+        bounds.append((now, None))
+
+    starts = [start for start, _ in bounds if start is not None]
+    ends = [end for _, end in bounds if end is not None]
+    return max(starts, default=None), min(ends, default=None)
@@ -0,0 +1,155 @@
+"""
+Module: ebs_app.services.event_availability
+
+This module keeps the availability rollup of every event: the seats left across its
+tickets, the cheapest price with seats left and whether the event is sold out, read
+from one EventAvailability row instead of summing the tickets of the event.
+
+The reservation engine, the ticket views and the inventory front flush mark the
+tickets whose availability they change. Once the transaction commits, the rollups of
+their events are recomputed from the ticket and shard rows with a single UPDATE, so
+a rollup always reflects committed seats and never drifts through lost increments.
+The rollup is not written inside the booking transaction: bookings of the tickets of
+an event, or of the shards of a ticket, do not queue on the row of their event.
+
+A refresh lost between a commit and its callback, such as a crashed worker, is
+repaired by the refresh_event_availability task, which recomputes every rollup.
+
+Settings:
+    EBS_EVENT_AVAILABILITY: Overrides of DEFAULT_CONFIG.
+        - ENABLED: Whether rollups are refreshed when tickets change. When disabled
+          they are only recomputed by the refresh_event_availability task.
+
+Contents:
+- tickets_changed: Refreshes the rollups of the events of tickets once the transaction commits.
+- events_changed: Refreshes the rollups of events once the transaction commits.
+- refresh: Recomputes the rollups of events.
+- rebuild: Recomputes the rollups of all the events.
+"""
+
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Now
+from ebs_app.models.availability import EventAvailability
+from ebs_app.models.events import Event
+from ebs_app.models.tickets import Ticket, TicketShard
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "ENABLED": True,
+}
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "EBS_EVENT_AVAILABILITY", {})}
+
+
+def tickets_changed(ticket_ids):
+    """
+    Refresh the rollups of the events of tickets, once the current transaction commits.
+
+    Args:
+        ticket_ids (iterable): The IDs of the tickets whose availability changed.
+    """
+    if not get_config()["ENABLED"]:
+        return
+    ticket_ids = set(ticket_ids)
+    if ticket_ids:
+        events = Ticket.objects.filter(id__in=ticket_ids).values_list("event_id")
+        transaction.on_commit(lambda: _safe_refresh(event_id for event_id, in events))
+
+
+def events_changed(event_ids):
+    """
+    Refresh the rollups of events, once the current transaction commits.
+
+    Args:
+        event_ids (iterable): The IDs of the events whose tickets changed.
+    """
+    if not get_config()["ENABLED"]:
+        return
+    event_ids = set(event_ids)
+    if event_ids:
+        transaction.on_commit(lambda: _safe_refresh(event_ids))
+
+
+def refresh(event_ids):
+    """
+    Recompute the rollups of events from their tickets, creating the missing ones.
+
+    Args:
+        event_ids (iterable): The IDs of the events.
+
+    Returns:
+        int: The number of refreshed rollups.
+    """
+    event_ids = sorted(set(event_ids))
+    if not event_ids:
+        return 0
+    EventAvailability.objects.bulk_create(
+        [EventAvailability(event_id=event_id) for event_id in event_ids],
+        ignore_conflicts=True,
+    )
+    tickets = Ticket.objects.filter(event=OuterRef("event_id"))
+    available = (
+        tickets.with_availability()
+        .annotate(left=F("availability") + F("shard_availability"))
+        .filter(left__gt=0)
+    )
+    return EventAvailability.objects.filter(event_id__in=event_ids).update(
+        remaining=Coalesce(Subquery(_sum(tickets, "event", "availability")), 0)
+        + Coalesce(
+            Subquery(
+                _sum(
+                    TicketShard.objects.filter(ticket__event=OuterRef("event_id")),
+                    "ticket__event",
+                    "availability",
+                )
+            ),
+            0,
+        ),
+        cheapest_price=Subquery(available.order_by("price").values("price")[:1]),
+        sold_out=Exists(tickets) & ~Exists(available),
+        updated_at=Now(),
+    )
+
+
+def rebuild(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Recompute the rollups of all the events, batch by batch.
+
+    Args:
+        batch_size (int): The number of events refreshed per statement.
+
+    Returns:
+        int: The number of refreshed rollups.
+    """
+    refreshed = 0
+    last_id = 0
+    while True:
+        event_ids = list(
+            Event.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not event_ids:
+            return refreshed
+        refreshed += refresh(event_ids)
+        last_id = event_ids[-1]
+
+
+def _sum(rows, group, field):
+    return rows.values(group).annotate(total=Sum(field)).values("total")
+
+
+def _safe_refresh(event_ids):
+    try:
+        refresh(event_ids)
+    except Exception as exc:
+        # The rollups are repaired by the next rebuild.
+        logger.warning("Could not refresh the availability of events: %s", exc)
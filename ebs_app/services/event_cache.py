@@ -0,0 +1,179 @@
+"""
+Module: ebs_app.services.event_cache
+
+This module caches the responses of the event catalogue, the list and the detail of
+events, which are the hottest reads of the API.
+
+Cached responses are keyed by a version counter and by the requested URL. The event
+list is keyed by a global version, the detail of an event by the version of that
+event. Creating, updating or deleting an event bumps the versions once the write is
+committed, so the next read misses and rebuilds the response: a response is never
+served stale after an organiser edit, the timeout only evicts unused responses.
+
+Versions start from the current time in nanoseconds, so a version evicted from the
+cache never comes back with a value already used by older responses.
+
+Hits and misses are counted in the cache as well, see get_stats.
+
+Settings:
+    EBS_EVENT_CACHE = {
+        "ENABLED": True,
+        "CACHE_ALIAS": "default",
+        "TIMEOUT": 300,             # Seconds an unused response is kept for
+    }
+
+Contents:
+- cached_response: Returns the cached response of a catalogue read, or builds it.
+- bump: Invalidates the cached responses of an event and of the event list.
+- get_stats: Returns the hit and miss counters.
+- reset_stats: Resets the hit and miss counters.
+"""
+
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from ebs_app.services import conditional_get
+
+DEFAULT_CONFIG = {
+    "ENABLED": True,
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": 300,
+}
+
+PREFIX = "ebs:events:"
+CACHE_HEADER = "X-Cache"
+LIST_VERSION_KEY = f"{PREFIX}version"
+STATS_KEYS = {"hits": f"{PREFIX}stats:hits", "misses": f"{PREFIX}stats:misses"}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "EBS_EVENT_CACHE", {})}
+
+
+def get_cache():
+    return caches[get_config()["CACHE_ALIAS"]]
+
+
+def cached_response(request, view, event_id=None, variant=""):
+    """
+    Return the cached response of a catalogue read, or build and cache it.
+
+    Only successful responses are cached, along with their ETag and Last-Modified,
+    so a conditional GET of a cached response is answered without any query.
+    Responses carry the X-Cache: HIT or MISS header.
+
+    Args:
+        request (Request): The incoming request.
+        view (callable): Runs the view and returns its response.
+        event_id: The ID of the event for the detail, None for the list.
+        variant (str): What the response depends on besides the URL, such as the
+            current time of the windows relative to now.
+
+    Returns:
+        Response: The cached response, or the response of the view.
+    """
+    config = get_config()
+    if not config["ENABLED"]:
+        return view()
+
+    cache = get_cache()
+    if event_id is None:
+        version = _get_version(cache, LIST_VERSION_KEY)
+    else:
+        version = _get_version(cache, _event_version_key(event_id))
+    url = hashlib.sha256(
+        f"{request.get_host()}{request.get_full_path()}{variant}".encode()
+    ).hexdigest()
+    key = f"{PREFIX}{event_id or 'list'}:{version}:{url}"
+
+    entry = cache.get(key)
+    if entry is not None:
+        _count(cache, "hits")
+        response = conditional_get.not_modified(request, entry["validators"])
+        if response is None:
+            response = Response(entry["data"])
+            conditional_get.set_validators(response, entry["validators"])
+        response[CACHE_HEADER] = "HIT"
+        return response
+
+    _count(cache, "misses")
+    response = view()
+    if response.status_code == status.HTTP_200_OK:
+        entry = {
+            "data": response.data,
+            "validators": {
+                header: response[header]
+                for header in conditional_get.VALIDATOR_HEADERS
+                if response.has_header(header)
+            },
+        }
+        cache.set(key, entry, timeout=config["TIMEOUT"])
+    response[CACHE_HEADER] = "MISS"
+    return response
+
+
+def bump(event_id=None):
+    """
+    Invalidate the cached event list, and the cached detail of an event.
+
+    The versions are bumped once the current transaction commits, so a read racing
+    with the write cannot cache the old data under the new version.
+
+    Args:
+        event_id: The ID of the created, updated or deleted event.
+    """
+    keys = [LIST_VERSION_KEY]
+    if event_id is not None:
+        keys.append(_event_version_key(event_id))
+
+    def bump_versions():
+        cache = get_cache()
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Not cached yet, the next read starts from a fresh version.
+                pass
+
+    transaction.on_commit(bump_versions)
+
+
+def get_stats():
+    """
+    Return the hit and miss counters of the event cache.
+
+    Returns:
+        dict: The hits and misses since the last reset.
+    """
+    cache = get_cache()
+    counts = cache.get_many(list(STATS_KEYS.values()))
+    return {name: counts.get(key, 0) for name, key in STATS_KEYS.items()}
+
+
+def reset_stats():
+    get_cache().delete_many(list(STATS_KEYS.values()))
+
+
+def _event_version_key(event_id):
+    return f"{PREFIX}version:{event_id}"
+
+
+def _get_version(cache, key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _count(cache, name):
+    key = STATS_KEYS[name]
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
@@ -0,0 +1,332 @@
+"""
+Module: ebs_app.services.event_search
+
+This module contains the full-text search of events.
+
+Events are searched by their name, venue and description, in a full-text index kept
+next to the event table: an FTS5 table on SQLite, a GIN indexed tsvector table on
+PostgreSQL. Results are ranked by relevance, the name weighs the most and the
+description the least, and can be filtered by date range and venue.
+
+Every word of the query has to match, the last one as a prefix, so clients can search
+as the user types. Words are extracted from the query, the operators of the index
+query syntax are never passed through.
+
+The index is maintained incrementally: EventViewSet indexes the events it creates or
+updates, and removes the events it deletes, once the write is committed. Events
+written by other means are picked up by rebuilding the index, see the
+rebuild_event_search management command.
+
+Settings:
+    EBS_EVENT_SEARCH = {
+        "BACKEND": "ebs_app.services.event_search.SQLiteSearchBackend",
+                                        # Or PostgreSQLSearchBackend
+        "LIMIT": 20,                    # Results returned by default
+        "MAX_LIMIT": 100,               # Largest ?limit= a client can ask for
+        "MAX_TERMS": 8,                 # Words of the query searched for
+    }
+
+Contents:
+- SQLiteSearchBackend: FTS5 index, ranked with bm25.
+- PostgreSQLSearchBackend: tsvector index, ranked with ts_rank.
+- parse_query: Reads the search parameters of a request.
+- search: Returns the IDs of the matching events, best first.
+- index_events: Indexes events once the current transaction commits.
+- remove_events: Removes events from the index once the current transaction commits.
+- rebuild: Rebuilds the whole index.
+"""
+
+import re
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+from ebs_app.models.events import Event
+from ebs_app.exceptions import InvalidSearchQueryAPIException
+from ebs_app.services import date_windows
+
+DEFAULT_CONFIG = {
+    "BACKEND": "ebs_app.services.event_search.SQLiteSearchBackend",
+    "LIMIT": 20,
+    "MAX_LIMIT": 100,
+    "MAX_TERMS": 8,
+}
+
+TABLE = "ebs_app_event_search"
+EVENT_TABLE = Event._meta.db_table
+INDEXED_FIELDS = ("id", "event_name", "event_description", "venue")
+WORD_RE = re.compile(r"\w+")
+
+
+class SearchBackend:
+    """
+    Base class of the search backends, which differ by the SQL of their index.
+
+    Subclasses define:
+    - match_sql: The match condition, taking the index query as its parameter.
+    - rank_sql: The rank ordering, best first, taking the index query as its
+      parameter when it has one.
+    - venue_sql: The case insensitive venue condition.
+    - build_query(terms): The index query of the search terms.
+    - insert(rows), delete(event_ids), clear(): Write the index.
+    """
+
+    match_sql = None
+    rank_sql = None
+    venue_sql = None
+    id_column = None
+
+    def __init__(self, config):
+        self.config = config
+
+    def search(self, terms, date_from=None, date_to=None, venue=None, limit=20):
+        query = self.build_query(terms)
+        conditions = [self.match_sql]
+        params = [query]
+        if date_from is not None:
+            conditions.append("e.event_date_time >= %s")
+            params.append(connection.ops.adapt_datetimefield_value(date_from))
+        if date_to is not None:
+            conditions.append("e.event_date_time < %s")
+            params.append(connection.ops.adapt_datetimefield_value(date_to))
+        if venue:
+            conditions.append(self.venue_sql)
+            params.append(venue)
+        # The event table is only joined to filter, deleted events are removed
+        # from the index and dropped by the caller anyway.
+        join = (
+            f"JOIN {EVENT_TABLE} e ON e.id = {TABLE}.{self.id_column} "
+            if len(conditions) > 1
+            else ""
+        )
+        sql = (
+            f"SELECT {TABLE}.{self.id_column} FROM {TABLE} {join}"
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {self.rank_sql}, {TABLE}.{self.id_column} LIMIT %s"
+        )
+        with connection.cursor() as cursor:
+            rank_params = [query] if "%s" in self.rank_sql else []
+            cursor.execute(sql, [*params, *rank_params, limit])
+            return [row[0] for row in cursor.fetchall()]
+
+    def index(self, rows):
+        rows = list(rows)
+        self.delete([row[0] for row in rows])
+        self.insert(rows)
+
+    def optimize(self):
+        pass
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    Search backend of the FTS5 table, the event ID is the rowid of the table.
+    """
+
+    id_column = "rowid"
+    match_sql = f"{TABLE} MATCH %s"
+    # bm25 is lower for better matches, weighted by column: name, description, venue.
+    rank_sql = f"bm25({TABLE}, 10.0, 1.0, 4.0)"
+    venue_sql = "e.venue = %s COLLATE NOCASE"
+
+    def build_query(self, terms):
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def insert(self, rows):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {TABLE} (rowid, event_name, event_description, venue) "
+                "VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+    def delete(self, event_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {TABLE} WHERE rowid = %s",
+                [(event_id,) for event_id in event_ids],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE}")
+
+    def optimize(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+
+
+class PostgreSQLSearchBackend(SearchBackend):
+    """
+    Search backend of the tsvector table, with the english text search configuration.
+    """
+
+    id_column = "event_id"
+    match_sql = f"{TABLE}.document @@ to_tsquery('english', %s)"
+    rank_sql = f"ts_rank({TABLE}.document, to_tsquery('english', %s)) DESC"
+    venue_sql = "UPPER(e.venue) = UPPER(%s)"
+    document_sql = (
+        "setweight(to_tsvector('english', %s), 'A')"
+        " || setweight(to_tsvector('english', %s), 'B')"
+        " || setweight(to_tsvector('english', %s), 'C')"
+    )
+
+    def build_query(self, terms):
+        quoted = [f"'{term}'" for term in terms]
+        quoted[-1] += ":*"
+        return " & ".join(quoted)
+
+    def insert(self, rows):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {TABLE} (event_id, document) VALUES (%s, {self.document_sql})",
+                [
+                    (event_id, name, venue, description)
+                    for event_id, name, description, venue in rows
+                ],
+            )
+
+    def delete(self, event_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {TABLE} WHERE event_id = ANY(%s)", [list(event_ids)]
+            )
+
+    def clear(self):
+        # Unlike TRUNCATE, which locks the table against reads until the rebuild
+        # commits, deleted rows stay visible to concurrent searches.
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE}")
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "EBS_EVENT_SEARCH", {})}
+
+
+def get_backend():
+    config = get_config()
+    return import_string(config["BACKEND"])(config)
+
+
+def parse_query(params):
+    """
+    Read the search parameters of a request.
+
+    Query Parameters:
+        q: The words searched for, required.
+        date_from, date_to: ISO 8601 dates or datetimes, the events from date_from
+            and before date_to, a date_to date includes the whole day.
+        venue: The venue of the events, case insensitive.
+        limit: The number of results, up to MAX_LIMIT.
+
+    Args:
+        params (QueryDict): The query parameters of the request.
+
+    Returns:
+        dict: The keyword arguments of search.
+
+    Raises:
+        InvalidSearchQueryAPIException: If a parameter is missing or invalid.
+    """
+    config = get_config()
+    terms = WORD_RE.findall(params.get("q", "").lower())[: config["MAX_TERMS"]]
+    if not terms:
+        raise InvalidSearchQueryAPIException()
+
+    limit = params.get("limit", str(config["LIMIT"]))
+    if not limit.isdigit() or not 0 < int(limit) <= config["MAX_LIMIT"]:
+        raise InvalidSearchQueryAPIException()
+
+    return {
+        "terms": terms,
+        "date_from": _parse_moment(params.get("date_from")),
+        "date_to": _parse_moment(params.get("date_to"), end_of_day=True),
+        "venue": params.get("venue", "").strip() or None,
+        "limit": int(limit),
+    }
+
+
+def search(terms, date_from=None, date_to=None, venue=None, limit=20):
+    """
+    Search the events.
+
+    Args:
+        terms (list): The lower case words searched for.
+        date_from (datetime): Only the events from this time.
+        date_to (datetime): Only the events before this time.
+        venue (str): Only the events at this venue, case insensitive.
+        limit (int): The number of results.
+
+    Returns:
+        list: The IDs of the matching events, best match first.
+    """
+    return get_backend().search(terms, date_from, date_to, venue, limit)
+
+
+def index_events(event_ids):
+    """
+    Index the current name, description and venue of events, once the current
+    transaction commits.
+
+    Args:
+        event_ids (iterable): The IDs of the created or updated events.
+    """
+    event_ids = list(event_ids)
+
+    def index():
+        rows = Event.objects.filter(id__in=event_ids).values_list(*INDEXED_FIELDS)
+        with transaction.atomic():
+            get_backend().index(rows)
+
+    transaction.on_commit(index)
+
+
+def remove_events(event_ids):
+    """
+    Remove events from the index, once the current transaction commits.
+
+    Args:
+        event_ids (iterable): The IDs of the deleted events.
+    """
+    event_ids = list(event_ids)
+    transaction.on_commit(lambda: get_backend().delete(event_ids))
+
+
+def rebuild(batch_size=5000):
+    """
+    Rebuild the index from all the events, in a single transaction.
+
+    Searches keep using the previous index until the rebuild commits.
+
+    Args:
+        batch_size (int): The number of events read and inserted at once.
+
+    Returns:
+        int: The number of indexed events.
+    """
+    backend = get_backend()
+    indexed = 0
+    last_id = 0
+    with transaction.atomic():
+        backend.clear()
+        while True:
+            rows = list(
+                Event.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list(*INDEXED_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            backend.insert(rows)
+            indexed += len(rows)
+            last_id = rows[-1][0]
+        backend.optimize()
+    return indexed
+
+
+def _parse_moment(value, end_of_day=False):
+    try:
+        return date_windows.parse_moment(value, end_of_day)
+    except ValueError:
+        raise InvalidSearchQueryAPIException()
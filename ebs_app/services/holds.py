@@ -0,0 +1,143 @@
+"""
+Module: ebs_app.services.holds
+
+This module contains the two phase booking flow.
+
+A new booking is a PENDING hold on its seats until hold_expires_at. Confirming the
+booking flips it to BOOKED, moves its seats from the held to the sold counters of
+its tickets and adds them to the sales summary, a hold which is
+not confirmed in time is released by the release_expired_holds sweeper and its seats
+go back on sale.
+
+Every state change is a guarded UPDATE on the booking status, so a hold is either
+confirmed or released, never both, and rows are never loaded and saved one by one.
+
+Settings:
+    EBS_BOOKING_HOLD_SECONDS: How long a hold lasts, defaults to 600 seconds.
+
+Contents:
+- hold_expiry: Computes the expiry of a new hold.
+- confirm_hold: Confirms a pending booking.
+- release_expired_holds: Releases expired holds in batches.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from ebs_app.models.bookings import Booking
+from ebs_app.models.choices import BookingStatus
+from ebs_app.services import sales_summary
+from ebs_app.services.reservations import confirm_seats, release_bookings
+from ebs_app.exceptions import (
+    HoldExpiredAPIException,
+    BookingNotPendingAPIException,
+)
+
+DEFAULT_HOLD_SECONDS = 600
+SWEEP_BATCH_SIZE = 1000
+
+
+def hold_expiry(now=None):
+    """
+    Compute when a hold created now expires.
+
+    Returns:
+        datetime: The expiry of the hold.
+    """
+    seconds = getattr(settings, "EBS_BOOKING_HOLD_SECONDS", DEFAULT_HOLD_SECONDS)
+    return (now or timezone.now()) + timedelta(seconds=seconds)
+
+
+@transaction.atomic
+def confirm_hold(booking):
+    """
+    Confirm a pending booking whose hold has not expired yet.
+
+    The seat counters of the tickets and the sales summary are updated in the
+    same transaction.
+
+    Args:
+        booking (Booking): The booking to be confirmed.
+
+    Raises:
+        BookingNotPendingAPIException: If the booking is not pending.
+        HoldExpiredAPIException: If the hold has expired.
+    """
+    now = timezone.now()
+    confirmed = Booking.objects.filter(
+        id=booking.id,
+        status=BookingStatus.PENDING,
+        hold_expires_at__gt=now,
+    ).update(status=BookingStatus.BOOKED, hold_expires_at=None, confirmed_at=now)
+
+    if not confirmed:
+        booking.refresh_from_db(fields=["status", "hold_expires_at"])
+        if booking.status == BookingStatus.PENDING:
+            raise HoldExpiredAPIException()
+        raise BookingNotPendingAPIException()
+
+    confirm_seats([booking.id])
+    sales_summary.record_sales([booking.id])
+    booking.status = BookingStatus.BOOKED
+    booking.hold_expires_at = None
+    booking.confirmed_at = now
+
+
+def release_expired_holds(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """
+    Release the seats of every hold expired at now.
+
+    Holds are released in batches, every batch in its own transaction with a
+    constant number of queries:
+    - The expired holds are selected, rows locked by a concurrent confirmation or
+      sweeper are skipped where the database supports it.
+    - Their status is flipped to CANCELLED with one UPDATE guarded on PENDING. When
+      it flips fewer holds than selected, some were confirmed or cancelled in the
+      meantime: the batch is rolled back and selected again, so only the seats of
+      the holds it flipped are given back.
+    - The held seats are summed per ticket with one query and given back with
+      one UPDATE.
+
+    Args:
+        now (datetime): The reference time, defaults to the current time.
+        batch_size (int): The number of holds released per transaction.
+
+    Returns:
+        int: The number of released holds.
+    """
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            booking_ids = _expired_holds(now, batch_size)
+            if not booking_ids:
+                return released
+
+            flipped = Booking.objects.filter(
+                id__in=booking_ids, status=BookingStatus.PENDING
+            ).update(
+                status=BookingStatus.CANCELLED, is_cancelled=True, hold_expires_at=None
+            )
+            if flipped != len(booking_ids):
+                # Holds confirmed or cancelled since they were selected, which row
+                # locks do not prevent on every database: the batch is rolled back
+                # and selected again without them.
+                transaction.set_rollback(True)
+                continue
+            release_bookings(booking_ids)
+        released += len(booking_ids)
+        if len(booking_ids) < batch_size:
+            return released
+
+
+def _expired_holds(now, batch_size):
+    """
+    Select and lock the IDs of the next batch of holds expired at now.
+    """
+    return list(
+        Booking.objects.select_for_update(skip_locked=True)
+        .filter(status=BookingStatus.PENDING, hold_expires_at__lte=now)
+        .order_by("hold_expires_at")
+        .values_list("id", flat=True)[:batch_size]
+    )
@@ -0,0 +1,127 @@
+"""
+Module: ebs_app.services.idempotency
+
+This module makes retried POST requests safe with the Idempotency-Key header.
+
+The successful response of the first request carrying a key is stored in a Django
+cache for TTL seconds. A retry with the same key, by the same user on the same path,
+is answered with the stored response without running the view again, so it touches
+neither the database nor the Celery queue. Replayed responses carry the
+Idempotent-Replayed: true header.
+
+While the first request is in flight its key is locked, a concurrent duplicate waits
+for the stored response instead of running in parallel. Failed requests are not
+stored and release the lock, so their retry runs the view again.
+
+A key reused with a different payload is rejected.
+
+Settings:
+    EBS_IDEMPOTENCY = {
+        "CACHE_ALIAS": "default",
+        "TTL": 86400,              # Seconds a response is replayed for
+        "LOCK_TIMEOUT": 30,        # Seconds an in-flight request keeps its key locked
+        "WAIT_TIMEOUT": 10,        # Seconds a duplicate waits for the in-flight request
+    }
+
+Contents:
+- run_idempotent: Runs a view once per Idempotency-Key.
+"""
+
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+from ebs_app.exceptions import (
+    InvalidIdempotencyKeyAPIException,
+    IdempotencyKeyReusedAPIException,
+    IdempotentRequestInProgressAPIException,
+)
+
+DEFAULT_CONFIG = {
+    "CACHE_ALIAS": "default",
+    "TTL": 86400,
+    "LOCK_TIMEOUT": 30,
+    "WAIT_TIMEOUT": 10,
+}
+
+KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "EBS_IDEMPOTENCY", {})}
+
+
+def run_idempotent(request, view):
+    """
+    Run a view once per Idempotency-Key of the request.
+
+    Requests without the header run the view as usual.
+
+    Args:
+        request (Request): The incoming request.
+        view (callable): Runs the view and returns its response.
+
+    Returns:
+        Response: The response of the view, or the stored response of the first
+            request with the same key.
+
+    Raises:
+        InvalidIdempotencyKeyAPIException: If the key is empty or too long.
+        IdempotencyKeyReusedAPIException: If the key was used with another payload.
+        IdempotentRequestInProgressAPIException: If the first request with the key
+            is still running after WAIT_TIMEOUT seconds.
+    """
+    key = request.headers.get(KEY_HEADER)
+    if key is None:
+        return view()
+    if not key.strip() or len(key) > MAX_KEY_LENGTH:
+        raise InvalidIdempotencyKeyAPIException()
+
+    config = get_config()
+    cache = caches[config["CACHE_ALIAS"]]
+    scope = hashlib.sha256(
+        f"{request.user.pk}:{request.path}:{key}".encode()
+    ).hexdigest()
+    response_key = f"ebs:idempotency:response:{scope}"
+    lock_key = f"ebs:idempotency:lock:{scope}"
+    fingerprint = hashlib.sha256(
+        json.dumps(request.data, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+    deadline = time.monotonic() + config["WAIT_TIMEOUT"]
+    while True:
+        stored = cache.get(response_key)
+        if stored is not None:
+            if stored["fingerprint"] != fingerprint:
+                raise IdempotencyKeyReusedAPIException()
+            return Response(
+                stored["data"],
+                status=stored["status"],
+                headers={REPLAYED_HEADER: "true"},
+            )
+        if cache.add(lock_key, fingerprint, timeout=config["LOCK_TIMEOUT"]):
+            break
+        if time.monotonic() >= deadline:
+            raise IdempotentRequestInProgressAPIException()
+        time.sleep(POLL_INTERVAL)
+
+    try:
+        response = view()
+        if response.status_code < 300:
+            cache.set(
+                response_key,
+                {
+                    "fingerprint": fingerprint,
+                    "status": response.status_code,
+                    "data": response.data,
+                },
+                timeout=config["TTL"],
+            )
+        return response
+    finally:
+        cache.delete(lock_key)
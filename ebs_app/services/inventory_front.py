@@ -0,0 +1,474 @@
+"""
+Module: ebs_app.services.inventory_front
+
+This module contains the optional in-memory inventory front of the reservation engine.
+
+When enabled, seats of unsharded tickets are claimed from atomic counters kept in a
+counter backend instead of the Ticket rows, so deciding whether a seat is left does
+not touch the database. The flush_inventory_front Celery task writes the seats of the
+committed claims to the Ticket rows in batches.
+
+Every ticket has four counters:
+- capacity: The availability of the ticket plus the seats already flushed, recorded
+  in Ticket.front_flushed. A flush moves seats from one to the other.
+- claimed: The seats ever claimed, including the claims of bookings in progress.
+- released: The seats ever given back by bookings which were rolled back.
+- committed: The seats ever claimed by committed bookings. The flush writes the seats
+  committed since the last flush, and adds them to front_flushed in the same UPDATE.
+
+The seats left are capacity - claimed + released. Claims only write the claimed and
+released counters and flushes only write the database, where the availability and
+front_flushed change together, so reconciling the capacity with the database never
+takes claims in progress or flushes in progress for a drift.
+
+Counters are warmed from the database on first use of a ticket, or in bulk with the
+warm_inventory_front management command. The reconcile_inventory_front task repairs
+capacities drifting from the database, and gives back the seats of claims abandoned
+by crashed processes. Whenever the backend fails, the reservation engine falls back
+to claiming seats in the database.
+
+Settings:
+    EBS_INVENTORY_FRONT = {
+        "ENABLED": False,
+        "BACKEND": "ebs_app.services.inventory_front.LocalInventoryBackend",
+        "CACHE_ALIAS": "default",          # Used by CacheInventoryBackend
+        "BATCH_SIZE": 500,                 # Tickets per flush / reconcile batch
+    }
+
+Contents:
+- LocalInventoryBackend: In-process counters, for tests and single node deployments.
+- CacheInventoryBackend: Counters in a Django cache backend such as Redis.
+- claim / release: Claim seats and give back the seats of rolled back bookings.
+- record_pending: Records the seats of committed bookings for the flush.
+- sync_counters: Applies availability changes written to the database to the counters.
+- warm_up / flush / reconcile: Keep the counters and the Ticket rows in step.
+"""
+
+import logging
+import threading
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest, Now
+from django.utils.module_loading import import_string
+from ebs_app.models.tickets import Ticket
+from ebs_app.services import availability_push, event_availability
+from ebs_app.exceptions import (
+    TicketNotAvailableAPIException,
+    BookedMoreSeatAPIException,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "ENABLED": False,
+    "BACKEND": "ebs_app.services.inventory_front.LocalInventoryBackend",
+    "CACHE_ALIAS": "default",
+    "BATCH_SIZE": 500,
+}
+
+CAPACITY = "capacity"
+CLAIMED = "claimed"
+RELEASED = "released"
+COMMITTED = "committed"
+# The claimed counter seen by the previous reconciliation.
+SETTLED = "settled"
+
+
+class InventoryFrontUnavailable(Exception):
+    """
+    Raised when the counter backend cannot be used, callers fall back to the database.
+    """
+
+
+class LocalInventoryBackend:
+    """
+    Counter backend keeping the counters in a dict of the current process.
+
+    Only the current process sees the counters, so the flush has to run in the same
+    process as the bookings. Meant for tests and single process deployments.
+    """
+
+    _counters = {}
+    _lock = threading.Lock()
+
+    def __init__(self, config):
+        self.config = config
+
+    def get_many(self, keys):
+        with self._lock:
+            return {key: self._counters[key] for key in keys if key in self._counters}
+
+    def add(self, key, value):
+        with self._lock:
+            return self._counters.setdefault(key, value) == value
+
+    def incr(self, key, delta):
+        with self._lock:
+            if key not in self._counters:
+                raise KeyError(key)
+            self._counters[key] += delta
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class CacheInventoryBackend:
+    """
+    Counter backend keeping the counters in a Django cache.
+
+    The cache must provide atomic incr/decr across processes, such as Redis or
+    Memcached, for the counters to be shared by all the web workers.
+    """
+
+    prefix = "ebs:inventory:"
+
+    def __init__(self, config):
+        self.cache = caches[config["CACHE_ALIAS"]]
+
+    def get_many(self, keys):
+        values = self.cache.get_many([self.prefix + key for key in keys])
+        return {key.removeprefix(self.prefix): value for key, value in values.items()}
+
+    def add(self, key, value):
+        return self.cache.add(self.prefix + key, value, timeout=None)
+
+    def incr(self, key, delta):
+        try:
+            return self.cache.incr(self.prefix + key, delta)
+        except ValueError:
+            raise KeyError(key)
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "EBS_INVENTORY_FRONT", {})}
+
+
+def is_enabled():
+    return get_config()["ENABLED"]
+
+
+def get_backend():
+    config = get_config()
+    return import_string(config["BACKEND"])(config)
+
+
+def _key(counter, ticket_id):
+    return f"{counter}:{ticket_id}"
+
+
+def claim(lines):
+    """
+    Claim seats from the counters of the given tickets.
+
+    Either all the lines are claimed or none of them. Counters of tickets which were
+    not seen yet are warmed from the database first.
+
+    Args:
+        lines (dict): The count to be claimed per ticket id.
+
+    Raises:
+        InventoryFrontUnavailable: If the backend failed, no seat is left claimed.
+        TicketNotAvailableAPIException: If a ticket has no seats left.
+        BookedMoreSeatAPIException: If a line asks for more seats than are left.
+    """
+    backend = get_backend()
+    claimed = {}
+    try:
+        for ticket_id, count in lines.items():
+            total = _claim_or_warm(backend, ticket_id, count)
+            claimed[ticket_id] = count
+            left = _seats_left(backend, ticket_id, total)
+            if left < 0:
+                if left + count <= 0:
+                    raise TicketNotAvailableAPIException()
+                raise BookedMoreSeatAPIException()
+    except Exception as exc:
+        _give_back(backend, claimed)
+        if isinstance(
+            exc, (TicketNotAvailableAPIException, BookedMoreSeatAPIException)
+        ):
+            raise
+        logger.warning("Inventory front unavailable: %s", exc)
+        raise InventoryFrontUnavailable() from exc
+
+
+def _claim_or_warm(backend, ticket_id, count):
+    try:
+        return backend.incr(_key(CLAIMED, ticket_id), count)
+    except KeyError:
+        warm_up([ticket_id], backend=backend)
+        return backend.incr(_key(CLAIMED, ticket_id), count)
+
+
+def _seats_left(backend, ticket_id, claimed):
+    keys = [_key(CAPACITY, ticket_id), _key(RELEASED, ticket_id)]
+    counters = backend.get_many(keys)
+    capacity, released = (counters[key] for key in keys)
+    return capacity - claimed + released
+
+
+def _give_back(backend, lines):
+    for ticket_id, count in lines.items():
+        try:
+            backend.incr(_key(RELEASED, ticket_id), count)
+        except Exception as exc:
+            # The seats stay claimed until a reconciliation finds them abandoned.
+            logger.warning("Could not give back seats of ticket %s: %s", ticket_id, exc)
+
+
+def release(lines):
+    """
+    Give back seats claimed by a booking which was rolled back.
+
+    Args:
+        lines (dict): The count to be given back per ticket id.
+    """
+    _give_back(get_backend(), lines)
+
+
+def record_pending(lines):
+    """
+    Record the seats claimed by a committed booking, to be written by the next flush.
+
+    Args:
+        lines (dict): The count claimed per ticket id.
+    """
+    backend = get_backend()
+    for ticket_id, count in lines.items():
+        try:
+            backend.incr(_key(COMMITTED, ticket_id), count)
+        except Exception as exc:
+            logger.error(
+                "Could not record pending seats of ticket %s: %s", ticket_id, exc
+            )
+
+
+def sync_counters(deltas):
+    """
+    Apply availability changes written directly to the Ticket rows to the counters,
+    once the transaction writing them commits.
+
+    Used when a booking is cancelled (positive deltas) or seats were claimed in the
+    database because the front was not used (negative deltas).
+
+    Args:
+        deltas (dict): The availability change per ticket id.
+    """
+    if not is_enabled() or not deltas:
+        return
+    transaction.on_commit(lambda: _sync_counters(deltas))
+
+
+def _sync_counters(deltas):
+    backend = get_backend()
+    for ticket_id, delta in deltas.items():
+        try:
+            backend.incr(_key(CAPACITY, ticket_id), delta)
+        except KeyError:
+            # Not warmed yet, the next claim reads the database.
+            pass
+        except Exception as exc:
+            # The counter is off until the next reconciliation.
+            logger.warning(
+                "Could not sync the counter of ticket %s: %s", ticket_id, exc
+            )
+
+
+def warm_up(ticket_ids=None, backend=None):
+    """
+    Load the counters of the given tickets, or all unsharded tickets, from the database.
+
+    Counters which already exist are left untouched.
+
+    Args:
+        ticket_ids (iterable): The IDs of the tickets to be warmed.
+        backend: The counter backend, defaults to the configured one.
+
+    Returns:
+        int: The number of tickets loaded.
+    """
+    backend = backend or get_backend()
+    loaded = 0
+    for batch in _ticket_batches(ticket_ids):
+        for ticket_id, availability, flushed in batch:
+            _warm(backend, ticket_id, availability, flushed)
+            loaded += 1
+    return loaded
+
+
+def _warm(backend, ticket_id, availability, flushed):
+    # The seats flushed before are claimed and committed, none is pending. The claimed
+    # counter comes last, claims only start once the other counters exist.
+    backend.add(_key(CAPACITY, ticket_id), availability + flushed)
+    backend.add(_key(RELEASED, ticket_id), 0)
+    backend.add(_key(COMMITTED, ticket_id), flushed)
+    backend.add(_key(CLAIMED, ticket_id), flushed)
+
+
+def flush():
+    """
+    Write the seats of the committed claims to the Ticket rows, moving them from the
+    availability to the held counters.
+
+    Every batch of tickets is written with a single UPDATE statement, which also
+    raises front_flushed to the committed counter. The counters are not written, so a
+    crash after the update leaves nothing to repair, and a flush running concurrently
+    with the same committed counters writes no seat twice.
+
+    Returns:
+        int: The number of seats written to the database.
+    """
+    backend = get_backend()
+    flushed = 0
+    for batch in _ticket_batches():
+        counters = backend.get_many(
+            [_key(COMMITTED, ticket_id) for ticket_id, _, _ in batch]
+        )
+        committed = {
+            ticket_id: counters[_key(COMMITTED, ticket_id)]
+            for ticket_id, _, front_flushed in batch
+            if counters.get(_key(COMMITTED, ticket_id), front_flushed) > front_flushed
+        }
+        if not committed:
+            continue
+        seats = _unflushed_seats(committed)
+        with transaction.atomic():
+            Ticket.objects.filter(id__in=sorted(committed)).update(
+                availability=F("availability") - seats,
+                held=F("held") + seats,
+                updated_at=Now(),
+                # Last, MySQL evaluates the assignments in order.
+                front_flushed=F("front_flushed") + seats,
+            )
+            availability_push.tickets_changed(committed)
+            event_availability.tickets_changed(committed)
+        flushed += sum(committed.values()) - sum(
+            front_flushed
+            for ticket_id, _, front_flushed in batch
+            if ticket_id in committed
+        )
+    return flushed
+
+
+def _unflushed_seats(committed):
+    """
+    The seats committed per ticket which are not flushed yet, as an SQL expression.
+    """
+    return Greatest(
+        Case(
+            *[
+                When(id=ticket_id, then=Value(total))
+                for ticket_id, total in committed.items()
+            ],
+            default=F("front_flushed"),
+            output_field=IntegerField(),
+        )
+        - F("front_flushed"),
+        Value(0),
+    )
+
+
+def refresh(ticket_ids):
+    """
+    Reconcile the counters of the given tickets once the current transaction commits,
+    e.g. after an organiser edited their availability.
+
+    Args:
+        ticket_ids (list): The IDs of the edited tickets.
+    """
+    if not is_enabled():
+        return
+    transaction.on_commit(lambda: _safe_reconcile(ticket_ids))
+
+
+def _safe_reconcile(ticket_ids):
+    try:
+        reconcile(ticket_ids, release_abandoned=False)
+    except Exception as exc:
+        logger.warning(
+            "Could not refresh the counters of tickets %s: %s", ticket_ids, exc
+        )
+
+
+def reconcile(ticket_ids=None, release_abandoned=True):
+    """
+    Repair counters drifting from the database.
+
+    The capacity of a ticket is compared to its availability plus front_flushed, and
+    corrected with a relative increment. Claims and flushes leave both sides as they
+    are, so bookings and flushes in progress are not taken for a drift.
+
+    Seats claimed but neither committed nor released belong to bookings in progress.
+    When the claimed counter of a ticket did not move since the previous
+    reconciliation, no booking started in between, and the seats still in progress
+    were abandoned by bookings which never finished, such as the bookings of a
+    crashed worker. They are released.
+
+    Args:
+        ticket_ids (iterable): The IDs of the tickets to be reconciled, defaults to all.
+        release_abandoned (bool): Whether abandoned claims are released. Only the
+            periodic reconcile_inventory_front task releases them, a reconciliation
+            run between two of its runs would release claims still in progress.
+
+    Returns:
+        int: The number of counters corrected.
+    """
+    backend = get_backend()
+    corrected = 0
+    for batch in _ticket_batches(ticket_ids):
+        counters = backend.get_many(
+            [
+                _key(counter, ticket_id)
+                for ticket_id, _, _ in batch
+                for counter in (CAPACITY, CLAIMED, RELEASED, COMMITTED, SETTLED)
+            ]
+        )
+        for ticket_id, availability, flushed in batch:
+            capacity, claimed, released, committed, settled = (
+                counters.get(_key(counter, ticket_id))
+                for counter in (CAPACITY, CLAIMED, RELEASED, COMMITTED, SETTLED)
+            )
+            if None in (capacity, claimed, released, committed):
+                _warm(backend, ticket_id, availability, flushed)
+                continue
+            expected = availability + flushed
+            if capacity != expected:
+                backend.incr(_key(CAPACITY, ticket_id), expected - capacity)
+                corrected += 1
+            if not release_abandoned:
+                continue
+            abandoned = claimed - released - committed
+            if settled is None:
+                backend.add(_key(SETTLED, ticket_id), claimed)
+            elif settled != claimed:
+                backend.incr(_key(SETTLED, ticket_id), claimed - settled)
+            elif abandoned > 0:
+                backend.incr(_key(RELEASED, ticket_id), abandoned)
+                corrected += 1
+    return corrected
+
+
+def _ticket_batches(ticket_ids=None):
+    """
+    Yield (id, availability, front_flushed) rows of unsharded tickets in batches
+    ordered by id.
+    """
+    batch_size = get_config()["BATCH_SIZE"]
+    queryset = Ticket.objects.filter(shard_count=1).order_by("id")
+    if ticket_ids is not None:
+        queryset = queryset.filter(id__in=list(ticket_ids))
+    last_id = 0
+    while True:
+        batch = list(
+            queryset.filter(id__gt=last_id).values_list(
+                "id", "availability", "front_flushed"
+            )[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
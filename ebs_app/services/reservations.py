@@ -0,0 +1,444 @@
+"""
+Module: ebs_app.services.reservations
+
+This module contains the seat reservation engine used by the booking views.
+
+Seats are claimed with a single guarded decrement per ticket:
+
+    UPDATE ticket SET availability = availability - <count>
+    WHERE id = <ticket_id> AND availability >= <count>
+
+The database evaluates the guard and the decrement atomically and only the
+availability column is written. When the guard does not match, the ticket is
+re-read once to raise the same API exception the booking endpoint has always raised.
+
+All the tickets of a booking are locked with one query ordered by primary key before
+any of them is decremented, so two bookings for overlapping tickets always take
+their row locks in the same order and cannot deadlock.
+
+Sharded tickets (shard_count > 1) keep their seats in TicketShard rows. They are not
+locked up front, a booking claims its seats from a randomly chosen shard which still
+has stock and falls back to the other shards, and finally to the availability column,
+when that one runs out.
+
+Every claim moves the seats from the availability to the held counter of the row it
+decrements, the ticket or the shard. Confirmed bookings move their seats from held to
+sold, see confirm_seats, and released bookings give them back, see release_bookings.
+
+Changed tickets are pushed to the WebSocket clients of their event once the
+transaction commits, see ebs_app.services.availability_push, and the availability
+rollups of their events are refreshed, see ebs_app.services.event_availability.
+
+When the inventory front is enabled (see ebs_app.services.inventory_front), seats of
+unsharded tickets claimed inside a booking_transaction are claimed from in-memory
+counters, and the database is only written later by the flush task. If the front is
+unavailable the seats are claimed in the database as described above.
+
+Contents:
+- booking_transaction: transaction.atomic releasing inventory front claims on failure.
+- merge_lines: Merges the requested lines of a booking by ticket.
+- lock_tickets: Locks all the tickets of a booking in a single query.
+- reserve_seats: Claims seats for every line of a booking.
+- claim_from_front: Claims seats from the inventory front inside a booking_transaction.
+- claim_seats: Claims seats for a single ticket.
+- confirm_seats: Moves the seats of confirmed bookings from held to sold.
+- release_bookings: Gives back the seats of cancelled bookings.
+- release_seats: Gives seats back with a single set based update.
+- configure_shards: Splits the availability of a ticket across shards.
+
+Note: Callers must run the reservation inside transaction.atomic, or booking_transaction
+to use the inventory front, so a failing line rolls back the seats already claimed for
+the other lines of the same booking.
+"""
+
+import random
+import threading
+from contextlib import contextmanager
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Now
+from ebs_app.models.bookings import SubBooking
+from ebs_app.models.tickets import Ticket, TicketShard
+from ebs_app.services import availability_push, event_availability, inventory_front
+from ebs_app.exceptions import (
+    TicketNotAvailableAPIException,
+    BookedMoreSeatAPIException,
+    TicketNotFoundAPIException,
+)
+
+
+SHARD_CLAIM_ATTEMPTS = 3
+
+_local = threading.local()
+
+
+@contextmanager
+def booking_transaction():
+    """
+    Run a block in transaction.atomic and keep the inventory front in step with it.
+
+    Seats claimed from the inventory front inside the block are recorded as pending
+    database decrements once the transaction commits, and given back to the counters
+    if the block raises. Nested blocks join the outermost one.
+    """
+    if getattr(_local, "front_claims", None) is not None:
+        with transaction.atomic():
+            yield
+        return
+
+    claims = _local.front_claims = []
+    try:
+        with transaction.atomic():
+            yield
+            if claims:
+                transaction.on_commit(
+                    lambda: [inventory_front.record_pending(lines) for lines in claims]
+                )
+    except BaseException:
+        for lines in claims:
+            inventory_front.release(lines)
+        raise
+    finally:
+        _local.front_claims = None
+
+
+def merge_lines(lines):
+    """
+    Merge the lines of a booking requesting the same ticket.
+
+    Args:
+        lines (iterable): Pairs of (ticket_id, count).
+
+    Returns:
+        dict: The total count requested per ticket id, ordered by ticket id.
+    """
+    merged = {}
+    for ticket_id, count in lines:
+        merged[ticket_id] = merged.get(ticket_id, 0) + count
+    return dict(sorted(merged.items()))
+
+
+def lock_tickets(ticket_ids):
+    """
+    Lock all the given tickets with a single query.
+
+    Rows are locked in primary key order. The in-memory availability of the returned
+    tickets must not be used for decrements, claim_seats re-checks it in the database.
+    Sharded tickets are fetched without a lock, their seats live in the shard rows.
+
+    Args:
+        ticket_ids (iterable): The IDs of the tickets to be locked.
+
+    Returns:
+        dict: The locked tickets keyed by ID.
+
+    Raises:
+        TicketNotFoundAPIException: If one of the tickets does not exist.
+    """
+    ticket_ids = set(ticket_ids)
+    tickets = {
+        ticket.id: ticket
+        for ticket in Ticket.objects.select_for_update()
+        .filter(id__in=ticket_ids, shard_count=1)
+        .order_by("pk")
+    }
+    if len(tickets) != len(ticket_ids):
+        tickets.update(
+            Ticket.objects.filter(id__in=ticket_ids - set(tickets)).in_bulk()
+        )
+    if len(tickets) != len(ticket_ids):
+        raise TicketNotFoundAPIException()
+    return tickets
+
+
+def reserve_seats(lines):
+    """
+    Claim seats for all the lines of a booking.
+
+    Lines for the same ticket are merged first, so a ticket is decremented once for
+    the whole booking. Tickets are locked and claimed in ticket id order.
+
+    Args:
+        lines (iterable): Pairs of (ticket_id, count) to be claimed.
+
+    Returns:
+        tuple: The merged lines as a dict of ticket_id to count,
+            and the locked tickets keyed by ID.
+
+    Raises:
+        TicketNotFoundAPIException: If a ticket does not exist.
+        TicketNotAvailableAPIException: If a ticket has no seats left.
+        BookedMoreSeatAPIException: If a line asks for more seats than are left.
+    """
+    merged = merge_lines(lines)
+    tickets, front_lines = _claim_from_front(merged)
+    database_lines = {
+        ticket_id: count
+        for ticket_id, count in merged.items()
+        if ticket_id not in front_lines
+    }
+    if database_lines:
+        tickets.update(lock_tickets(database_lines))
+    for ticket_id, count in database_lines.items():
+        claim_seats(tickets[ticket_id], count)
+    inventory_front.sync_counters(
+        {
+            ticket_id: -count
+            for ticket_id, count in database_lines.items()
+            if not tickets[ticket_id].is_sharded
+        }
+    )
+    availability_push.tickets_changed(database_lines)
+    event_availability.tickets_changed(database_lines)
+    return merged, tickets
+
+
+def _claim_from_front(lines):
+    """
+    Claim the lines of unsharded tickets from the inventory front.
+
+    Returns:
+        tuple: The tickets fetched, without locks, keyed by ID
+            and the lines claimed from the front.
+    """
+    claims = getattr(_local, "front_claims", None)
+    if claims is None or not inventory_front.is_enabled():
+        return {}, {}
+
+    tickets = Ticket.objects.in_bulk(list(lines))
+    if len(tickets) != len(lines):
+        raise TicketNotFoundAPIException()
+    front_lines = {
+        ticket_id: count
+        for ticket_id, count in lines.items()
+        if not tickets[ticket_id].is_sharded
+    }
+    if not front_lines or not claim_from_front(front_lines):
+        return tickets, {}
+    return tickets, front_lines
+
+
+def claim_from_front(lines):
+    """
+    Claim seats of unsharded tickets from the inventory front, as part of the
+    current booking_transaction.
+
+    Args:
+        lines (dict): The count to be claimed per ticket id.
+
+    Returns:
+        bool: True if the seats were claimed, False if the front is not in use
+            or unavailable and the seats have to be claimed in the database.
+
+    Raises:
+        TicketNotAvailableAPIException: If a ticket has no seats left.
+        BookedMoreSeatAPIException: If a line asks for more seats than are left.
+    """
+    claims = getattr(_local, "front_claims", None)
+    if claims is None or not inventory_front.is_enabled():
+        return False
+    try:
+        inventory_front.claim(lines)
+    except inventory_front.InventoryFrontUnavailable:
+        return False
+    claims.append(lines)
+    return True
+
+
+def claim_seats(ticket, count):
+    """
+    Claim seats for a single ticket with a guarded decrement.
+
+    Args:
+        ticket (Ticket): The ticket to be claimed.
+        count (int): The number of seats to be claimed.
+
+    Raises:
+        TicketNotAvailableAPIException: If the ticket has no seats left.
+        BookedMoreSeatAPIException: If the count exceeds the seats left.
+    """
+    remaining = count
+    if ticket.is_sharded:
+        # A shard drained by a concurrent booking is retried with fresh counts.
+        for _attempt in range(SHARD_CLAIM_ATTEMPTS):
+            remaining = _claim_from_shards(ticket.id, remaining)
+            if not remaining:
+                break
+
+    if remaining and not _claim_from_column(ticket.id, remaining):
+        _raise_claim_error(ticket, claimed=count - remaining)
+
+
+def _claim_from_column(ticket_id, count):
+    return Ticket.objects.filter(id=ticket_id, availability__gte=count).update(
+        availability=F("availability") - count,
+        held=F("held") + count,
+        updated_at=Now(),
+    )
+
+
+def _claim_from_shards(ticket_id, count):
+    """
+    Claim up to count seats from the shards of a ticket.
+
+    Shards are visited from a random starting point, every claim is a guarded
+    decrement of a single shard row.
+
+    Returns:
+        int: The number of seats which could not be claimed from any shard.
+    """
+    shards = list(
+        TicketShard.objects.filter(ticket_id=ticket_id, availability__gt=0)
+        .order_by("index")
+        .values_list("id", "availability")
+    )
+    if not shards:
+        return count
+    start = random.randrange(len(shards))
+    remaining = count
+    for shard_id, availability in shards[start:] + shards[:start]:
+        claim = min(remaining, availability)
+        claimed = TicketShard.objects.filter(
+            id=shard_id, availability__gte=claim
+        ).update(
+            availability=F("availability") - claim,
+            held=F("held") + claim,
+            updated_at=Now(),
+        )
+        if claimed:
+            remaining -= claim
+        if not remaining:
+            break
+    return remaining
+
+
+def _raise_claim_error(ticket, claimed=0):
+    """
+    Raise the API exception explaining why a guarded decrement did not match.
+
+    Seats already claimed from shards for the failing line are counted as available,
+    they are released when the transaction rolls back.
+    """
+    availability = (
+        Ticket.objects.with_availability().get(id=ticket.id).current_availability
+    )
+    if availability + claimed == 0:
+        raise TicketNotAvailableAPIException()
+    raise BookedMoreSeatAPIException()
+
+
+def confirm_seats(booking_ids):
+    """
+    Move the seats of confirmed bookings from the held to the sold counters.
+
+    Args:
+        booking_ids (iterable): The IDs of the bookings which became BOOKED.
+    """
+    lines = _sum_lines(SubBooking.objects.filter(booking_id__in=booking_ids))
+    Ticket.objects.add_counters(
+        held={ticket_id: -count for ticket_id, count in lines.items()}, sold=lines
+    )
+
+
+def release_bookings(booking_ids):
+    """
+    Give back the seats of cancelled bookings, summed per ticket with one query.
+
+    Seats of bookings which had been confirmed are taken off the sold counters,
+    seats of holds off the held counters.
+
+    Args:
+        booking_ids (iterable): The IDs of the cancelled bookings.
+    """
+    held, sold = {}, {}
+    for line in (
+        SubBooking.objects.filter(booking_id__in=booking_ids)
+        .values("ticket")
+        .annotate(
+            held=Sum("count", filter=Q(booking__confirmed_at__isnull=True)),
+            sold=Sum("count", filter=Q(booking__confirmed_at__isnull=False)),
+        )
+        .order_by("ticket")
+    ):
+        if line["held"]:
+            held[line["ticket"]] = line["held"]
+        if line["sold"]:
+            sold[line["ticket"]] = line["sold"]
+    release_seats(held, sold)
+
+
+def _sum_lines(lines):
+    return {
+        line["ticket"]: line["total"]
+        for line in lines.values("ticket")
+        .annotate(total=Sum("count"))
+        .order_by("ticket")
+    }
+
+
+def release_seats(held, sold=None):
+    """
+    Give seats back to their tickets with a single UPDATE statement.
+
+    Seats of sharded tickets go back to the availability and held columns of the
+    ticket, which are part of its current availability and held seats as well.
+
+    Args:
+        held (dict): The count of held seats to be given back per ticket id.
+        sold (dict): The count of sold seats to be given back per ticket id.
+    """
+    sold = sold or {}
+    lines = merge_lines([*held.items(), *sold.items()])
+    Ticket.objects.add_counters(
+        availability=lines,
+        held={ticket_id: -count for ticket_id, count in held.items()},
+        sold={ticket_id: -count for ticket_id, count in sold.items()},
+    )
+    inventory_front.sync_counters(lines)
+    availability_push.tickets_changed(lines)
+    event_availability.tickets_changed(lines)
+
+
+@transaction.atomic
+def configure_shards(ticket_id, shard_count, availability=None):
+    """
+    Split the availability of a ticket across shard_count shards.
+
+    The seats left, in the availability column and in the existing shards, are
+    collected and spread evenly over the new shards, and the seats held from the
+    existing shards are folded back into the held column. A shard_count of 1 moves all
+    the seats back to the availability column and removes the shards.
+
+    Args:
+        ticket_id (int): The ID of the ticket to be sharded.
+        shard_count (int): The number of shards.
+        availability (int): The new total availability, defaults to the seats left.
+
+    Returns:
+        Ticket: The updated ticket.
+    """
+    ticket = Ticket.objects.select_for_update().get(id=ticket_id)
+    shards = TicketShard.objects.select_for_update().filter(ticket=ticket)
+    totals = shards.aggregate(availability=Sum("availability"), held=Sum("held"))
+    if availability is None:
+        availability = ticket.availability + (totals["availability"] or 0)
+    ticket.held += totals["held"] or 0
+    shards.delete()
+
+    if shard_count > 1:
+        share, rest = divmod(availability, shard_count)
+        TicketShard.objects.bulk_create(
+            [
+                TicketShard(
+                    ticket=ticket, index=index, availability=share + (index < rest)
+                )
+                for index in range(shard_count)
+            ]
+        )
+        ticket.availability = 0
+    else:
+        ticket.availability = availability
+    ticket.shard_count = shard_count
+    ticket.save(update_fields=["availability", "held", "shard_count", "updated_at"])
+    event_availability.tickets_changed([ticket.id])
+    return ticket
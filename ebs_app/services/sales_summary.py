@@ -0,0 +1,202 @@
+"""
+Module: ebs_app.services.sales_summary
+
+This module keeps the sales summary of every ticket type of every event, which the
+organiser dashboard reads instead of aggregating the bookings.
+
+The booking paths update the summary incrementally, in the transaction changing the
+bookings:
+- Confirming a hold and creating bulk bookings add the seats and their price to the
+  sold seats and the revenue.
+- Cancelling a confirmed booking, alone or with its event, moves its seats from the
+  sold seats to the cancelled seats and takes its price off the revenue. Holds which
+  are released or cancelled before confirmation were never sold.
+
+The lines of the changed bookings are summed per (event, ticket type) with one
+query, and every summary row is updated with a relative increment, so concurrent
+bookings never overwrite each other. Rows are locked in (event, ticket type) order.
+
+The reconcile_sales_summary task recomputes the summaries from the bookings and
+corrects the rows drifting from them, such as the sales of bookings written by other
+means than the booking paths. Seats are priced at the price their booking line was
+booked at, a later price change of the ticket does not rewrite the revenue of past
+sales. Missing summaries are inserted ignoring conflicts and then corrected like the
+others, so a summary created meanwhile by a booking is not overwritten.
+
+Contents:
+- record_sales: Adds the seats of confirmed bookings to the summaries.
+- record_cancellations: Moves the seats of cancelled bookings to the cancelled seats.
+- reconcile: Recomputes the summaries from the bookings.
+"""
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+from ebs_app.models.bookings import SubBooking
+from ebs_app.models.choices import BookingStatus
+from ebs_app.models.events import Event
+from ebs_app.models.sales import SalesSummary
+
+DEFAULT_BATCH_SIZE = 500
+COUNTERS = ("sold", "revenue", "cancelled")
+
+
+def record_sales(booking_ids):
+    """
+    Add the seats of bookings which became BOOKED to the sales summaries.
+
+    Args:
+        booking_ids (iterable): The IDs of the confirmed bookings.
+    """
+    for line in _sum_lines(SubBooking.objects.filter(booking_id__in=booking_ids)):
+        _increment(line, sold=line["seats"], revenue=line["revenue"])
+
+
+def record_cancellations(booking_ids):
+    """
+    Move the seats of cancelled bookings from the sold seats to the cancelled seats.
+
+    Only the bookings which had been confirmed are counted, released holds were
+    never sold.
+
+    Args:
+        booking_ids (iterable): The IDs of the cancelled bookings.
+    """
+    lines = SubBooking.objects.filter(
+        booking_id__in=booking_ids, booking__confirmed_at__isnull=False
+    )
+    for line in _sum_lines(lines):
+        _increment(
+            line, sold=-line["seats"], revenue=-line["revenue"], cancelled=line["seats"]
+        )
+
+
+def reconcile(event_ids=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Recompute the sales summaries from the bookings and correct the drifting rows.
+
+    Events are reconciled in batches, every batch in its own transaction with the
+    summary rows of its events locked, so the bookings committed meanwhile are
+    either counted by the recomputation or applied on top of it.
+
+    Args:
+        event_ids (iterable): The IDs of the events to be reconciled, defaults to all.
+        batch_size (int): The number of events reconciled per transaction.
+
+    Returns:
+        int: The number of summaries created or corrected.
+    """
+    events = Event.objects.order_by("id")
+    if event_ids is not None:
+        events = events.filter(id__in=list(event_ids))
+    corrected = 0
+    last_id = 0
+    while True:
+        batch = list(
+            events.filter(id__gt=last_id).values_list("id", flat=True)[:batch_size]
+        )
+        if not batch:
+            return corrected
+        with transaction.atomic():
+            corrected += _reconcile_events(batch)
+        last_id = batch[-1]
+
+
+def _reconcile_events(event_ids):
+    summaries = _lock_summaries(event_ids)
+    expected = _expected_sales(event_ids)
+    missing = [
+        SalesSummary(event_id=event_id, ticket_type=ticket_type)
+        for (event_id, ticket_type), counters in expected.items()
+        if (event_id, ticket_type) not in summaries and any(counters.values())
+    ]
+    if missing:
+        # A booking may create a missing summary meanwhile, the summaries are
+        # upserted, then the sales are summed again once they are all locked, so
+        # the sales of such a booking are counted rather than overwritten.
+        SalesSummary.objects.bulk_create(missing, ignore_conflicts=True)
+        summaries = _lock_summaries(event_ids)
+        expected = _expected_sales(event_ids)
+    # Summaries without any booking left are zeroed rather than deleted.
+    for key in summaries.keys() - expected.keys():
+        expected[key] = dict.fromkeys(COUNTERS, 0)
+
+    changed = []
+    for key, counters in expected.items():
+        summary = summaries.get(key)
+        if summary is None:
+            # Created by a booking after the summaries were locked, which counted
+            # its own sales.
+            continue
+        if any(getattr(summary, name) != value for name, value in counters.items()):
+            for name, value in counters.items():
+                setattr(summary, name, value)
+            summary.updated_at = timezone.now()
+            changed.append(summary)
+    SalesSummary.objects.bulk_update(changed, [*COUNTERS, "updated_at"])
+    return len(changed)
+
+
+def _lock_summaries(event_ids):
+    """
+    Lock the summaries of events, in the locking order of the booking paths.
+    """
+    return {
+        (summary.event_id, summary.ticket_type): summary
+        for summary in SalesSummary.objects.select_for_update()
+        .filter(event_id__in=event_ids)
+        .order_by("event", "ticket_type")
+    }
+
+
+def _expected_sales(event_ids):
+    """
+    Sum the sales of the bookings of events per (event, ticket type).
+    """
+    booked = Q(booking__status=BookingStatus.BOOKED)
+    cancelled = Q(
+        booking__status=BookingStatus.CANCELLED, booking__confirmed_at__isnull=False
+    )
+    return {
+        (line["event"], line["ticket_type"]): {
+            "sold": line["sold"] or 0,
+            "revenue": line["revenue"] or 0,
+            "cancelled": line["cancelled"] or 0,
+        }
+        for line in SubBooking.objects.filter(ticket__event_id__in=event_ids)
+        .values(event=F("ticket__event_id"), ticket_type=F("ticket__ticket_type"))
+        .annotate(
+            sold=Sum("count", filter=booked),
+            revenue=Sum(F("count") * F("price"), filter=booked),
+            cancelled=Sum("count", filter=cancelled),
+        )
+        .order_by("event", "ticket_type")
+    }
+
+
+def _sum_lines(lines):
+    """
+    Sum booking lines per (event, ticket type), in the locking order of the summaries.
+    """
+    return list(
+        lines.values(event=F("ticket__event_id"), ticket_type=F("ticket__ticket_type"))
+        .annotate(seats=Sum("count"), revenue=Sum(F("count") * F("price")))
+        .order_by("event", "ticket_type")
+    )
+
+
+def _increment(line, **deltas):
+    """
+    Apply relative changes to the summary of a line, creating the summary first.
+    """
+    summaries = SalesSummary.objects.filter(
+        event_id=line["event"], ticket_type=line["ticket_type"]
+    )
+    changes = {name: F(name) + delta for name, delta in deltas.items()}
+    if not summaries.update(**changes, updated_at=timezone.now()):
+        # Lost races to create the row end up updating the row of the winner.
+        SalesSummary.objects.bulk_create(
+            [SalesSummary(event_id=line["event"], ticket_type=line["ticket_type"])],
+            ignore_conflicts=True,
+        )
+        summaries.update(**changes, updated_at=timezone.now())
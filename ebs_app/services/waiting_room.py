@@ -0,0 +1,232 @@
+"""
+Module: ebs_app.services.waiting_room
+
+This module contains the virtual waiting room of events going on sale.
+
+Events with an admission_rate only accept bookings from customers admitted by the
+waiting room. A customer joining the waiting room is given the next free admission
+slot of the event, slots are 60 / admission_rate seconds apart, and a signed token
+holding the slot. The client polls the waiting room with its token until the slot
+is reached, and then sends the token with its booking in the X-Waiting-Room-Token
+header. Booking creation accepts the token for ADMISSION_WINDOW seconds after its
+slot, so at most admission_rate * ADMISSION_WINDOW / 60 customers of an event can be
+booking at the same time.
+
+Only the next free slot per event is kept in the waiting room backend, tokens are
+verified from their signature alone. The bulk booking endpoint of box-office and
+partner channels is not gated by the waiting room.
+
+Settings:
+    EBS_WAITING_ROOM = {
+        "BACKEND": "ebs_app.services.waiting_room.LocalWaitingRoomBackend",
+        "CACHE_ALIAS": "default",          # Used by CacheWaitingRoomBackend
+        "ADMISSION_WINDOW": 600,           # Seconds an admission is accepted for
+    }
+
+Contents:
+- LocalWaitingRoomBackend: In-process slots, for tests and single node deployments.
+- CacheWaitingRoomBackend: Slots in a Django cache backend such as Redis.
+- join: Gives a customer the next admission slot of an event.
+- get_status: Tells a customer whether their token is admitted.
+- check_admission: Verifies the tokens sent with a booking.
+"""
+
+import threading
+import time
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from ebs_app.models.tickets import Ticket
+from ebs_app.exceptions import (
+    InvalidWaitingRoomTokenAPIException,
+    WaitingRoomTokenRequiredAPIException,
+    NotAdmittedYetAPIException,
+    AdmissionExpiredAPIException,
+)
+
+DEFAULT_CONFIG = {
+    "BACKEND": "ebs_app.services.waiting_room.LocalWaitingRoomBackend",
+    "CACHE_ALIAS": "default",
+    "ADMISSION_WINDOW": 600,
+}
+
+TOKEN_HEADER = "X-Waiting-Room-Token"
+TOKEN_SALT = "ebs_app.waiting_room"
+
+
+class LocalWaitingRoomBackend:
+    """
+    Waiting room backend keeping the next free slot per event in the current process.
+
+    Meant for tests and single process deployments.
+    """
+
+    _slots = {}
+    _lock = threading.Lock()
+
+    def __init__(self, config):
+        self.config = config
+
+    def reserve_slot(self, event_id, now, interval):
+        with self._lock:
+            slot = max(now, self._slots.get(event_id, now))
+            self._slots[event_id] = slot + interval
+            return slot
+
+    def clear(self):
+        with self._lock:
+            self._slots.clear()
+
+
+class CacheWaitingRoomBackend:
+    """
+    Waiting room backend keeping the next free slot per event in a Django cache.
+
+    Slots are reserved under a short lived lock taken with cache.add, the cache must
+    be shared by all the web workers, such as Redis or Memcached.
+    """
+
+    prefix = "ebs:waiting_room:"
+    lock_timeout = 5
+    lock_attempts = 1000
+
+    def __init__(self, config):
+        self.cache = caches[config["CACHE_ALIAS"]]
+
+    def reserve_slot(self, event_id, now, interval):
+        key = f"{self.prefix}slot:{event_id}"
+        lock_key = f"{self.prefix}lock:{event_id}"
+        for _attempt in range(self.lock_attempts):
+            if self.cache.add(lock_key, 1, timeout=self.lock_timeout):
+                break
+            time.sleep(0.005)
+        else:
+            raise TimeoutError(f"Waiting room of event {event_id} stayed locked")
+        try:
+            slot = max(now, self.cache.get(key, now))
+            self.cache.set(key, slot + interval, timeout=None)
+            return slot
+        finally:
+            self.cache.delete(lock_key)
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, "EBS_WAITING_ROOM", {})}
+
+
+def get_backend():
+    config = get_config()
+    return import_string(config["BACKEND"])(config)
+
+
+def join(event, user, now=None):
+    """
+    Give a customer the next admission slot of an event.
+
+    Customers joining an event without an admission_rate are admitted right away.
+
+    Args:
+        event (Event): The event going on sale.
+        user (User): The customer joining the waiting room.
+        now (float): The current UNIX time, defaults to time.time().
+
+    Returns:
+        dict: The token and the status of the customer in the waiting room.
+    """
+    now = time.time() if now is None else now
+    if event.admission_rate:
+        admit_at = get_backend().reserve_slot(event.id, now, 60 / event.admission_rate)
+    else:
+        admit_at = now
+    token = signing.dumps(
+        {"event": event.id, "user": user.id, "admit_at": admit_at}, salt=TOKEN_SALT
+    )
+    return {"token": token, **_status(event.admission_rate, admit_at, now)}
+
+
+def get_status(event, token, user, now=None):
+    """
+    Tell a customer whether their token is admitted.
+
+    Args:
+        event (Event): The event the token was given for.
+        token (str): The waiting room token.
+        user (User): The customer owning the token.
+        now (float): The current UNIX time, defaults to time.time().
+
+    Returns:
+        dict: Whether the token is admitted, the seconds left to wait, the customers
+            ahead in the queue and when the admission expires.
+
+    Raises:
+        InvalidWaitingRoomTokenAPIException: If the token is not valid for the event.
+    """
+    now = time.time() if now is None else now
+    payload = _read_token(token, user)
+    if payload["event"] != event.id:
+        raise InvalidWaitingRoomTokenAPIException()
+    return _status(event.admission_rate, payload["admit_at"], now)
+
+
+def check_admission(ticket_ids, header, user, now=None):
+    """
+    Verify that a booking of the given tickets was admitted by the waiting rooms.
+
+    Every event with an admission_rate among the tickets needs an admitted token.
+
+    Args:
+        ticket_ids (iterable): The IDs of the booked tickets.
+        header (str): The X-Waiting-Room-Token header, tokens separated by commas.
+        user (User): The customer booking.
+        now (float): The current UNIX time, defaults to time.time().
+
+    Raises:
+        InvalidWaitingRoomTokenAPIException: If a token is not valid.
+        WaitingRoomTokenRequiredAPIException: If an event has no token.
+        NotAdmittedYetAPIException: If a token is not admitted yet.
+        AdmissionExpiredAPIException: If a token is not accepted anymore.
+    """
+    gated = set(
+        Ticket.objects.filter(
+            id__in=list(ticket_ids), event__admission_rate__isnull=False
+        ).values_list("event_id", flat=True)
+    )
+    if not gated:
+        return
+
+    now = time.time() if now is None else now
+    admissions = {}
+    for token in (header or "").split(","):
+        if token.strip():
+            payload = _read_token(token.strip(), user)
+            admissions[payload["event"]] = payload["admit_at"]
+
+    window = get_config()["ADMISSION_WINDOW"]
+    for event_id in sorted(gated):
+        if event_id not in admissions:
+            raise WaitingRoomTokenRequiredAPIException()
+        if now < admissions[event_id]:
+            raise NotAdmittedYetAPIException()
+        if now > admissions[event_id] + window:
+            raise AdmissionExpiredAPIException()
+
+
+def _read_token(token, user):
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        raise InvalidWaitingRoomTokenAPIException()
+    if payload["user"] != user.id:
+        raise InvalidWaitingRoomTokenAPIException()
+    return payload
+
+
+def _status(admission_rate, admit_at, now):
+    wait_seconds = max(0.0, admit_at - now)
+    return {
+        "admitted": wait_seconds == 0,
+        "wait_seconds": round(wait_seconds, 1),
+        "ahead": int(wait_seconds * admission_rate / 60) if admission_rate else 0,
+        "expires_at": round(admit_at + get_config()["ADMISSION_WINDOW"], 1),
+    }
@@ -0,0 +1,211 @@
+"""
+Module: ebs_app.sparse_fields
+
+This module lets clients of the read endpoints pick the fields of the responses.
+
+    GET /events/?fields=id,event_name,event_date_time
+    GET /bookings/?fields=id,status,customer&expand=customer
+
+?fields= lists the fields of every returned object, ?expand= the nested objects to
+embed instead of their ID. Only the columns behind the requested fields are selected
+with only(), nested objects are joined with select_related only when expanded, and
+related rows are prefetched only when their field is requested.
+
+Requests without ?fields= and ?expand= get the full objects, with all their nested
+objects embedded, as before. Once either parameter is given, the objects hold all
+their fields unless ?fields= is given, and nested objects are given by ID unless
+they are expanded. Optional fields, such as the tickets of an event, are only
+embedded when expanded.
+
+Serializers declare what is behind their fields in their Meta:
+    expandable_fields = {"customer": "customer__user"}  # Nested objects, with the
+                                                        # select_related lookup
+                                                        # embedding them
+    prefetch_fields = {"sub_bookings": "sub_bookings"}  # Related rows, with their
+                                                        # prefetch_related lookup,
+                                                        # or a function returning it
+    optional_fields = ("tickets",)                      # Fields left out unless
+                                                        # expanded
+    field_columns = {"availability": ["availability", "shard_count"]}
+                                                        # Computed fields, with the
+                                                        # columns they read
+
+Contents:
+- FieldSelection: The fields and nested objects requested.
+- SparseFieldsSerializerMixin: Serializers dropping the fields not requested.
+- SparseFieldsViewMixin: Viewsets reading the selection and trimming their queryset.
+"""
+
+from rest_framework.serializers import PrimaryKeyRelatedField
+from ebs_app.exceptions import InvalidFieldSelectionAPIException
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+class FieldSelection:
+    """
+    The fields and nested objects requested from a serializer.
+
+    Attributes:
+    - fields: The names of the requested fields, or None for all of them.
+    - expand: The names of the nested objects to embed.
+    """
+
+    def __init__(self, fields=None, expand=()):
+        self.fields = fields
+        self.expand = set(expand)
+
+    @classmethod
+    def from_request(cls, request, serializer_class):
+        """
+        Read the selection of the query string.
+
+        Args:
+            request (Request): The incoming request.
+            serializer_class: The serializer of the response.
+
+        Returns:
+            FieldSelection: Or None when neither ?fields= nor ?expand= is given.
+
+        Raises:
+            InvalidFieldSelectionAPIException: If an unknown field is requested.
+        """
+        params = request.query_params
+        if FIELDS_PARAM not in params and EXPAND_PARAM not in params:
+            return None
+
+        optional = getattr(serializer_class.Meta, "optional_fields", ())
+        available = [*serializer_class().fields, *optional]
+        expandable = [
+            *getattr(serializer_class.Meta, "expandable_fields", {}),
+            *optional,
+        ]
+        fields = _split(params.get(FIELDS_PARAM))
+        expand = _split(params.get(EXPAND_PARAM)) or []
+        if fields is not None and (not fields or set(fields) - set(available)):
+            raise InvalidFieldSelectionAPIException()
+        if set(expand) - set(expandable):
+            raise InvalidFieldSelectionAPIException()
+        return cls(fields, expand)
+
+    def get_fields(self, serializer_class):
+        if self.fields is None:
+            optional = getattr(serializer_class.Meta, "optional_fields", ())
+            return [
+                *serializer_class().fields,
+                *(name for name in optional if name in self.expand),
+            ]
+        return self.fields
+
+    def apply(self, queryset, serializer_class, ordering=()):
+        """
+        Trim a queryset to the columns and the relations of the selection.
+
+        The joins and prefetches of the queryset are replaced by the ones of the
+        requested fields.
+
+        Args:
+            queryset (QuerySet): The rows of the response.
+            serializer_class: The serializer of the response.
+            ordering (iterable): Fields read from the rows besides the serializer,
+                such as the position of the pagination cursor.
+
+        Returns:
+            QuerySet: The trimmed queryset.
+        """
+        meta = serializer_class.Meta
+        expandable = getattr(meta, "expandable_fields", {})
+        prefetched = getattr(meta, "prefetch_fields", {})
+        field_columns = getattr(meta, "field_columns", {})
+        optional = getattr(meta, "optional_fields", ())
+        model = queryset.model
+
+        columns = {model._meta.pk.name}
+        columns.update(field.lstrip("-") for field in ordering)
+        select_related, prefetch_related = [], []
+        for name in self.get_fields(serializer_class):
+            if name in optional and name not in self.expand:
+                continue
+            if name in prefetched:
+                lookup = prefetched[name]
+                prefetch_related.append(lookup() if callable(lookup) else lookup)
+                continue
+            if name in expandable and name in self.expand:
+                select_related.append(expandable[name])
+            columns.update(field_columns.get(name, [name]))
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        queryset = queryset.only(*columns)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Serializer mixin dropping the fields which are not selected.
+
+    The selection is read from the "field_selection" of the serializer context,
+    nested objects which are not expanded are given by their ID, optional fields
+    which are not expanded are left out.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selection = self.context.get("field_selection")
+        for name in getattr(self.Meta, "optional_fields", ()):
+            if selection is None or name not in selection.expand:
+                self.fields.pop(name, None)
+        if selection is None:
+            return
+
+        requested = set(selection.get_fields(type(self)))
+        for name in list(self.fields):
+            if name not in requested:
+                self.fields.pop(name)
+        for name in getattr(self.Meta, "expandable_fields", {}):
+            if name in self.fields and name not in selection.expand:
+                self.fields[name] = PrimaryKeyRelatedField(read_only=True)
+
+
+class SparseFieldsViewMixin:
+    """
+    Viewset mixin applying the ?fields= and ?expand= selection to reads.
+
+    The selection is passed to the serializer in its context, and the queryset is
+    trimmed to it in filter_queryset, which lists and get_object both go through.
+    """
+
+    def get_field_selection(self):
+        if not hasattr(self, "_field_selection"):
+            request = getattr(self, "request", None)
+            self._field_selection = None
+            if request is not None and request.method == "GET":
+                self._field_selection = FieldSelection.from_request(
+                    request, self.get_serializer_class()
+                )
+        return self._field_selection
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["field_selection"] = self.get_field_selection()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        selection = self.get_field_selection()
+        if selection is None:
+            return queryset
+        ordering = getattr(self.pagination_class, "ordering", ())
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        return selection.apply(queryset, self.get_serializer_class(), ordering)
+
+
+def _split(value):
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
@@ -23,6 +23,26 @@ def send_booking_confirmation_email(ticket_id, user_email):
     print(f"Sending email confirmation for ticket {ticket_id} to {user_email}")
 
 
+@shared_task
+def send_bulk_booking_confirmation_emails(confirmations):
+    """
+    Celery task for sending the confirmation emails of a bulk booking request.
+
+    All the bookings created by one bulk request are confirmed by a single task,
+    instead of enqueueing one send_booking_confirmation_email task per booking.
+
+    Args:
+        confirmations (list): Pairs of [ticket_id, user_email], one per booking.
+
+    Note: This task is asynchronous and executed by a Celery worker.
+
+    Example:
+    send_bulk_booking_confirmation_emails.delay([[123, "user@example.com"]])
+    """
+    for ticket_id, user_email in confirmations:
+        send_booking_confirmation_email(ticket_id, user_email)
+
+
 @shared_task
 def send_event_update_email(event, customer_email_list):
     """
@@ -50,3 +70,119 @@ def send_event_update_email(event, customer_email_list):
         print(
             f"The Event change has been informed to {email} as: {event['event_name'], event['event_venue'], event['event_time']}"
         )
+
+
+@shared_task
+def send_event_cancelled_email(event, customer_email_list):
+    """
+    Celery task for notifying customers that an event was called off.
+
+    One task is enqueued per chunk of cancelled bookings, with the emails
+    of all the customers of the chunk.
+
+    Args:
+        event (dict): The cancelled event details.
+        customer_email_list (list): List of customer email addresses.
+
+    Note: This task is asynchronous and executed by a Celery worker.
+    """
+    for email in customer_email_list:
+        print(
+            f"The Event cancellation has been informed to {email} as: {event['event_name'], event['event_venue'], event['event_time']}"
+        )
+
+
+@shared_task
+def cancel_event_bookings(job_id):
+    """
+    Celery task cancelling all the bookings of an event called off.
+
+    Args:
+        job_id (int): The ID of the EventCancellation job.
+
+    Returns:
+        int: The number of cancelled bookings.
+    """
+    from ebs_app.services import cancellations
+
+    return cancellations.run_event_cancellation(job_id).cancelled
+
+
+@shared_task
+def flush_inventory_front():
+    """
+    Celery task writing the seats claimed in the inventory front to the Ticket rows.
+
+    Scheduled periodically by Celery beat (see CELERY_BEAT_SCHEDULE), the seats of
+    the committed claims of every ticket are written in batches.
+
+    Returns:
+        int: The number of seats written to the database.
+    """
+    from ebs_app.services import inventory_front
+
+    if not inventory_front.is_enabled():
+        return 0
+    return inventory_front.flush()
+
+
+@shared_task
+def reconcile_inventory_front():
+    """
+    Celery task repairing inventory front counters drifting from the database,
+    and releasing the seats of claims abandoned since its previous run.
+
+    Returns:
+        int: The number of counters corrected.
+    """
+    from ebs_app.services import inventory_front
+
+    if not inventory_front.is_enabled():
+        return 0
+    return inventory_front.reconcile()
+
+
+@shared_task
+def release_expired_holds():
+    """
+    Celery task releasing the seats of bookings whose hold has expired.
+
+    Scheduled periodically by Celery beat (see CELERY_BEAT_SCHEDULE).
+
+    Returns:
+        int: The number of released holds.
+    """
+    from ebs_app.services import holds
+
+    return holds.release_expired_holds()
+
+
+@shared_task
+def reconcile_sales_summary():
+    """
+    Celery task recomputing the sales summaries of the organiser dashboard from the bookings.
+
+    Scheduled periodically by Celery beat (see CELERY_BEAT_SCHEDULE).
+
+    Returns:
+        int: The number of summaries created or corrected.
+    """
+    from ebs_app.services import sales_summary
+
+    return sales_summary.reconcile()
+
+
+@shared_task
+def refresh_event_availability():
+    """
+    Celery task recomputing the availability rollups of all the events from their tickets.
+
+    Scheduled periodically by Celery beat (see CELERY_BEAT_SCHEDULE), it repairs the
+    rollups whose refresh was lost after a commit.
+
+    Returns:
+        int: The number of refreshed rollups.
+    """
+    from ebs_app.services import event_availability
+
+    return event_availability.rebuild()
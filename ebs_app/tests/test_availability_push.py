@@ -0,0 +1,170 @@
+from unittest.mock import patch
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.consumers import EventAvailabilityConsumer
+from ebs_app.models.events import Event
+from ebs_app.models.tickets import Ticket
+from ebs_app.routing import websocket_urlpatterns
+from ebs_app.services import availability_push
+from ebs_app.services.reservations import configure_shards
+from ebs_app.tests.factories import CustomerFactory
+
+
+@override_settings(EBS_AVAILABILITY_PUSH={"ENABLED": True, "WINDOW": 0.5})
+@patch("ebs_app.services.availability_push.Timer")
+class AvailabilityPushTestCase(APITestCase):
+    def setUp(self):
+        availability_push.clear()
+        self.client = APIClient()
+        self.customer = CustomerFactory()
+        self.client.force_authenticate(user=self.customer.user)
+        self.event = Event.objects.create(
+            event_name="Friday Party", event_date_time="2023-08-25T20:00Z", venue="CP"
+        )
+        self.other_event = Event.objects.create(
+            event_name="Saturday Party", event_date_time="2023-08-26T20:00Z", venue="CP"
+        )
+        self.ticket = Ticket.objects.create(
+            event=self.event, total_allotment=100, availability=100, price=10
+        )
+        self.sharded = configure_shards(
+            Ticket.objects.create(
+                event=self.event, total_allotment=100, availability=100, price=10
+            ).id,
+            4,
+        )
+        self.other_ticket = Ticket.objects.create(
+            event=self.other_event, total_allotment=100, availability=100, price=10
+        )
+
+    def tearDown(self):
+        availability_push.clear()
+
+    def connect(self, event_id, user):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f"/ws/events/{event_id}/availability/"
+        )
+        communicator.scope["user"] = user
+        return communicator
+
+    def book(self, ticket, count=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("bookings-list"),
+                {"sub_bookings": [{"ticket": ticket.id, "count": count}]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_changes_are_pushed_to_the_event(self, mock_timer):
+        async def run():
+            communicator = self.connect(self.event.id, self.customer.user)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            snapshot = await communicator.receive_json_from()
+            self.assertEqual(snapshot["type"], "snapshot")
+            self.assertEqual(
+                snapshot["tickets"],
+                [
+                    {"id": self.ticket.id, "availability": 100},
+                    {"id": self.sharded.id, "availability": 100},
+                ],
+            )
+
+            for ticket in [self.ticket, self.ticket, self.sharded, self.other_ticket]:
+                await sync_to_async(self.book)(ticket)
+            # The burst is collected by a single timer, flushed with one message per event.
+            self.assertEqual(mock_timer.call_count, 1)
+            self.assertEqual(await sync_to_async(availability_push.flush)(), 2)
+
+            message = await communicator.receive_json_from()
+            self.assertEqual(
+                message,
+                {
+                    "type": "availability",
+                    "event": self.event.id,
+                    "tickets": [
+                        {"id": self.ticket.id, "availability": 98},
+                        {"id": self.sharded.id, "availability": 99},
+                    ],
+                },
+            )
+            self.assertTrue(await communicator.receive_nothing())
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+    def test_changes_while_the_snapshot_is_read(self, mock_timer):
+        get_tickets = EventAvailabilityConsumer.__dict__["get_tickets"].func
+
+        @database_sync_to_async
+        def book_then_get_tickets(consumer):
+            self.book(self.ticket)
+            availability_push.flush()
+            return get_tickets(consumer)
+
+        async def run():
+            communicator = self.connect(self.event.id, self.customer.user)
+            with patch.object(
+                EventAvailabilityConsumer, "get_tickets", book_then_get_tickets
+            ):
+                connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            snapshot = await communicator.receive_json_from()
+            self.assertEqual(snapshot["tickets"][0]["availability"], 99)
+            message = await communicator.receive_json_from()
+            self.assertEqual(
+                message["tickets"], [{"id": self.ticket.id, "availability": 99}]
+            )
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+    def test_cancellations_are_pushed(self, mock_timer):
+        self.book(self.ticket, 3)
+        availability_push.flush()
+        booking_id = self.ticket.subbooking_set.get().booking_id
+
+        async def run():
+            communicator = self.connect(self.event.id, self.customer.user)
+            await communicator.connect()
+            await communicator.receive_json_from()
+
+            def cancel():
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.client.patch(
+                        reverse("cancel_booking", kwargs={"pk": booking_id})
+                    )
+                availability_push.flush()
+
+            await sync_to_async(cancel)()
+            message = await communicator.receive_json_from()
+            self.assertEqual(
+                message["tickets"], [{"id": self.ticket.id, "availability": 100}]
+            )
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+    def test_anonymous_users_and_unknown_events_are_rejected(self, mock_timer):
+        async def run():
+            for event_id, user in [
+                (self.event.id, AnonymousUser()),
+                (999, self.customer.user),
+            ]:
+                connected, _ = await self.connect(event_id, user).connect()
+                self.assertFalse(connected)
+
+        async_to_sync(run)()
+
+    def test_disabled_push_marks_nothing(self, mock_timer):
+        with override_settings(EBS_AVAILABILITY_PUSH={"ENABLED": False}):
+            self.book(self.ticket)
+        mock_timer.assert_not_called()
+        self.assertEqual(availability_push.flush(), 0)
@@ -0,0 +1,229 @@
+import csv
+import gzip
+import io
+import json
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.models.bookings import Booking, SubBooking
+from ebs_app.models.choices import BookingStatus, TicketChoices
+from ebs_app.models.events import Event
+from ebs_app.models.tickets import Ticket
+from ebs_app.services.booking_export import export_rows
+from ebs_app.tests.factories import CustomerFactory, EventOrganiserFactory
+
+
+@override_settings(EBS_BOOKING_EXPORT_CHUNK_SIZE=2)
+class BookingExportTestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory(
+            user=User.objects.create_user(username="organiser")
+        )
+        self.event = self.create_event(self.organiser)
+        self.general = Ticket.objects.create(event=self.event, price=10)
+        self.vip = Ticket.objects.create(
+            event=self.event, ticket_type=TicketChoices.VIP, price=50
+        )
+        other = Ticket.objects.create(event=self.create_event(self.organiser), price=5)
+
+        self.customers = [
+            CustomerFactory(
+                user=User.objects.create_user(
+                    username=f"fan{index}", email=f"fan{index}@example.com"
+                )
+            )
+            for index in range(3)
+        ]
+        self.bookings = []
+        for index, lines in enumerate(
+            [
+                [(self.general, 2), (self.vip, 1)],
+                [(other, 4)],
+                [(self.vip, 3), (other, 1)],
+                [(self.general, 1)],
+                [(self.general, 5)],
+            ]
+        ):
+            booking = Booking.objects.create(
+                customer=self.customers[index % 3],
+                status=BookingStatus.CANCELLED if index == 3 else BookingStatus.BOOKED,
+            )
+            for ticket, count in lines:
+                SubBooking.objects.create(
+                    booking=booking, ticket=ticket, count=count, price=ticket.price
+                )
+            self.bookings.append(booking.id)
+
+        self.client.force_authenticate(user=self.organiser.user)
+        self.url = reverse("events-bookings-export", kwargs={"pk": self.event.id})
+        self.expected = [
+            [
+                self.bookings[0],
+                "fan0@example.com",
+                "GENERAL_ADMISSION",
+                2,
+                10,
+                "BOOKED",
+            ],
+            [self.bookings[0], "fan0@example.com", "VIP", 1, 50, "BOOKED"],
+            [self.bookings[2], "fan2@example.com", "VIP", 3, 50, "BOOKED"],
+            [
+                self.bookings[3],
+                "fan0@example.com",
+                "GENERAL_ADMISSION",
+                1,
+                10,
+                "CANCELLED",
+            ],
+            [
+                self.bookings[4],
+                "fan1@example.com",
+                "GENERAL_ADMISSION",
+                5,
+                10,
+                "BOOKED",
+            ],
+        ]
+
+    def create_event(self, organiser):
+        return Event.objects.create(
+            event_name="Friday Party",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+            event_organiser=organiser,
+        )
+
+    def export(self, params=None, **headers):
+        response = self.client.get(self.url, params, **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv(self):
+        # The event and its tickets, then for every chunk of two bookings the lines
+        # of each ticket and the lines of the chunk, and the empty chunk ending the
+        # export.
+        with self.assertNumQueries(2 + 2 * 3 + 2):
+            response, content = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(
+            response["Content-Disposition"],
+            f'attachment; filename="event-{self.event.id}-bookings.csv"',
+        )
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(
+            rows,
+            [
+                [
+                    "booking",
+                    "customer_email",
+                    "ticket_type",
+                    "count",
+                    "price",
+                    "status",
+                ],
+                *[[str(value) for value in row] for row in self.expected],
+            ],
+        )
+
+    def test_ndjson(self):
+        response, content = self.export({"export_format": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([list(row.values()) for row in rows], self.expected)
+        self.assertEqual(
+            list(rows[0]),
+            ["booking", "customer_email", "ticket_type", "count", "price", "status"],
+        )
+
+    def test_bookings_of_other_events_in_between(self):
+        other = Ticket.objects.create(event=self.create_event(self.organiser), price=5)
+        SubBooking.objects.bulk_create(
+            [
+                SubBooking(
+                    booking=Booking.objects.create(customer=self.customers[0]),
+                    ticket=other,
+                    count=1,
+                )
+                for _ in range(20)
+            ]
+        )
+        self.bookings.append(
+            Booking.objects.create(
+                customer=self.customers[1], status=BookingStatus.BOOKED
+            ).id
+        )
+        SubBooking.objects.create(
+            booking_id=self.bookings[-1], ticket=self.vip, count=2, price=50
+        )
+        self.expected.append(
+            [self.bookings[-1], "fan1@example.com", "VIP", 2, 50, "BOOKED"]
+        )
+
+        # The bookings of the other events are not read, whatever their number.
+        with self.assertNumQueries(1 + 3 * 3 + 2):
+            chunks = list(export_rows(self.event.id, chunk_size=2))
+        self.assertEqual(
+            [{row[0] for row in rows} for rows in chunks],
+            [
+                {self.bookings[0], self.bookings[2]},
+                {self.bookings[3], self.bookings[4]},
+                {self.bookings[-1]},
+            ],
+        )
+        _, content = self.export({"export_format": "ndjson"})
+        self.assertEqual(
+            [list(json.loads(line).values()) for line in content.decode().splitlines()],
+            self.expected,
+        )
+
+    def test_price_changes_keep_booked_prices(self):
+        Ticket.objects.filter(id=self.vip.id).update(price=80)
+        _, content = self.export()
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(
+            rows[1:], [[str(value) for value in row] for row in self.expected]
+        )
+
+    def test_compressed_stream(self):
+        response, content = self.export(HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(gzip.decompress(content).splitlines()), 6)
+
+    def test_formula_cells_are_escaped(self):
+        User.objects.filter(id=self.customers[2].user_id).update(
+            email="=HYPERLINK(1)@example.com"
+        )
+        _, content = self.export()
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(rows[3][1], "'=HYPERLINK(1)@example.com")
+
+    def test_event_without_bookings(self):
+        self.url = reverse(
+            "events-bookings-export",
+            kwargs={"pk": self.create_event(self.organiser).id},
+        )
+        _, content = self.export()
+        self.assertEqual(
+            content.decode().strip(),
+            "booking,customer_email,ticket_type,count,price,status",
+        )
+        _, content = self.export({"export_format": "ndjson"})
+        self.assertEqual(content, b"")
+
+    def test_only_the_organiser_of_the_event(self):
+        self.assertEqual(
+            self.client.get(self.url, {"export_format": "xml"}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.client.force_authenticate(user=EventOrganiserFactory().user)
+        self.assertEqual(
+            self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.client.force_authenticate(user=self.customers[0].user)
+        self.assertEqual(
+            self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN
+        )
@@ -1,18 +1,34 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from unittest.mock import patch
 from unittest import mock
 from django.contrib.auth.models import User
-from ebs_app.models.bookings import Booking
+from ebs_app.models.bookings import Booking, SubBooking
+from ebs_app.models.choices import BookingStatus
 from ebs_app.models.tickets import Ticket
 from ebs_app.models.events import Event
+from ebs_app.services import holds as holds_service
+from ebs_app.services.holds import confirm_hold, release_expired_holds
 from ebs_app.tests.factories import CustomerFactory, UserFactory, EventOrganiserFactory
 from ebs_app.exceptions import (
     NoTicketAPIException,
     TicketNotAvailableAPIException,
     BookedMoreSeatAPIException,
     NotAValidUserAPIException,
+    TicketNotFoundAPIException,
+    HoldExpiredAPIException,
+    BookingNotPendingAPIException,
+    TooManyBookingsAPIException,
+    IdempotencyKeyReusedAPIException,
+    AlreadyCancelledAPIException,
+    InvalidBookingFilterAPIException,
 )
 
 
@@ -78,13 +94,11 @@ class BookingViewSetTestCase(APITestCase):
         
 
         self.valid_payload = {
-            "ticket": self.ticket.id,
-            "count": 2,
+            "sub_bookings": [{"ticket": self.ticket.id, "count": 2}],
         }
 
         self.limited_seat_payload = {
-            "ticket": self.limited_ticket_available.id,
-            "count": 1,
+            "sub_bookings": [{"ticket": self.limited_ticket_available.id, "count": 1}],
         }
 
         self.client.force_authenticate(user=self.customer_user)
@@ -112,10 +126,60 @@ class BookingViewSetTestCase(APITestCase):
 
         response = self.client.post(url, self.valid_payload, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        mock_send_email.assert_not_called()
+
+        confirm_url = reverse("bookings-confirm", kwargs={"pk": response.json()["id"]})
+        response = self.client.post(confirm_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
         mock_send_email.assert_called_once_with(
             self.ticket.id, self.customer_user.email
         )
 
+    def test_create_booking_holds_seats(self):
+        """
+        Test that a new booking is a pending hold until it is confirmed.
+        """
+        url = reverse("bookings-list")
+        response = self.client.post(url, self.valid_payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        booking = Booking.objects.get()
+        self.assertEqual(booking.status, BookingStatus.PENDING)
+        self.assertIsNotNone(booking.hold_expires_at)
+
+        with mock.patch(
+            "ebs_app.views.bookings_views.send_booking_confirmation_email.delay"
+        ):
+            response = self.client.post(
+                reverse("bookings-confirm", kwargs={"pk": booking.id})
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["status"], BookingStatus.BOOKED)
+        booking.refresh_from_db()
+        self.assertIsNone(booking.hold_expires_at)
+
+        response = self.client.post(reverse("bookings-confirm", kwargs={"pk": booking.id}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()["detail"], BookingNotPendingAPIException.default_detail
+        )
+
+    def test_confirm_expired_hold(self):
+        """
+        Test raising HoldExpiredAPIException when the hold has expired.
+        """
+        url = reverse("bookings-list")
+        self.client.post(url, self.valid_payload, format="json")
+        booking = Booking.objects.get()
+        Booking.objects.filter(id=booking.id).update(
+            hold_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        response = self.client.post(reverse("bookings-confirm", kwargs={"pk": booking.id}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()["detail"], HoldExpiredAPIException.default_detail
+        )
+
     def test_create_booking_no_customer(self):
         # No customer is associated with the user for this test
         client = APIClient()
@@ -136,7 +200,7 @@ class BookingViewSetTestCase(APITestCase):
         """
         url = reverse("bookings-list")
         payload = {
-            "count": 2,
+            "sub_bookings": [{"count": 2}],
         }
 
         response = self.client.post(url, payload, format="json")
@@ -151,8 +215,7 @@ class BookingViewSetTestCase(APITestCase):
         self.client.force_authenticate(user=self.customer_user)
         url = reverse("bookings-list")
         payload = {
-            "ticket": self.ticket_not_available.id,
-            "count": 2,
+            "sub_bookings": [{"ticket": self.ticket_not_available.id, "count": 2}],
         }
 
         response = self.client.post(url, payload, format="json")
@@ -169,8 +232,73 @@ class BookingViewSetTestCase(APITestCase):
         self.client.force_authenticate(user=self.customer_user)
         url = reverse("bookings-list")
         payload = {
-            "ticket": self.ticket.id,
-            "count": 200,
+            "sub_bookings": [{"ticket": self.ticket.id, "count": 200}],
+        }
+
+        response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()["detail"], BookedMoreSeatAPIException.default_detail
+        )
+        self.assertEqual(Booking.objects.count(), 0)
+
+    def test_create_booking_decrements_availability(self):
+        """
+        Test that a booking claims seats from every ticket it books.
+        """
+        url = reverse("bookings-list")
+        payload = {
+            "sub_bookings": [
+                {"ticket": self.ticket.id, "count": 2},
+                {"ticket": self.limited_ticket_available.id, "count": 1},
+            ],
+        }
+
+        with mock.patch(
+            "ebs_app.views.bookings_views.send_booking_confirmation_email.delay",
+            new=self.mock_send_booking_confirmation_email,
+        ):
+            response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.ticket.refresh_from_db()
+        self.limited_ticket_available.refresh_from_db()
+        self.assertEqual(self.ticket.availability, 123)
+        self.assertEqual(self.limited_ticket_available.availability, 0)
+        self.assertEqual(Booking.objects.get().total_price, 149 * 3)
+
+    def test_create_booking_writes_line_items_to_their_booking(self):
+        """
+        Test that the sub bookings are inserted keyed to their booking in one statement.
+        """
+        url = reverse("bookings-list")
+        payload = {
+            "sub_bookings": [
+                {"ticket": self.ticket.id, "count": 2},
+                {"ticket": self.limited_ticket_available.id, "count": 1},
+            ],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            len([q for q in queries if q["sql"].startswith("INSERT")]), 2
+        )
+        booking = Booking.objects.get(id=response.data["id"])
+        self.assertEqual(
+            sorted(booking.sub_bookings.values_list("ticket", "count")),
+            [(self.ticket.id, 2), (self.limited_ticket_available.id, 1)],
+        )
+
+    def test_create_booking_rolls_back_all_lines(self):
+        """
+        Test that a failing line releases the seats claimed by the other lines.
+        """
+        url = reverse("bookings-list")
+        payload = {
+            "sub_bookings": [
+                {"ticket": self.ticket.id, "count": 2},
+                {"ticket": self.limited_ticket_available.id, "count": 2},
+            ],
         }
 
         response = self.client.post(url, payload, format="json")
@@ -178,6 +306,50 @@ class BookingViewSetTestCase(APITestCase):
         self.assertEqual(
             response.json()["detail"], BookedMoreSeatAPIException.default_detail
         )
+        self.ticket.refresh_from_db()
+        self.limited_ticket_available.refresh_from_db()
+        self.assertEqual(self.ticket.availability, 125)
+        self.assertEqual(self.limited_ticket_available.availability, 1)
+        self.assertEqual(Booking.objects.count(), 0)
+        self.assertEqual(SubBooking.objects.count(), 0)
+
+    def test_create_booking_merges_duplicate_tickets(self):
+        """
+        Test that lines for the same ticket are merged into one sub booking.
+        """
+        url = reverse("bookings-list")
+        payload = {
+            "sub_bookings": [
+                {"ticket": self.ticket.id, "count": 2},
+                {"ticket": self.ticket.id, "count": 3},
+            ],
+        }
+
+        with mock.patch(
+            "ebs_app.views.bookings_views.send_booking_confirmation_email.delay",
+            new=self.mock_send_booking_confirmation_email,
+        ):
+            response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        sub_booking = SubBooking.objects.get()
+        self.assertEqual(sub_booking.count, 5)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.availability, 120)
+
+    def test_create_ticket_not_found(self):
+        """
+        Test raising TicketNotFoundAPIException for an unknown ticket.
+        """
+        url = reverse("bookings-list")
+        payload = {
+            "sub_bookings": [{"ticket": 999, "count": 1}],
+        }
+
+        response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(
+            response.json()["detail"], TicketNotFoundAPIException.default_detail
+        )
         self.assertEqual(Booking.objects.count(), 0)
 
     def test_get_queryset_as_customer(self):
@@ -185,9 +357,7 @@ class BookingViewSetTestCase(APITestCase):
         Test retrieving bookings as a customer.
         """
         url = reverse("bookings-list")
-        Booking.objects.create(
-            customer=self.customer, count=2, ticket=self.ticket, status="BOOKED"
-        )
+        Booking.objects.create(customer=self.customer, status="BOOKED")
 
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -199,9 +369,7 @@ class BookingViewSetTestCase(APITestCase):
         """
         self.client.force_authenticate(user=self.event_organiser.user)
         url = reverse("bookings-list")
-        Booking.objects.create(
-            customer=self.customer, count=2, ticket=self.ticket, status="BOOKED"
-        )
+        Booking.objects.create(customer=self.customer, status="BOOKED")
 
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -250,9 +418,8 @@ class CancelBookingTestCase(APITestCase):
             price=149,
         )
 
-        self.booking = Booking.objects.create(
-            customer=self.customer, ticket=self.ticket, count=2, status="BOOKED"
-        )
+        self.booking = Booking.objects.create(customer=self.customer, status="BOOKED")
+        SubBooking.objects.create(booking=self.booking, ticket=self.ticket, count=2)
 
         self.client.force_authenticate(user=self.customer_user)
 
@@ -297,3 +464,413 @@ class CancelBookingTestCase(APITestCase):
 
         response = self.client.patch(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cancel_booking_twice(self):
+        url = reverse("cancel_booking", kwargs={"pk": self.booking.id})
+        self.client.patch(url)
+
+        response = self.client.patch(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["detail"], AlreadyCancelledAPIException.default_detail
+        )
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.availability, 127)
+
+    def test_cancel_booking_query_count_is_constant(self):
+        tickets = [
+            Ticket.objects.create(
+                event=self.event, total_allotment=10, availability=5, price=10
+            )
+            for _ in range(10)
+        ]
+        booking = Booking.objects.create(customer=self.customer, status="BOOKED")
+        SubBooking.objects.bulk_create(
+            [SubBooking(booking=booking, ticket=ticket, count=3) for ticket in tickets]
+        )
+
+        # Savepoint, status flip, seats per ticket, restock, sales, release.
+        for pk in (self.booking.id, booking.id):
+            with self.assertNumQueries(6):
+                response = self.client.patch(reverse("cancel_booking", kwargs={"pk": pk}))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for ticket in tickets:
+            ticket.refresh_from_db()
+            self.assertEqual(ticket.availability, 8)
+
+
+class ReleaseExpiredHoldsTestCase(APITestCase):
+    def setUp(self):
+        self.customer = CustomerFactory()
+        self.event = Event.objects.create(
+            event_name="Test Event",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+        )
+        self.tickets = [
+            Ticket.objects.create(
+                event=self.event, total_allotment=100, availability=90, price=10
+            )
+            for _ in range(2)
+        ]
+
+    def create_hold(self, expires_at, status=BookingStatus.PENDING):
+        booking = Booking.objects.create(
+            customer=self.customer, status=status, hold_expires_at=expires_at
+        )
+        SubBooking.objects.bulk_create(
+            [
+                SubBooking(booking=booking, ticket=ticket, count=2)
+                for ticket in self.tickets
+            ]
+        )
+        return booking
+
+    def test_release_expired_holds(self):
+        now = timezone.now()
+        expired = [self.create_hold(now - timedelta(minutes=1)) for _ in range(3)]
+        active = self.create_hold(now + timedelta(minutes=1))
+        confirmed = self.create_hold(None, status=BookingStatus.BOOKED)
+
+        # Select the batch, flip the bookings, sum the seats per ticket and
+        # restock the tickets, plus the savepoint of the batch.
+        with self.assertNumQueries(6):
+            released = release_expired_holds(now=now, batch_size=10)
+        self.assertEqual(released, 3)
+
+        for booking in expired:
+            booking.refresh_from_db()
+            self.assertEqual(booking.status, BookingStatus.CANCELLED)
+            self.assertTrue(booking.is_cancelled)
+        active.refresh_from_db()
+        confirmed.refresh_from_db()
+        self.assertEqual(active.status, BookingStatus.PENDING)
+        self.assertEqual(confirmed.status, BookingStatus.BOOKED)
+        for ticket in self.tickets:
+            ticket.refresh_from_db()
+            self.assertEqual(ticket.availability, 96)
+
+    def test_holds_confirmed_while_they_are_released(self):
+        now = timezone.now()
+        holds = [self.create_hold(now + timedelta(minutes=1)) for _ in range(3)]
+        expired_holds = holds_service._expired_holds
+        # The first hold is confirmed after the selection of the batch, the flip
+        # leaves it out and the batch is selected again.
+        confirm_hold(holds[0])
+        selections = [[booking.id for booking in holds]]
+
+        def select(*args):
+            return selections.pop() if selections else expired_holds(*args)
+
+        with patch("ebs_app.services.holds._expired_holds", side_effect=select):
+            released = release_expired_holds(now=now + timedelta(minutes=2))
+        self.assertEqual(released, 2)
+        self.assertEqual(
+            [booking.status for booking in Booking.objects.order_by("id")],
+            [BookingStatus.BOOKED, BookingStatus.CANCELLED, BookingStatus.CANCELLED],
+        )
+        for ticket in self.tickets:
+            ticket.refresh_from_db()
+            self.assertEqual(ticket.availability, 94)
+            self.assertEqual(ticket.sold, 2)
+
+    def test_release_expired_holds_in_batches(self):
+        now = timezone.now()
+        for _ in range(5):
+            self.create_hold(now - timedelta(minutes=1))
+
+        self.assertEqual(release_expired_holds(now=now, batch_size=2), 5)
+        self.assertEqual(
+            Booking.objects.filter(status=BookingStatus.CANCELLED).count(), 5
+        )
+        self.tickets[0].refresh_from_db()
+        self.assertEqual(self.tickets[0].availability, 100)
+
+
+class BulkBookingTestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.staff_user = User.objects.create_user(username="boxoffice", is_staff=True)
+        self.client.force_authenticate(user=self.staff_user)
+        self.customers = [
+            CustomerFactory(user=UserFactory(email=f"bulk{index}@email.com"))
+            for index in range(3)
+        ]
+        self.event = Event.objects.create(
+            event_name="Test Event",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+        )
+        self.tickets = [
+            Ticket.objects.create(
+                event=self.event, total_allotment=10, availability=5, price=10
+            )
+            for _ in range(2)
+        ]
+        self.url = reverse("bookings-bulk")
+
+    def item(self, customer, *lines):
+        return {
+            "customer": customer.id,
+            "sub_bookings": [
+                {"ticket": ticket.id, "count": count} for ticket, count in lines
+            ],
+        }
+
+    @patch("ebs_app.services.bulk_bookings.send_bulk_booking_confirmation_emails.delay")
+    def test_bulk_booking_per_item_results(self, mock_send_emails):
+        first, second = self.tickets
+        payload = {
+            "bookings": [
+                self.item(self.customers[0], (first, 3), (second, 1)),
+                self.item(self.customers[1], (first, 3)),
+                self.item(self.customers[2], (first, 2), (second, 2)),
+                {"customer": 0, "sub_bookings": [{"ticket": first.id, "count": 1}]},
+                {"customer": self.customers[0].id, "sub_bookings": [{"ticket": 0}]},
+                self.item(self.customers[1], (second, 1), (first, 1)),
+            ]
+        }
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(
+            [result["status_code"] for result in response.data["results"]],
+            [201, 400, 201, 403, 400, 400],
+        )
+        self.assertEqual(
+            response.data["results"][1]["detail"],
+            BookedMoreSeatAPIException.default_detail,
+        )
+        self.assertEqual(
+            response.data["results"][5]["detail"],
+            TicketNotAvailableAPIException.default_detail,
+        )
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.availability, 0)
+        self.assertEqual(second.availability, 2)
+        booking = Booking.objects.get(id=response.data["results"][0]["booking"]["id"])
+        self.assertEqual(booking.status, BookingStatus.BOOKED)
+        self.assertEqual(booking.total_price, 40)
+        self.assertEqual(
+            sorted(booking.sub_bookings.values_list("ticket", "count")),
+            [(first.id, 3), (second.id, 1)],
+        )
+        mock_send_emails.assert_called_once_with(
+            [[first.id, "bulk0@email.com"], [first.id, "bulk2@email.com"]]
+        )
+
+    @patch("ebs_app.services.bulk_bookings.send_bulk_booking_confirmation_emails.delay")
+    def test_bulk_booking_query_count_is_constant(self, _mock_send_emails):
+        for ticket in self.tickets:
+            ticket.availability = 100
+            ticket.save()
+
+        def post(count):
+            return self.client.post(
+                self.url,
+                {
+                    "bookings": [
+                        self.item(self.customers[index % 3], (self.tickets[0], 1))
+                        for index in range(count)
+                    ]
+                },
+                format="json",
+            )
+
+        # The first request creates the sales summary of the ticket type.
+        with self.assertNumQueries(11):
+            post(2)
+        with self.assertNumQueries(9):
+            response = post(40)
+        self.assertEqual(response.data["created"], 40)
+        with self.assertNumQueries(9):
+            post(2)
+
+    def test_bulk_booking_requires_staff(self):
+        self.client.force_authenticate(user=self.customers[0].user)
+        response = self.client.post(self.url, {"bookings": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(EBS_BULK_BOOKING_MAX_ITEMS=1)
+    def test_bulk_booking_too_many_items(self):
+        item = self.item(self.customers[0], (self.tickets[0], 1))
+        response = self.client.post(self.url, {"bookings": [item, item]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["detail"], TooManyBookingsAPIException.default_detail
+        )
+        self.assertFalse(Booking.objects.exists())
+
+
+class IdempotentBookingTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="mobile", email="m@email.com")
+        CustomerFactory(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.event = Event.objects.create(
+            event_name="Test Event",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+        )
+        self.ticket = Ticket.objects.create(
+            event=self.event, total_allotment=10, availability=10, price=10
+        )
+        self.url = reverse("bookings-list")
+
+    def tearDown(self):
+        cache.clear()
+
+    def book(self, count, key):
+        return self.client.post(
+            self.url,
+            {"sub_bookings": [{"ticket": self.ticket.id, "count": count}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_first_response(self):
+        first = self.book(2, "retry-1")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0):
+            retry = self.book(2, "retry-1")
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.availability, 8)
+        self.assertEqual(Booking.objects.count(), 1)
+
+        self.assertEqual(self.book(2, "retry-2").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_key_reused_with_other_payload(self):
+        self.book(2, "reused")
+        response = self.book(3, "reused")
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(
+            response.data["detail"], IdempotencyKeyReusedAPIException.default_detail
+        )
+
+    def test_failed_request_is_not_replayed(self):
+        response = self.book(11, "too-many")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.ticket.availability = 20
+        self.ticket.save()
+        self.assertEqual(self.book(11, "too-many").status_code, status.HTTP_201_CREATED)
+
+
+class OrganiserBookingListTestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory()
+        self.alt_organiser = EventOrganiserFactory()
+        self.customer = CustomerFactory()
+        self.event = Event.objects.create(
+            event_name="Mine",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+            event_organiser=self.organiser,
+        )
+        self.other_event = Event.objects.create(
+            event_name="Mine Too",
+            event_date_time="2023-08-26T20:00Z",
+            venue="CP",
+            event_organiser=self.organiser,
+        )
+        self.alt_event = Event.objects.create(
+            event_name="Not Mine",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+            event_organiser=self.alt_organiser,
+        )
+        self.vip = Ticket.objects.create(event=self.event, ticket_type="VIP")
+        self.premium = Ticket.objects.create(event=self.event, ticket_type="PREMIUM")
+        self.other = Ticket.objects.create(event=self.other_event, ticket_type="VIP")
+        self.alt = Ticket.objects.create(event=self.alt_event, ticket_type="VIP")
+        self.bookings = {
+            name: self.book(status_, *tickets)
+            for name, status_, tickets in [
+                ("vip", BookingStatus.BOOKED, [self.vip]),
+                ("premium", BookingStatus.CANCELLED, [self.premium]),
+                ("mixed", BookingStatus.PENDING, [self.vip, self.alt]),
+                ("other", BookingStatus.BOOKED, [self.other]),
+                ("alt", BookingStatus.BOOKED, [self.alt]),
+            ]
+        }
+        self.client.force_authenticate(user=self.organiser.user)
+
+    def book(self, status_, *tickets):
+        booking = Booking.objects.create(customer=self.customer, status=status_)
+        SubBooking.objects.bulk_create(
+            [SubBooking(booking=booking, ticket=ticket, count=1) for ticket in tickets]
+        )
+        return booking.id
+
+    def listed(self, **params):
+        response = self.client.get(reverse("bookings-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = {booking["id"] for booking in response.data["results"]}
+        return {name for name, id_ in self.bookings.items() if id_ in ids}
+
+    def test_organisers_only_see_bookings_of_their_events(self):
+        self.assertEqual(self.listed(), {"vip", "premium", "mixed", "other"})
+        self.client.force_authenticate(user=self.alt_organiser.user)
+        self.assertEqual(self.listed(), {"mixed", "alt"})
+
+    def test_bookings_are_filtered(self):
+        self.assertEqual(self.listed(event=self.event.id), {"vip", "premium", "mixed"})
+        self.assertEqual(self.listed(event=self.alt_event.id), set())
+        self.assertEqual(self.listed(ticket_type="VIP"), {"vip", "mixed", "other"})
+        self.assertEqual(
+            self.listed(event=self.event.id, ticket_type="VIP", status="BOOKED"),
+            {"vip"},
+        )
+        self.client.force_authenticate(user=self.customer.user)
+        self.assertEqual(self.listed(event=self.alt_event.id), {"mixed", "alt"})
+
+    def test_invalid_filters_are_rejected(self):
+        for params in [{"event": "x"}, {"ticket_type": "BALCONY"}, {"status": "LOST"}]:
+            response = self.client.get(reverse("bookings-list"), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(
+                response.data["detail"], InvalidBookingFilterAPIException.default_detail
+            )
+
+    def test_organiser_query_plan_uses_indexes(self):
+        bookings = (
+            Booking.objects.with_lines(
+                organiser=self.organiser, event=self.event.id, ticket_type="VIP"
+            )
+            .filter(status=BookingStatus.BOOKED)
+            .order_by("-id")[:50]
+        )
+        if connection.vendor == "postgresql":
+            # The test tables are tiny, make the planner show the indexed plan.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = bookings.explain()
+            self.assertNotIn("Seq Scan on ebs_app_booking", plan)
+            self.assertNotIn("Seq Scan on ebs_app_subbooking", plan)
+            self.assertNotIn("Seq Scan on ebs_app_ticket", plan)
+        else:
+            plan = bookings.explain()
+            self.assertNotIn("SCAN ebs_app_booking", plan)
+            self.assertNotIn("SCAN V0", plan)
+            self.assertIn("SEARCH ebs_app_booking USING INDEX booking_status_id_idx", plan)
+            self.assertIn("USING COVERING INDEX subbooking_ticket_booking_idx", plan)
+            self.assertIn("USING COVERING INDEX ticket_event_type_idx", plan)
+        self.assertIn("subbooking_ticket_booking_idx", plan)
+        self.assertIn("ticket_event_type_idx", plan)
+
+        plan = Booking.objects.with_lines(organiser=self.organiser).order_by("-id")
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Seq Scan on ebs_app_booking", plan.explain())
+        else:
+            self.assertNotIn("SCAN ebs_app_booking", plan.explain())
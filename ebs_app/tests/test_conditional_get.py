@@ -0,0 +1,148 @@
+from datetime import timedelta
+from unittest.mock import patch
+from django.core.cache import cache
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.models.events import Event
+from ebs_app.models.tickets import Ticket, TicketShard
+from ebs_app.services.reservations import configure_shards
+from ebs_app.tests.factories import CustomerFactory, EventOrganiserFactory
+
+
+class ConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory()
+        self.customer = CustomerFactory()
+        self.event = Event.objects.create(
+            event_name="Friday Party",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+            event_organiser=self.organiser,
+        )
+        self.ticket = Ticket.objects.create(
+            event=self.event, total_allotment=10, availability=10, price=100
+        )
+        self.sharded = configure_shards(
+            Ticket.objects.create(
+                event=self.event, total_allotment=10, availability=10, price=100
+            ).id,
+            2,
+        )
+        self.age_rows()
+        self.client.force_authenticate(user=self.customer.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def age_rows(self):
+        # Rows written a minute ago, so the next write moves updated_at forward.
+        for model in (Event, Ticket, TicketShard):
+            model.objects.update(updated_at=F("updated_at") - timedelta(minutes=1))
+
+    def get(self, url, expected_status=status.HTTP_200_OK, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, expected_status)
+        return response
+
+    def assertNotModified(self, url, response):
+        not_modified = self.get(
+            url, status.HTTP_304_NOT_MODIFIED, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(not_modified.content, b"")
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+
+    def assertModified(self, url, response):
+        modified = self.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertNotEqual(modified["ETag"], response["ETag"])
+        return modified
+
+    @patch("ebs_app.views.events_views.send_event_update_email.delay")
+    def test_event_detail(self, mock_email):
+        url = reverse("events-detail", kwargs={"pk": self.event.id})
+        first = self.get(url)
+        self.assertIn("Last-Modified", first)
+        self.assertNotModified(url, first)
+        # Served from the event cache without any query.
+        with self.assertNumQueries(0):
+            self.assertNotModified(url, first)
+
+        self.client.force_authenticate(user=self.organiser.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {"venue": "Stadium"})
+        self.client.force_authenticate(user=self.customer.user)
+        self.assertEqual(self.assertModified(url, first).data["venue"], "Stadium")
+
+    def test_event_list_changes_with_new_events(self):
+        url = reverse("events-list")
+        first = self.get(url)
+        self.assertNotModified(url, first)
+        cache.clear()
+        Event.objects.create(
+            event_name="Saturday Party", event_date_time="2023-08-26T20:00Z", venue="CP"
+        )
+        self.assertModified(url, first)
+
+    def test_ticket_detail_changes_with_availability(self):
+        for ticket in (self.ticket, self.sharded):
+            url = reverse("tickets-detail", kwargs={"pk": ticket.id})
+            first = self.get(url)
+            self.assertNotModified(url, first)
+            with patch(
+                "ebs_app.views.bookings_views.send_booking_confirmation_email.delay"
+            ):
+                self.client.post(
+                    reverse("bookings-list"),
+                    {"sub_bookings": [{"ticket": ticket.id, "count": 1}]},
+                    format="json",
+                )
+            self.assertEqual(self.assertModified(url, first).data["availability"], 9)
+
+    def test_ticket_list(self):
+        url = reverse("tickets-list")
+        first = self.get(url)
+        self.assertNotModified(url, first)
+        since = self.get(
+            url,
+            status.HTTP_304_NOT_MODIFIED,
+            HTTP_IF_MODIFIED_SINCE=first["Last-Modified"],
+        )
+        self.assertEqual(since.content, b"")
+
+        Ticket.objects.filter(id=self.ticket.id).delete()
+        self.assertModified(url, first)
+
+    def test_list_pages(self):
+        url = reverse("tickets-list")
+        first = self.get(f"{url}?page_size=1")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertNotModified(f"{url}?page_size=1", first)
+        # The validators are read from the page, not aggregated over all the tickets.
+        self.assertEqual(len(queries), 1)
+        self.assertIn("LIMIT 2", queries[0]["sql"])
+        self.assertNotIn("COUNT", queries[0]["sql"])
+
+        second = self.get(first.data["next"])
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertNotModified(first.data["next"], second)
+
+        # A booking of the second ticket only changes the second page.
+        TicketShard.objects.filter(ticket=self.sharded).update(
+            availability=4, updated_at=timezone.now()
+        )
+        self.assertNotModified(f"{url}?page_size=1", first)
+        self.assertModified(first.data["next"], second)
+
+    def test_missing_rows_are_not_found(self):
+        self.get(
+            reverse("tickets-detail", kwargs={"pk": 999}), status.HTTP_404_NOT_FOUND
+        )
+        self.get(
+            reverse("events-detail", kwargs={"pk": 999}), status.HTTP_404_NOT_FOUND
+        )
@@ -0,0 +1,105 @@
+from unittest.mock import patch
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.models.events import Event
+from ebs_app.services import event_cache
+from ebs_app.tests.factories import CustomerFactory, EventOrganiserFactory
+
+
+class EventCacheTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory()
+        self.customer = CustomerFactory()
+        self.event = Event.objects.create(
+            event_name="Friday Party",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+            event_organiser=self.organiser,
+        )
+        self.other_event = Event.objects.create(
+            event_name="Saturday Party",
+            event_date_time="2023-08-26T20:00Z",
+            venue="CP",
+            event_organiser=self.organiser,
+        )
+        self.detail_url = reverse("events-detail", kwargs={"pk": self.event.id})
+        self.other_url = reverse("events-detail", kwargs={"pk": self.other_event.id})
+        self.list_url = reverse("events-list")
+
+    def tearDown(self):
+        cache.clear()
+
+    def get(self, url, cached, **params):
+        self.client.force_authenticate(user=self.customer.user)
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response[event_cache.CACHE_HEADER], "HIT" if cached else "MISS"
+        )
+        return response
+
+    def test_reads_are_served_from_the_cache(self):
+        first = self.get(self.detail_url, cached=False)
+        with self.assertNumQueries(0):
+            second = self.get(self.detail_url, cached=True)
+        self.assertEqual(second.data, first.data)
+
+        self.get(self.list_url, cached=False)
+        self.get(self.list_url, cached=True)
+        # Every query string is cached on its own.
+        self.get(self.list_url, cached=False, page_size=1)
+        self.assertEqual(event_cache.get_stats(), {"hits": 2, "misses": 3})
+
+    @patch("ebs_app.views.events_views.send_event_update_email.delay")
+    def test_update_invalidates_the_event_and_the_list(self, mock_email):
+        self.get(self.detail_url, cached=False)
+        self.get(self.other_url, cached=False)
+        self.get(self.list_url, cached=False)
+
+        self.client.force_authenticate(user=self.organiser.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.detail_url, {"venue": "Stadium"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(
+            self.get(self.detail_url, cached=False).data["venue"], "Stadium"
+        )
+        self.assertEqual(
+            self.get(self.list_url, cached=False).data["results"][0]["venue"], "Stadium"
+        )
+        self.get(self.other_url, cached=True)
+
+    def test_create_and_delete_invalidate_the_list(self):
+        self.get(self.list_url, cached=False)
+        self.client.force_authenticate(user=self.organiser.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                self.list_url,
+                {
+                    "event_name": "Sunday",
+                    "event_date_time": "2023-08-27T20:00Z",
+                    "venue": "CP",
+                },
+            )
+        self.assertEqual(len(self.get(self.list_url, cached=False).data["results"]), 3)
+
+        self.get(self.detail_url, cached=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.detail_url)
+        self.client.force_authenticate(user=self.customer.user)
+        self.assertEqual(
+            self.client.get(self.detail_url).status_code, status.HTTP_404_NOT_FOUND
+        )
+        self.assertEqual(len(self.get(self.list_url, cached=False).data["results"]), 2)
+
+    def test_versions_survive_eviction(self):
+        self.get(self.detail_url, cached=False)
+        cache.delete(event_cache._event_version_key(self.event.id))
+        Event.objects.filter(id=self.event.id).update(venue="Stadium")
+        self.assertEqual(
+            self.get(self.detail_url, cached=False).data["venue"], "Stadium"
+        )
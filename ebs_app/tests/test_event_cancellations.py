@@ -0,0 +1,199 @@
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.models.bookings import Booking, SubBooking
+from ebs_app.models.cancellations import EventCancellation
+from ebs_app.models.choices import BookingStatus, JobStatus
+from ebs_app.models.events import Event
+from ebs_app.models.tickets import Ticket
+from ebs_app.services import cancellations
+from ebs_app.services.cancellations import run_event_cancellation
+from ebs_app.tests.factories import CustomerFactory, EventOrganiserFactory
+from ebs_app.exceptions import (
+    CancellationInProgressAPIException,
+    NotAuthorisedAPIException,
+)
+
+
+@patch("ebs_app.services.cancellations.send_event_cancelled_email.delay")
+@patch("ebs_app.services.cancellations.cancel_event_bookings.delay")
+class EventCancellationTestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory(
+            user=User.objects.create_user(username="organiser")
+        )
+        self.alt_organiser = EventOrganiserFactory(
+            user=User.objects.create_user(username="organiser_alt")
+        )
+        self.customers = [
+            CustomerFactory(
+                user=User.objects.create_user(
+                    username=f"fan{i}", email=f"fan{i}@email.com"
+                )
+            )
+            for i in range(5)
+        ]
+        self.event = Event.objects.create(
+            event_name="Called Off",
+            event_description="Called Off",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+            event_organiser=self.organiser,
+        )
+        self.ticket = Ticket.objects.create(
+            event=self.event, total_allotment=100, availability=85, price=100
+        )
+        self.other_ticket = Ticket.objects.create(
+            event=Event.objects.create(
+                event_name="Going Ahead",
+                event_description="Going Ahead",
+                event_date_time="2023-08-25T20:00Z",
+                venue="CP",
+                event_organiser=self.organiser,
+            ),
+            total_allotment=100,
+            availability=97,
+            price=100,
+        )
+        # Five bookings of 3 seats of the cancelled event, one of them also holding
+        # 3 seats of another event, and one booking of the other event only.
+        self.bookings = []
+        for customer in self.customers:
+            booking = Booking.objects.create(
+                customer=customer, status=BookingStatus.BOOKED, total_price=300
+            )
+            SubBooking.objects.create(booking=booking, ticket=self.ticket, count=3)
+            self.bookings.append(booking)
+        SubBooking.objects.create(
+            booking=self.bookings[0], ticket=self.other_ticket, count=3
+        )
+        self.untouched = Booking.objects.create(
+            customer=self.customers[0], status=BookingStatus.BOOKED, total_price=0
+        )
+        self.url = reverse("events-cancellation", kwargs={"pk": self.event.id})
+
+    def start(self):
+        self.client.force_authenticate(user=self.organiser.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url)
+        return response
+
+    def test_event_bookings_are_cancelled_in_chunks(self, mock_run, mock_email):
+        response = self.start()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], JobStatus.QUEUED)
+        self.assertEqual(response.data["total"], 5)
+        mock_run.assert_called_once_with(response.data["id"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job = run_event_cancellation(response.data["id"], chunk_size=2)
+
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(job.cancelled, 5)
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(
+            Booking.objects.filter(status=BookingStatus.CANCELLED).count(), 5
+        )
+        self.assertEqual(
+            Booking.objects.get(id=self.untouched.id).status, BookingStatus.BOOKED
+        )
+        self.ticket.refresh_from_db()
+        self.other_ticket.refresh_from_db()
+        self.assertEqual(self.ticket.availability, 100)
+        self.assertEqual(self.other_ticket.availability, 100)
+
+        # One batched notification per chunk of 2 bookings.
+        self.assertEqual(mock_email.call_count, 3)
+        notified = [email for call in mock_email.call_args_list for email in call[0][1]]
+        self.assertEqual(sorted(notified), [f"fan{i}@email.com" for i in range(5)])
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["status"], JobStatus.DONE)
+        self.assertEqual(response.data["progress"], 100)
+
+    def test_cancelled_bookings_are_skipped(self, mock_run, mock_email):
+        self.client.force_authenticate(user=self.customers[1].user)
+        self.client.patch(reverse("cancel_booking", kwargs={"pk": self.bookings[1].id}))
+
+        job_id = self.start().data["id"]
+        with self.captureOnCommitCallbacks(execute=True):
+            job = run_event_cancellation(job_id, chunk_size=2)
+
+        self.assertEqual(job.total, 4)
+        self.assertEqual(job.cancelled, 4)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.availability, 100)
+
+    def test_bookings_cancelled_after_the_chunk_is_selected(self, mock_run, mock_email):
+        job_id = self.start().data["id"]
+        next_chunk = cancellations._next_chunk
+        # The second booking is cancelled by its customer after the first chunk is
+        # selected, the chunk is selected again without it.
+        selections = [
+            [(booking.id, booking.customer.user.email) for booking in self.bookings[:2]]
+        ]
+        self.client.force_authenticate(user=self.customers[1].user)
+        self.client.patch(reverse("cancel_booking", kwargs={"pk": self.bookings[1].id}))
+
+        def select(*args):
+            return selections.pop() if selections else next_chunk(*args)
+
+        with patch("ebs_app.services.cancellations._next_chunk", side_effect=select):
+            with self.captureOnCommitCallbacks(execute=True):
+                job = run_event_cancellation(job_id, chunk_size=2)
+
+        self.assertEqual(job.cancelled, 4)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.availability, 100)
+        notified = [email for call in mock_email.call_args_list for email in call[0][1]]
+        self.assertNotIn("fan1@email.com", notified)
+
+    def test_queries_per_chunk_are_constant(self, mock_run, mock_email):
+        job_id = self.start().data["id"]
+        job = EventCancellation.objects.get(id=job_id)
+        with CaptureQueriesContext(connection) as small:
+            run_event_cancellation(job_id, chunk_size=5)
+        EventCancellation.objects.filter(id=job_id).update(
+            status=JobStatus.QUEUED, last_booking_id=0, cancelled=0
+        )
+        Booking.objects.filter(id__in=[b.id for b in self.bookings]).update(
+            status=BookingStatus.BOOKED
+        )
+        for i in range(20):
+            booking = Booking.objects.create(
+                customer=self.customers[i % 5], status=BookingStatus.BOOKED
+            )
+            SubBooking.objects.create(booking=booking, ticket=self.ticket, count=1)
+        with CaptureQueriesContext(connection) as large:
+            job = run_event_cancellation(job.id, chunk_size=25)
+        self.assertEqual(job.cancelled, 25)
+        self.assertEqual(len(large), len(small))
+
+    def test_event_cannot_be_cancelled_twice_at_once(self, mock_run, mock_email):
+        self.start()
+        response = self.start()
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.data["detail"], CancellationInProgressAPIException.default_detail
+        )
+        self.assertEqual(EventCancellation.objects.count(), 1)
+
+    def test_only_the_event_organiser_can_cancel(self, mock_run, mock_email):
+        self.client.force_authenticate(user=self.alt_organiser.user)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["detail"], NotAuthorisedAPIException.default_detail
+        )
+
+        self.client.force_authenticate(user=self.customers[0].user)
+        self.assertEqual(
+            self.client.post(self.url).status_code, status.HTTP_403_FORBIDDEN
+        )
+        self.assertFalse(EventCancellation.objects.exists())
+        mock_run.assert_not_called()
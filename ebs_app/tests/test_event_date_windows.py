@@ -0,0 +1,128 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.models.events import Event
+from ebs_app.models.tickets import Ticket
+from ebs_app.services import date_windows
+from ebs_app.tests.factories import CustomerFactory, EventOrganiserFactory
+
+
+class EventDateWindowTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory()
+        self.customer = CustomerFactory()
+        now = timezone.now()
+        self.past = self.create_event("Past", now - timedelta(days=1))
+        self.soon = self.create_event("Soon", now + timedelta(hours=2))
+        self.next_week = self.create_event("Next week", now + timedelta(days=6))
+        self.later = self.create_event("Later", now + timedelta(days=40))
+        self.fixed = self.create_event("Fixed", "2030-08-25T20:00Z")
+
+    def tearDown(self):
+        cache.clear()
+
+    def create_event(self, name, date_time):
+        return Event.objects.create(
+            event_name=name,
+            event_description=name,
+            venue="CP",
+            event_date_time=date_time,
+            event_organiser=self.organiser,
+        )
+
+    def get(self, url, **params):
+        self.client.force_authenticate(user=self.customer.user)
+        return self.client.get(url, params)
+
+    def list(self, url_name="events-list", **params):
+        response = self.get(reverse(url_name), **params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [event["id"] for event in response.data["results"]]
+
+    def test_list_windows(self):
+        self.assertEqual(len(self.list()), 5)
+        self.assertEqual(self.list(on="2030-08-25"), [self.fixed.id])
+        self.assertEqual(self.list(on="2030-08-24"), [])
+        self.assertEqual(
+            self.list(date_from="2030-01-01", date_to="2030-08-25"), [self.fixed.id]
+        )
+        self.assertEqual(
+            self.list(date_to="2030-08-24", days=7), [self.soon.id, self.next_week.id]
+        )
+
+    def test_upcoming_hides_past_events(self):
+        self.assertEqual(
+            self.list("events-upcoming"),
+            [self.soon.id, self.next_week.id, self.later.id, self.fixed.id],
+        )
+        self.assertEqual(
+            self.list("events-upcoming", days=7), [self.soon.id, self.next_week.id]
+        )
+        # A window in the past stays empty.
+        self.assertEqual(self.list("events-upcoming", date_to="2000-01-01"), [])
+
+    def test_windows_are_cached(self):
+        self.assertEqual(self.list("events-upcoming", days=1), [self.soon.id])
+        Event.objects.filter(id=self.next_week.id).update(
+            event_date_time=timezone.now() + timedelta(hours=3)
+        )
+        # Direct updates do not bump the cache, the cached response is served.
+        self.assertEqual(self.list("events-upcoming", days=1), [self.soon.id])
+        cache.clear()
+        self.assertEqual(
+            self.list("events-upcoming", days=1), [self.soon.id, self.next_week.id]
+        )
+
+    def test_invalid_windows(self):
+        for params in (
+            {"on": "2030-08-25T20:00"},
+            {"on": "tomorrow"},
+            {"date_from": "2030-13-01"},
+            {"days": "0"},
+            {"days": "-1"},
+            {"days": str(date_windows.MAX_DAYS + 1)},
+        ):
+            response = self.get(reverse("events-list"), **params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_tickets_are_embedded_when_expanded(self):
+        ticket = Ticket.objects.create(
+            event=self.fixed, total_allotment=100, availability=80, price=100
+        )
+        response = self.get(reverse("events-list"), on="2030-08-25")
+        self.assertNotIn("tickets", response.data["results"][0])
+
+        response = self.get(reverse("events-list"), on="2030-08-25", expand="tickets")
+        tickets = response.data["results"][0]["tickets"]
+        self.assertEqual(
+            [(t["id"], t["availability"]) for t in tickets], [(ticket.id, 80)]
+        )
+
+        # Availability is never served from the cache.
+        Ticket.objects.filter(id=ticket.id).update(availability=50)
+        response = self.get(reverse("events-list"), on="2030-08-25", expand="tickets")
+        self.assertEqual(response.data["results"][0]["tickets"][0]["availability"], 50)
+
+        response = self.get(
+            reverse("events-detail", kwargs={"pk": self.fixed.id}),
+            fields="id,tickets",
+            expand="tickets",
+        )
+        self.assertEqual(set(response.data), {"id", "tickets"})
+
+    def test_window_is_an_index_range_scan(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite query plan")
+        start, end = date_windows.get_window({"days": "7"})
+        queryset = Event.objects.filter(
+            event_date_time__gte=start, event_date_time__lt=end
+        ).order_by("event_date_time", "id")[:20]
+        plan = queryset.explain()
+        self.assertIn("USING INDEX event_date_time_id_idx", plan)
+        self.assertNotIn("SCAN", plan)
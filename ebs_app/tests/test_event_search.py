@@ -0,0 +1,149 @@
+from io import StringIO
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.models.events import Event
+from ebs_app.services import event_search
+from ebs_app.tests.factories import CustomerFactory, EventOrganiserFactory
+
+
+class EventSearchTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory()
+        self.customer = CustomerFactory()
+        self.url = reverse("events-search")
+        self.jazz = self.create_event(
+            "Jazz Night", "Live jazz with the quartet", "Blue Note", "2023-08-25T20:00Z"
+        )
+        self.rock = self.create_event(
+            "Rock Festival",
+            "Three stages, jazz tent included",
+            "Stadium",
+            "2023-09-10T12:00Z",
+        )
+        self.late_jazz = self.create_event(
+            "Jazz Brunch", "Coffee and music", "blue note", "2023-10-01T11:00Z"
+        )
+        # Events matching no search, words found in every event do not rank.
+        for index in range(5):
+            self.create_event(
+                f"Comedy Show {index}", "Stand-up", "Theatre", "2023-08-01T20:00Z"
+            )
+        event_search.rebuild()
+
+    def tearDown(self):
+        cache.clear()
+
+    def create_event(self, name, description, venue, date_time):
+        return Event.objects.create(
+            event_name=name,
+            event_description=description,
+            venue=venue,
+            event_date_time=date_time,
+            event_organiser=self.organiser,
+        )
+
+    def search(self, **params):
+        self.client.force_authenticate(user=self.customer.user)
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [event["id"] for event in response.data["results"]]
+
+    def test_results_are_ranked(self):
+        results = self.search(q="jazz")
+        # Matches in the name rank above matches in the description.
+        self.assertEqual(results[-1], self.rock.id)
+        self.assertEqual(set(results), {self.jazz.id, self.rock.id, self.late_jazz.id})
+
+    def test_all_words_match_the_last_as_a_prefix(self):
+        self.assertEqual(self.search(q="jazz qua"), [self.jazz.id])
+        self.assertEqual(self.search(q="Fest"), [self.rock.id])
+        self.assertEqual(self.search(q="jazz opera"), [])
+
+    def test_query_syntax_is_not_passed_through(self):
+        self.assertEqual(self.search(q='jazz" OR (NEAR*'), [])
+        self.assertEqual(self.search(q="jazz-night!"), [self.jazz.id])
+
+    def test_filters(self):
+        self.assertEqual(
+            set(self.search(q="jazz", date_from="2023-09-01")),
+            {self.rock.id, self.late_jazz.id},
+        )
+        # A date_to date includes the whole day.
+        self.assertEqual(self.search(q="jazz", date_to="2023-08-25"), [self.jazz.id])
+        self.assertEqual(
+            self.search(q="jazz", date_from="2023-08-25T21:00Z", date_to="2023-09-30"),
+            [self.rock.id],
+        )
+        self.assertEqual(
+            set(self.search(q="jazz", venue="BLUE NOTE")),
+            {self.jazz.id, self.late_jazz.id},
+        )
+
+    def test_limit_and_fields(self):
+        best = self.search(q="jazz")[0]
+        self.client.force_authenticate(user=self.customer.user)
+        response = self.client.get(
+            self.url, {"q": "jazz", "limit": 1, "fields": "id,event_name"}
+        )
+        self.assertEqual(
+            response.data["results"],
+            [{"id": best, "event_name": Event.objects.get(id=best).event_name}],
+        )
+
+    def test_invalid_parameters(self):
+        self.client.force_authenticate(user=self.customer.user)
+        for params in (
+            {},
+            {"q": "  !! "},
+            {"q": "jazz", "date_from": "yesterday"},
+            {"q": "jazz", "date_to": "2023-13-01"},
+            {"q": "jazz", "limit": "0"},
+            {"q": "jazz", "limit": "1000"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    @patch("ebs_app.views.events_views.send_event_update_email.delay")
+    def test_index_follows_the_api_writes(self, mock_email):
+        self.client.force_authenticate(user=self.organiser.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("events-list"),
+                {
+                    "event_name": "Opera Gala",
+                    "event_date_time": "2023-11-01T19:00Z",
+                    "venue": "Opera",
+                },
+            )
+        event_id = response.data["id"]
+        self.assertEqual(self.search(q="gala"), [event_id])
+
+        self.client.force_authenticate(user=self.organiser.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse("events-detail", kwargs={"pk": event_id}),
+                {"event_name": "Ballet"},
+            )
+        self.assertEqual(self.search(q="gala"), [])
+        self.assertEqual(self.search(q="ballet"), [event_id])
+
+        self.client.force_authenticate(user=self.organiser.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("events-detail", kwargs={"pk": event_id}))
+        self.assertEqual(self.search(q="ballet"), [])
+
+    def test_rebuild_command(self):
+        Event.objects.filter(id=self.rock.id).update(event_name="Rock Gala")
+        self.assertEqual(self.search(q="gala"), [])
+
+        out = StringIO()
+        call_command("rebuild_event_search", "--batch-size", "2", stdout=out)
+        self.assertIn("Indexed 8 events", out.getvalue())
+        self.assertEqual(self.search(q="gala"), [self.rock.id])
+        self.assertEqual(len(self.search(q="jazz")), 3)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.models.bookings import Booking
+from ebs_app.models.choices import BookingStatus
+from ebs_app.models.events import Event
+from ebs_app.tests.factories import CustomerFactory
+
+
+class CursorPaginationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.customer = CustomerFactory(user=User.objects.create_user(username="fan"))
+        self.client.force_authenticate(user=self.customer.user)
+        start = timezone.now()
+        # Events created in reverse date order, two of them on the same date.
+        self.events = Event.objects.bulk_create(
+            [
+                Event(
+                    event_name=f"Event {i}",
+                    event_date_time=start + timedelta(days=(25 - i) // 2 * 2),
+                    venue="CP",
+                )
+                for i in range(25)
+            ]
+        )
+        Booking.objects.bulk_create(
+            [
+                Booking(customer=self.customer, status=BookingStatus.BOOKED)
+                for _ in range(25)
+            ]
+        )
+
+    def walk(self, url, page_size):
+        ids, pages, queries = [], 0, []
+        url = f"{url}?page_size={page_size}"
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.data["results"]]
+            queries.append(len(context))
+            pages += 1
+            url = response.data["next"]
+        return ids, pages, queries
+
+    def test_events_are_listed_by_date(self):
+        ids, pages, _ = self.walk(reverse("events-list"), 4)
+        expected = list(
+            Event.objects.order_by("event_date_time", "id").values_list("id", flat=True)
+        )
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 7)
+
+    def test_bookings_are_listed_latest_first(self):
+        ids, pages, queries = self.walk(reverse("bookings-list"), 10)
+        self.assertEqual(
+            ids, list(Booking.objects.order_by("-id").values_list("id", flat=True))
+        )
+        self.assertEqual(pages, 3)
+        # Deep pages take the same queries as the first one.
+        self.assertEqual(len(set(queries)), 1)
+
+    def test_pages_are_read_from_the_cursor(self):
+        first = self.client.get(reverse("bookings-list"), {"page_size": 10})
+        self.assertIsNone(first.data["previous"])
+        last_id = first.data["results"][-1]["id"]
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(first.data["next"])
+        sql = next(
+            query["sql"]
+            for query in context.captured_queries
+            if 'FROM "ebs_app_booking"' in query["sql"]
+        )
+        self.assertIn(f'"ebs_app_booking"."id" < {last_id}', sql)
+        self.assertNotIn("OFFSET", sql)
+
+    def tearDown(self):
+        cache.clear()
+
+    @override_settings(EBS_MAX_PAGE_SIZE=5)
+    def test_page_size_is_capped(self):
+        response = self.client.get(reverse("events-list"), {"page_size": 1000})
+        self.assertEqual(len(response.data["results"]), 5)
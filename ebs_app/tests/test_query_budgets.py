@@ -0,0 +1,154 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.models.bookings import Booking, SubBooking
+from ebs_app.models.choices import BookingStatus
+from ebs_app.models.events import Event
+from ebs_app.models.tickets import Ticket
+from ebs_app.services import event_availability
+from ebs_app.services.reservations import configure_shards
+from ebs_app.tests.factories import CustomerFactory, EventOrganiserFactory
+
+
+@override_settings(EBS_EVENT_CACHE={"ENABLED": False})
+class QueryBudgetTestCase(APITestCase):
+    """
+    Every read endpoint takes a fixed number of queries, whatever the number of rows.
+
+    The event cache is disabled to count the queries of the database reads.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory(
+            user=User.objects.create_user(username="organiser")
+        )
+        self.customer = CustomerFactory(
+            user=User.objects.create_user(username="customer")
+        )
+        self.add_rows(2)
+
+    def add_rows(self, count):
+        for i in range(count):
+            # Every other event belongs to an organiser of its own.
+            organiser = (
+                self.organiser
+                if i % 2
+                else EventOrganiserFactory(
+                    user=User.objects.create_user(
+                        username=f"organiser{Event.objects.count()}"
+                    )
+                )
+            )
+            event = Event.objects.create(
+                event_name=f"Event {i}",
+                event_description="Event",
+                event_date_time="2023-08-25T20:00Z",
+                venue="CP",
+                event_organiser=organiser,
+            )
+            tickets = [
+                Ticket.objects.create(
+                    event=event, total_allotment=100, availability=100, price=100
+                )
+                for _ in range(2)
+            ]
+            configure_shards(tickets[1].id, 4)
+            booking = Booking.objects.create(
+                customer=self.customer, status=BookingStatus.BOOKED, total_price=200
+            )
+            for ticket in tickets:
+                SubBooking.objects.create(booking=booking, ticket=ticket, count=1)
+            event_availability.refresh([event.id])
+
+    def get(self, user, url, budget):
+        # A fresh user per request, as the authentication would load it.
+        self.client.force_authenticate(user=User.objects.get(pk=user.pk))
+        with self.assertNumQueries(budget):
+            return self.client.get(url)
+
+    def assertConstantQueries(self, user, url, budget):
+        small = self.get(user, url, budget)
+        self.add_rows(10)
+        large = self.get(user, url, budget)
+        self.assertEqual(small.status_code, 200)
+        self.assertEqual(large.status_code, 200)
+        return small, large
+
+    def test_booking_list(self):
+        small, large = self.assertConstantQueries(
+            self.customer.user, reverse("bookings-list"), 3
+        )
+        self.assertEqual(len(large.data["results"]), len(small.data["results"]) + 10)
+        self.assertEqual(len(large.data["results"][0]["sub_bookings"]), 2)
+        self.assertEqual(
+            large.data["results"][0]["customer"]["user"]["username"], "customer"
+        )
+
+    def test_booking_list_of_organiser(self):
+        small, large = self.assertConstantQueries(
+            self.organiser.user, reverse("bookings-list"), 4
+        )
+        self.assertEqual(len(small.data["results"]), 1)
+        self.assertEqual(len(large.data["results"]), 6)
+
+    def test_booking_detail(self):
+        booking = Booking.objects.first()
+        self.assertConstantQueries(
+            self.customer.user, reverse("bookings-detail", kwargs={"pk": booking.id}), 3
+        )
+
+    def test_event_list(self):
+        small, large = self.assertConstantQueries(
+            self.customer.user, reverse("events-list"), 2
+        )
+        self.assertEqual(len(large.data["results"]), len(small.data["results"]) + 10)
+        self.assertIn("username", large.data["results"][-1]["event_organiser"]["user"])
+
+    def test_event_detail(self):
+        event = Event.objects.first()
+        self.assertConstantQueries(
+            self.customer.user, reverse("events-detail", kwargs={"pk": event.id}), 2
+        )
+
+    def test_ticket_list(self):
+        small, large = self.assertConstantQueries(
+            self.customer.user, reverse("tickets-list"), 2
+        )
+        self.assertEqual(len(large.data["results"]), len(small.data["results"]) + 20)
+        self.assertEqual(
+            {ticket["availability"] for ticket in large.data["results"]}, {100}
+        )
+
+    def test_ticket_detail(self):
+        ticket = Ticket.objects.filter(shard_count__gt=1).first()
+        self.assertConstantQueries(
+            self.customer.user, reverse("tickets-detail", kwargs={"pk": ticket.id}), 2
+        )
+
+    def test_sparse_booking_list(self):
+        # Neither the customer nor the sub bookings are fetched.
+        small, large = self.assertConstantQueries(
+            self.customer.user, reverse("bookings-list") + "?fields=id,status", 2
+        )
+        self.assertEqual(set(large.data["results"][0]), {"id", "status"})
+
+    def test_event_list_with_tickets(self):
+        # The tickets of the page, with their shard availability, in one query.
+        small, large = self.assertConstantQueries(
+            self.customer.user, reverse("events-list") + "?expand=tickets", 3
+        )
+        self.assertEqual(len(large.data["results"]), len(small.data["results"]) + 10)
+        tickets = large.data["results"][-1]["tickets"]
+        self.assertEqual([ticket["availability"] for ticket in tickets], [100, 100])
+
+    def test_event_list_with_availability(self):
+        # The availability rollup of every event is joined in the same query.
+        small, large = self.assertConstantQueries(
+            self.customer.user, reverse("events-list") + "?expand=availability", 2
+        )
+        self.assertEqual(len(large.data["results"]), len(small.data["results"]) + 10)
+        availability = large.data["results"][-1]["availability"]
+        self.assertEqual(availability["remaining"], 200)
+        self.assertEqual(availability["cheapest_price"], 100)
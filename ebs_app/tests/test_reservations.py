@@ -0,0 +1,478 @@
+import random
+import threading
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection, OperationalError
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APIClient
+from ebs_app.models.bookings import Booking, SubBooking
+from ebs_app.models.tickets import Ticket, TicketShard
+from ebs_app.serializers.ticket_serializers import TicketSerializer
+from ebs_app.services import inventory_front
+from ebs_app.services.reservations import (
+    booking_transaction,
+    configure_shards,
+    reserve_seats,
+)
+from ebs_app.exceptions import (
+    TicketNotAvailableAPIException,
+    BookedMoreSeatAPIException,
+)
+from ebs_app.models.events import Event
+from ebs_app.tests.factories import CustomerFactory
+
+
+class ReservationStressTestCase(TransactionTestCase):
+    """
+    Concurrent bookings with overlapping carts must neither deadlock nor oversell.
+    """
+
+    workers = 8
+    bookings_per_worker = 10
+
+    def setUp(self):
+        self.event = Event.objects.create(
+            event_name="Stress Event",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+        )
+        self.tickets = [
+            Ticket.objects.create(
+                event=self.event,
+                ticket_type="GENERAL_ADMISSION",
+                total_allotment=30,
+                availability=30,
+                price=100,
+            )
+            for _ in range(3)
+        ]
+        self.users = []
+        for index in range(self.workers):
+            user = User.objects.create_user(username=f"stress{index}")
+            CustomerFactory(user=user)
+            self.users.append(user)
+
+    def book(self, user, errors, seed):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        rng = random.Random(seed)
+        url = reverse("bookings-list")
+        try:
+            for _ in range(self.bookings_per_worker):
+                cart = rng.sample(self.tickets, 2)
+                payload = {
+                    "sub_bookings": [
+                        {"ticket": ticket.id, "count": rng.randint(1, 3)}
+                        for ticket in cart
+                    ]
+                    # A duplicated line must be merged, not claimed twice.
+                    + [{"ticket": cart[0].id, "count": 1}]
+                }
+                # SQLite serialises writers, a busy database is retried like a client would.
+                for _attempt in range(50):
+                    try:
+                        response = client.post(url, payload, format="json")
+                        break
+                    except OperationalError:
+                        continue
+                if response.status_code not in (
+                    status.HTTP_201_CREATED,
+                    status.HTTP_400_BAD_REQUEST,
+                ):
+                    errors.append(response.status_code)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    @mock.patch("ebs_app.views.bookings_views.send_booking_confirmation_email.delay")
+    def test_overlapping_carts(self, _mock_send_email):
+        errors = []
+        threads = [
+            threading.Thread(target=self.book, args=(user, errors, index))
+            for index, user in enumerate(self.users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=120)
+
+        self.assertFalse(any(thread.is_alive() for thread in threads), "deadlock")
+        self.assertEqual(errors, [])
+
+        for ticket in self.tickets:
+            ticket.refresh_from_db()
+            booked = sum(
+                SubBooking.objects.filter(ticket=ticket).values_list("count", flat=True)
+            )
+            self.assertGreaterEqual(ticket.availability, 0)
+            self.assertEqual(ticket.availability + booked, ticket.total_allotment)
+            # Every booking has one line per ticket, duplicates were merged.
+            self.assertEqual(
+                SubBooking.objects.filter(ticket=ticket).count(),
+                Booking.objects.filter(sub_bookings__ticket=ticket).count(),
+            )
+
+
+class ShardedTicketTestCase(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(
+            event_name="Sharded Event",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+        )
+        self.ticket = Ticket.objects.create(
+            event=self.event,
+            ticket_type="GENERAL_ADMISSION",
+            total_allotment=10,
+            availability=10,
+            price=100,
+        )
+
+    def test_configure_shards_spreads_availability(self):
+        ticket = configure_shards(self.ticket.id, 4)
+        self.assertEqual(ticket.availability, 0)
+        self.assertEqual(
+            list(
+                ticket.shards.order_by("index").values_list("availability", flat=True)
+            ),
+            [3, 3, 2, 2],
+        )
+        self.assertEqual(ticket.current_availability, 10)
+
+        ticket = configure_shards(self.ticket.id, 1)
+        self.assertEqual(ticket.availability, 10)
+        self.assertFalse(TicketShard.objects.exists())
+
+    def test_reserve_seats_spans_shards(self):
+        configure_shards(self.ticket.id, 4)
+        with transaction.atomic():
+            reserve_seats([(self.ticket.id, 4), (self.ticket.id, 5)])
+        ticket = Ticket.objects.with_availability().get(id=self.ticket.id)
+        self.assertEqual(ticket.current_availability, 1)
+
+        with self.assertRaises(BookedMoreSeatAPIException):
+            with transaction.atomic():
+                reserve_seats([(self.ticket.id, 2)])
+        self.assertEqual(sum(ticket.shards.values_list("availability", flat=True)), 1)
+
+        with transaction.atomic():
+            reserve_seats([(self.ticket.id, 1)])
+        with self.assertRaises(TicketNotAvailableAPIException):
+            with transaction.atomic():
+                reserve_seats([(self.ticket.id, 1)])
+
+    def test_serializer_reports_aggregate_availability(self):
+        configure_shards(self.ticket.id, 16)
+        ticket = Ticket.objects.with_availability().get(id=self.ticket.id)
+        self.assertEqual(TicketSerializer(ticket).data["availability"], 10)
+
+
+INVENTORY_FRONT = {
+    "ENABLED": True,
+    "BACKEND": "ebs_app.services.inventory_front.LocalInventoryBackend",
+}
+
+
+class BrokenInventoryBackend:
+    def __init__(self, config):
+        pass
+
+    def get_many(self, keys):
+        raise ConnectionError("backend down")
+
+    add = incr = get_many
+
+
+@override_settings(EBS_INVENTORY_FRONT=INVENTORY_FRONT)
+class InventoryFrontTestCase(TestCase):
+    def setUp(self):
+        inventory_front.get_backend().clear()
+        self.user = User.objects.create_user(username="front")
+        CustomerFactory(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.event = Event.objects.create(
+            event_name="Flash Sale",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+        )
+        self.ticket = Ticket.objects.create(
+            event=self.event, total_allotment=5, availability=5, price=100
+        )
+        self.url = reverse("bookings-list")
+
+    def tearDown(self):
+        inventory_front.get_backend().clear()
+
+    def counters(self):
+        """
+        The seats left in the front and the seats waiting for a flush.
+        """
+        counters = inventory_front.get_backend().get_many(
+            [
+                f"{counter}:{self.ticket.id}"
+                for counter in ("capacity", "claimed", "released", "committed")
+            ]
+        )
+        capacity, claimed, released, committed = counters.values()
+        self.ticket.refresh_from_db()
+        return {
+            "left": capacity - claimed + released,
+            "pending": committed - self.ticket.front_flushed,
+        }
+
+    def book(self, count):
+        with mock.patch(
+            "ebs_app.views.bookings_views.send_booking_confirmation_email.delay"
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                return self.client.post(
+                    self.url,
+                    {"sub_bookings": [{"ticket": self.ticket.id, "count": count}]},
+                    format="json",
+                )
+
+    def test_claims_skip_database_until_flush(self):
+        response = self.book(3)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.availability, 5)
+        self.assertEqual(self.counters(), {"left": 2, "pending": 3})
+
+        self.assertEqual(inventory_front.flush(), 3)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.availability, 2)
+        self.assertEqual(self.ticket.held, 3)
+        self.assertEqual(self.counters(), {"left": 2, "pending": 0})
+        self.assertEqual(inventory_front.flush(), 0)
+
+    def test_sold_out_in_front(self):
+        self.book(3)
+        response = self.book(3)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()["detail"], BookedMoreSeatAPIException.default_detail
+        )
+        self.assertEqual(self.counters(), {"left": 2, "pending": 3})
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_rolled_back_booking_releases_claims(self):
+        with self.assertRaises(RuntimeError):
+            with booking_transaction():
+                reserve_seats([(self.ticket.id, 4)])
+                raise RuntimeError()
+        self.assertEqual(self.counters(), {"left": 5, "pending": 0})
+
+    def test_unavailable_front_falls_back_to_database(self):
+        with override_settings(
+            EBS_INVENTORY_FRONT={
+                **INVENTORY_FRONT,
+                "BACKEND": "ebs_app.tests.test_reservations.BrokenInventoryBackend",
+            }
+        ):
+            response = self.book(2)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.availability, 3)
+
+    def test_reconcile_repairs_drift(self):
+        self.book(1)
+        Ticket.objects.filter(id=self.ticket.id).update(availability=10)
+        self.assertEqual(inventory_front.reconcile(), 1)
+        self.assertEqual(self.counters()["left"], 9)
+
+    def test_reconcile_keeps_claims_in_progress(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with booking_transaction():
+                reserve_seats([(self.ticket.id, 4)])
+                self.assertEqual(inventory_front.reconcile(), 0)
+        self.assertEqual(self.counters(), {"left": 1, "pending": 4})
+        self.assertEqual(self.book(2).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reconcile_during_flush(self):
+        self.book(3)
+        midway = []
+
+        def run_midway(ticket_ids):
+            # The tickets are updated, the transaction of the flush is not committed.
+            midway.append((inventory_front.reconcile(), inventory_front.flush()))
+            inventory_front.warm_up()
+
+        with mock.patch(
+            "ebs_app.services.inventory_front.availability_push.tickets_changed",
+            side_effect=run_midway,
+        ):
+            self.assertEqual(inventory_front.flush(), 3)
+        self.assertEqual(midway, [(0, 0)])
+        self.assertEqual(self.counters(), {"left": 2, "pending": 0})
+        self.assertEqual((self.ticket.availability, self.ticket.held), (2, 3))
+
+    def test_reconcile_releases_abandoned_claims(self):
+        # Claimed by a booking whose worker died before its transaction ended.
+        inventory_front.claim({self.ticket.id: 2})
+        self.assertEqual(inventory_front.reconcile(), 0)
+        self.book(1)
+        self.assertEqual(inventory_front.reconcile(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory_front.refresh([self.ticket.id])
+        self.assertEqual(self.counters(), {"left": 2, "pending": 1})
+        self.assertEqual(inventory_front.reconcile(), 1)
+        self.assertEqual(self.counters(), {"left": 4, "pending": 1})
+
+    def test_bulk_bookings_claim_from_front(self):
+        staff = User.objects.create_user(username="boxoffice", is_staff=True)
+        self.client.force_authenticate(user=staff)
+        item = {
+            "customer": self.user.customer.id,
+            "sub_bookings": [{"ticket": self.ticket.id, "count": 2}],
+        }
+        with mock.patch(
+            "ebs_app.services.bulk_bookings.send_bulk_booking_confirmation_emails.delay"
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("bookings-bulk"),
+                    {"bookings": [item, item, item]},
+                    format="json",
+                )
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(
+            response.data["results"][2]["detail"],
+            BookedMoreSeatAPIException.default_detail,
+        )
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.availability, 5)
+        self.assertEqual(self.counters(), {"left": 1, "pending": 4})
+
+
+class ConcurrentIdempotentBookingTestCase(TransactionTestCase):
+    """
+    Concurrent duplicates of a request wait for the first one instead of booking twice.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="retrying")
+        CustomerFactory(user=self.user)
+        event = Event.objects.create(
+            event_name="Retry Event",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+        )
+        self.ticket = Ticket.objects.create(
+            event=event, total_allotment=10, availability=10, price=100
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_concurrent_duplicates_book_once(self):
+        responses = []
+
+        def slow_reserve_seats(lines):
+            time.sleep(0.3)
+            return reserve_seats(lines)
+
+        def book():
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            try:
+                responses.append(
+                    client.post(
+                        reverse("bookings-list"),
+                        {"sub_bookings": [{"ticket": self.ticket.id, "count": 2}]},
+                        format="json",
+                        HTTP_IDEMPOTENCY_KEY="double-tap",
+                    )
+                )
+            finally:
+                connection.close()
+
+        with mock.patch(
+            "ebs_app.views.bookings_views.reserve_seats", side_effect=slow_reserve_seats
+        ):
+            threads = [threading.Thread(target=book) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=30)
+
+        self.assertEqual([r.status_code for r in responses], [201, 201, 201])
+        self.assertEqual(len({r.data["id"] for r in responses}), 1)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.availability, 8)
+
+
+class ConcurrentCancellationTestCase(TransactionTestCase):
+    """
+    Concurrent cancellations of a booking give its seats back only once.
+    """
+
+    workers = 6
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="canceller")
+        self.customer = CustomerFactory(user=self.user)
+        event = Event.objects.create(
+            event_name="Cancel Event",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+        )
+        self.tickets = [
+            Ticket.objects.create(
+                event=event, total_allotment=10, availability=6, price=100
+            )
+            for _ in range(2)
+        ]
+        self.booking = Booking.objects.create(customer=self.customer, status="BOOKED")
+        SubBooking.objects.bulk_create(
+            [
+                SubBooking(booking=self.booking, ticket=ticket, count=4)
+                for ticket in self.tickets
+            ]
+        )
+
+    def test_concurrent_cancellations(self):
+        codes = []
+        barrier = threading.Barrier(self.workers)
+
+        def cancel():
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            url = reverse("cancel_booking", kwargs={"pk": self.booking.id})
+            barrier.wait()
+            try:
+                # SQLite serialises writers, a busy database is retried like a client would.
+                for _attempt in range(50):
+                    try:
+                        codes.append(client.patch(url).status_code)
+                        break
+                    except OperationalError:
+                        time.sleep(0.01)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=cancel) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+
+        # The shared cache SQLite test database may report a committed cancellation
+        # as locked, its retry then sees the booking cancelled. No cancellation may
+        # succeed twice either way.
+        self.assertEqual(len(codes), self.workers)
+        self.assertLessEqual(codes.count(200), 1)
+        self.assertEqual(codes.count(400), self.workers - codes.count(200))
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, "CANCELLED")
+        for ticket in self.tickets:
+            ticket.refresh_from_db()
+            self.assertEqual(ticket.availability, 10)
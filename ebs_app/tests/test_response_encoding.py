@@ -0,0 +1,157 @@
+import gzip
+import json
+import unittest
+from datetime import datetime, timezone
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APIClient
+from ebs_app import middleware
+from ebs_app.middleware import negotiate
+from ebs_app.models.events import Event
+from ebs_app.renderers import FastJSONRenderer, OrjsonEncoder, StdlibEncoder
+from ebs_app.tests.factories import EventOrganiserFactory
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DATA = {
+    "results": [
+        {
+            "id": 1,
+            "name": "Friday Party   é",
+            "when": datetime(2023, 8, 25, 20, 0, 0, 123456, tzinfo=timezone.utc),
+            "price": Decimal("149.50"),
+            "detail": ErrorDetail("Not found.", code="not_found"),
+            "tags": ["a", None, True, 1.5],
+            7: "non string key",
+        }
+    ],
+    "next": None,
+}
+
+
+class RendererTestCase(SimpleTestCase):
+    def test_stdlib_encoder_matches_drf(self):
+        self.assertEqual(StdlibEncoder().dumps(DATA), JSONRenderer().render(DATA))
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_orjson_encoder_matches_drf(self):
+        self.assertEqual(OrjsonEncoder().dumps(DATA), JSONRenderer().render(DATA))
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_orjson_falls_back_on_unsupported_data(self):
+        data = {"big": 2**70}
+        self.assertEqual(OrjsonEncoder().dumps(data), JSONRenderer().render(data))
+
+    def test_indented_output_is_rendered_by_drf(self):
+        context = {"indent": 4}
+        self.assertEqual(
+            FastJSONRenderer().render(DATA, renderer_context=context),
+            JSONRenderer().render(DATA, renderer_context=context),
+        )
+
+    @override_settings(EBS_JSON_RENDERER={"ENCODER": "ebs_app.missing.Encoder"})
+    def test_missing_encoder_falls_back_to_the_json_module(self):
+        with self.assertLogs("ebs_app.renderers", level="WARNING"):
+            self.assertEqual(
+                FastJSONRenderer().render(DATA), JSONRenderer().render(DATA)
+            )
+
+
+class NegotiationTestCase(SimpleTestCase):
+    def test_negotiate(self):
+        encodings = ["br", "gzip"]
+        cases = [
+            ("", None),
+            ("identity", None),
+            ("gzip", "gzip"),
+            ("gzip, deflate, br", "br"),
+            ("br;q=0.5, gzip", "gzip"),
+            ("br;q=0, gzip;q=0.1", "gzip"),
+            ("*", "br"),
+            ("*;q=0.5, gzip", "gzip"),
+            ("GZIP;q=bad", None),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(negotiate(header, encodings), expected)
+
+    def test_brotli_is_only_offered_when_installed(self):
+        config = middleware.get_config()
+        if middleware.brotli is None:
+            self.assertEqual(middleware.get_encodings(config), ["gzip"])
+        else:
+            self.assertEqual(middleware.get_encodings(config), ["br", "gzip"])
+
+
+@override_settings(EBS_COMPRESSION={"MIN_SIZE": 1024, "ENCODINGS": ["gzip"]})
+class CompressionTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        organiser = EventOrganiserFactory(
+            user=User.objects.create_user(username="organiser")
+        )
+        self.client.force_authenticate(user=organiser.user)
+        Event.objects.bulk_create(
+            [
+                Event(
+                    event_name=f"Event {index}",
+                    event_description="A casual event on Friday",
+                    event_date_time="2023-08-25T20:00Z",
+                    venue="CP",
+                    event_organiser=organiser,
+                )
+                for index in range(50)
+            ]
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_large_responses_are_compressed(self):
+        plain = self.client.get(reverse("events-list"))
+        compressed = self.client.get(
+            reverse("events-list"), HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", compressed["Vary"])
+        self.assertLess(len(compressed.content), len(plain.content) / 4)
+        self.assertEqual(
+            json.loads(gzip.decompress(compressed.content)), json.loads(plain.content)
+        )
+        self.assertEqual(compressed["ETag"], "W/" + plain["ETag"])
+
+    def test_weak_etag_still_matches(self):
+        compressed = self.client.get(
+            reverse("events-list"), HTTP_ACCEPT_ENCODING="gzip"
+        )
+        response = self.client.get(
+            reverse("events-list"),
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_IF_NONE_MATCH=compressed["ETag"],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_small_responses_are_not_compressed(self):
+        event = Event.objects.first()
+        response = self.client.get(
+            reverse("events-detail", kwargs={"pk": event.id}),
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Encoding", response)
+
+    @override_settings(EBS_COMPRESSION={"ENABLED": False})
+    def test_disabled(self):
+        response = self.client.get(reverse("events-list"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
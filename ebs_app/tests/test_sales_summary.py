@@ -0,0 +1,295 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.models.bookings import Booking, SubBooking
+from ebs_app.models.choices import BookingStatus, TicketChoices
+from ebs_app.models.events import Event
+from ebs_app.models.sales import SalesSummary
+from ebs_app.models.tickets import Ticket
+from ebs_app.services import sales_summary
+from ebs_app.services.cancellations import (
+    run_event_cancellation,
+    start_event_cancellation,
+)
+from ebs_app.services.holds import release_expired_holds
+from ebs_app.tests.factories import CustomerFactory, EventOrganiserFactory
+
+
+@patch("ebs_app.views.bookings_views.send_booking_confirmation_email.delay")
+class SalesSummaryTestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory(
+            user=User.objects.create_user(username="organiser")
+        )
+        self.customer = CustomerFactory(user=User.objects.create_user(username="fan"))
+        self.event = self.create_event(self.organiser)
+        self.general = Ticket.objects.create(
+            event=self.event, total_allotment=100, availability=100, price=10
+        )
+        self.vip = Ticket.objects.create(
+            event=self.event,
+            ticket_type=TicketChoices.VIP,
+            total_allotment=10,
+            availability=10,
+            price=50,
+        )
+
+    def create_event(self, organiser):
+        return Event.objects.create(
+            event_name="Friday Party",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+            event_organiser=organiser,
+        )
+
+    def book(self, *lines, confirm=True):
+        self.client.force_authenticate(user=self.customer.user)
+        response = self.client.post(
+            reverse("bookings-list"),
+            {
+                "sub_bookings": [
+                    {"ticket": ticket.id, "count": count} for ticket, count in lines
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        if confirm:
+            response = self.client.post(
+                reverse("bookings-confirm", kwargs={"pk": response.data["id"]})
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["id"]
+
+    def cancel(self, booking_id):
+        self.client.force_authenticate(user=self.customer.user)
+        response = self.client.patch(
+            reverse("cancel_booking", kwargs={"pk": booking_id})
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def sales(self):
+        return {
+            summary.ticket_type: (summary.sold, summary.revenue, summary.cancelled)
+            for summary in SalesSummary.objects.filter(event=self.event)
+        }
+
+    def test_confirmed_bookings_are_sold(self, _mock_email):
+        self.book((self.general, 3), (self.vip, 1))
+        self.book((self.general, 2), (self.general, 1))
+        self.assertEqual(
+            self.sales(),
+            {
+                TicketChoices.GENERAL_ADMISSION: (6, 60, 0),
+                TicketChoices.VIP: (1, 50, 0),
+            },
+        )
+
+    def test_holds_are_not_sold(self, _mock_email):
+        pending = self.book((self.general, 3), confirm=False)
+        expired = self.book((self.general, 2), confirm=False)
+        Booking.objects.filter(id=expired).update(
+            hold_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.cancel(pending)
+        release_expired_holds()
+        self.assertEqual(self.sales(), {})
+
+    def test_cancellations_move_sold_seats(self, _mock_email):
+        first = self.book((self.general, 3), (self.vip, 1))
+        self.book((self.general, 1))
+        self.cancel(first)
+        self.assertEqual(
+            self.sales(),
+            {TicketChoices.GENERAL_ADMISSION: (1, 10, 3), TicketChoices.VIP: (0, 0, 1)},
+        )
+        summary = SalesSummary.objects.get(ticket_type=TicketChoices.GENERAL_ADMISSION)
+        self.assertEqual(summary.cancellation_rate, 75.0)
+
+    @patch("ebs_app.services.cancellations.send_event_cancelled_email.delay")
+    @patch("ebs_app.services.cancellations.cancel_event_bookings.delay")
+    def test_event_cancellation(self, _mock_job, _mock_cancelled, _mock_email):
+        for _ in range(3):
+            self.book((self.general, 2))
+        self.book((self.vip, 1), confirm=False)
+        job = start_event_cancellation(self.event, self.organiser)
+        run_event_cancellation(job.id, chunk_size=2)
+        self.assertEqual(self.sales(), {TicketChoices.GENERAL_ADMISSION: (0, 0, 6)})
+
+    @patch("ebs_app.services.bulk_bookings.send_bulk_booking_confirmation_emails.delay")
+    def test_bulk_bookings_are_sold(self, _mock_bulk, _mock_email):
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="boxoffice", is_staff=True)
+        )
+        response = self.client.post(
+            reverse("bookings-bulk"),
+            {
+                "bookings": [
+                    {
+                        "customer": self.customer.id,
+                        "sub_bookings": [{"ticket": self.vip.id, "count": 2}],
+                    }
+                ]
+                * 2
+            },
+            format="json",
+        )
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(self.sales(), {TicketChoices.VIP: (4, 200, 0)})
+
+    def test_failed_booking_paths_leave_the_summary(self, _mock_email):
+        booking_id = self.book((self.general, 3))
+        self.client.force_authenticate(user=self.customer.user)
+        response = self.client.post(
+            reverse("bookings-confirm", kwargs={"pk": booking_id})
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.cancel(booking_id)
+        response = self.client.patch(
+            reverse("cancel_booking", kwargs={"pk": booking_id})
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.sales(), {TicketChoices.GENERAL_ADMISSION: (0, 0, 3)})
+
+    def test_reconcile(self, _mock_email):
+        cancelled = self.book((self.general, 3))
+        self.book((self.vip, 2))
+        self.cancel(cancelled)
+        expected = self.sales()
+        self.assertEqual(sales_summary.reconcile(), 0)
+
+        # Bookings written by other means, and a summary drifting from them.
+        booking = Booking.objects.create(
+            customer=self.customer, status=BookingStatus.BOOKED
+        )
+        SubBooking.objects.create(
+            booking=booking, ticket=self.general, count=4, price=10
+        )
+        SalesSummary.objects.filter(ticket_type=TicketChoices.VIP).update(sold=99)
+        other = Ticket.objects.create(
+            event=self.create_event(self.organiser), price=5, availability=10
+        )
+        SubBooking.objects.create(booking=booking, ticket=other, count=1, price=5)
+
+        out = StringIO()
+        call_command("reconcile_sales_summary", "--batch-size", "1", stdout=out)
+        self.assertIn("Corrected 3 sales summaries", out.getvalue())
+        self.assertEqual(
+            self.sales(),
+            {**expected, TicketChoices.GENERAL_ADMISSION: (4, 40, 3)},
+        )
+        self.assertEqual(SalesSummary.objects.get(event=other.event).revenue, 5)
+
+        # Summaries whose bookings are gone are zeroed.
+        Booking.objects.all().delete()
+        self.assertEqual(sales_summary.reconcile(event_ids=[self.event.id]), 2)
+        self.assertEqual(set(self.sales().values()), {(0, 0, 0)})
+
+    def test_price_changes_keep_past_revenue(self, _mock_email):
+        cancelled = self.book((self.general, 2))
+        self.book((self.general, 3))
+        Ticket.objects.filter(id=self.general.id).update(price=20)
+        self.book((self.general, 1))
+        self.cancel(cancelled)
+        self.assertEqual(self.sales(), {TicketChoices.GENERAL_ADMISSION: (4, 50, 2)})
+        self.assertEqual(sales_summary.reconcile(), 0)
+
+    def test_reconcile_with_summaries_created_meanwhile(self, _mock_email):
+        self.book((self.general, 3))
+        SalesSummary.objects.all().delete()
+        expected_sales = sales_summary._expected_sales
+        booking = Booking.objects.create(
+            customer=self.customer, status=BookingStatus.BOOKED
+        )
+        SubBooking.objects.create(
+            booking=booking, ticket=self.general, count=2, price=10
+        )
+
+        def book_then_sum(event_ids):
+            # The booking is recorded between the lock of the summaries and the
+            # insertion of the missing ones.
+            sales = expected_sales(event_ids)
+            if not SalesSummary.objects.exists():
+                sales_summary.record_sales([booking.id])
+            return sales
+
+        with patch(
+            "ebs_app.services.sales_summary._expected_sales", side_effect=book_then_sum
+        ):
+            self.assertEqual(sales_summary.reconcile(), 1)
+        self.assertEqual(self.sales(), {TicketChoices.GENERAL_ADMISSION: (5, 50, 0)})
+
+
+class SalesDashboardTestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory(
+            user=User.objects.create_user(username="organiser")
+        )
+        self.events = [
+            Event.objects.create(
+                event_name=f"Event {index}",
+                event_date_time="2023-08-25T20:00Z",
+                venue="CP",
+                event_organiser=organiser,
+            )
+            for index, organiser in enumerate(
+                [self.organiser, self.organiser, EventOrganiserFactory()]
+            )
+        ]
+        for event in self.events:
+            for ticket_type in (TicketChoices.GENERAL_ADMISSION, TicketChoices.VIP):
+                SalesSummary.objects.create(
+                    event=event,
+                    ticket_type=ticket_type,
+                    sold=8,
+                    revenue=80,
+                    cancelled=2,
+                )
+        self.client.force_authenticate(user=self.organiser.user)
+        self.url = reverse("sales-list")
+
+    def test_lists_the_sales_of_the_organiser(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(
+            [(row["event"], row["ticket_type"]) for row in results],
+            [
+                (event.id, ticket_type)
+                for event in self.events[:2]
+                for ticket_type in (TicketChoices.GENERAL_ADMISSION, TicketChoices.VIP)
+            ],
+        )
+        self.assertEqual(results[0]["event_name"], "Event 0")
+        self.assertEqual(results[0]["cancellation_rate"], 20.0)
+
+    def test_filters(self):
+        response = self.client.get(
+            self.url, {"event": self.events[1].id, "ticket_type": TicketChoices.VIP}
+        )
+        self.assertEqual(
+            [(row["event"], row["ticket_type"]) for row in response.data["results"]],
+            [(self.events[1].id, TicketChoices.VIP)],
+        )
+        for params in ({"event": "x"}, {"ticket_type": "BALCONY"}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_only_organisers(self):
+        self.client.force_authenticate(user=CustomerFactory().user)
+        self.assertEqual(
+            self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN
+        )
+        other = SalesSummary.objects.filter(event=self.events[2]).first()
+        self.client.force_authenticate(user=self.organiser.user)
+        response = self.client.get(reverse("sales-detail", kwargs={"pk": other.id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,137 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.models.bookings import Booking, SubBooking
+from ebs_app.models.choices import BookingStatus
+from ebs_app.models.events import Event
+from ebs_app.models.tickets import Ticket
+from ebs_app.services.reservations import configure_shards
+from ebs_app.tests.factories import CustomerFactory, EventOrganiserFactory
+
+
+class SparseFieldsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory(
+            user=User.objects.create_user(username="organiser")
+        )
+        self.customer = CustomerFactory(
+            user=User.objects.create_user(username="customer")
+        )
+        self.event = Event.objects.create(
+            event_name="Friday Party",
+            event_description="A casual event on Friday",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+            event_organiser=self.organiser,
+        )
+        self.ticket = Ticket.objects.create(
+            event=self.event, total_allotment=100, availability=100, price=100
+        )
+        configure_shards(self.ticket.id, 4)
+        self.booking = Booking.objects.create(
+            customer=self.customer, status=BookingStatus.BOOKED, total_price=100
+        )
+        SubBooking.objects.create(booking=self.booking, ticket=self.ticket, count=1)
+
+    def tearDown(self):
+        cache.clear()
+
+    def get(self, url, params):
+        # A fresh user per request, as the authentication would load it.
+        self.client.force_authenticate(user=User.objects.get(pk=self.customer.user.pk))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        return response, [query["sql"] for query in queries.captured_queries]
+
+    def test_full_objects_without_selection(self):
+        response, _ = self.get(reverse("events-list"), {})
+
+        event = response.data["results"][0]
+        self.assertIn("event_description", event)
+        self.assertEqual(event["event_organiser"]["user"]["username"], "organiser")
+
+    def test_event_fields(self):
+        response, queries = self.get(
+            reverse("events-list"), {"fields": "id,event_name,event_date_time"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.data["results"][0]), {"id", "event_name", "event_date_time"}
+        )
+        select = [sql for sql in queries if 'FROM "ebs_app_event"' in sql][-1]
+        self.assertIn('"event_name"', select)
+        self.assertNotIn('"event_description"', select)
+        self.assertNotIn("JOIN", select)
+
+    def test_nested_object_given_by_id_unless_expanded(self):
+        url = reverse("events-detail", kwargs={"pk": self.event.id})
+
+        response, queries = self.get(url, {"fields": "id,event_organiser"})
+        self.assertEqual(
+            response.data, {"id": self.event.id, "event_organiser": self.organiser.id}
+        )
+        self.assertFalse(
+            any("ebs_app_event" in sql and "JOIN" in sql for sql in queries)
+        )
+
+        response, queries = self.get(
+            url, {"fields": "id,event_organiser", "expand": "event_organiser"}
+        )
+        self.assertEqual(
+            response.data["event_organiser"]["user"]["username"], "organiser"
+        )
+        self.assertTrue(
+            any("ebs_app_event" in sql and "JOIN" in sql for sql in queries)
+        )
+
+    def test_expand_keeps_all_fields(self):
+        response, _ = self.get(reverse("events-list"), {"expand": "event_organiser"})
+
+        event = response.data["results"][0]
+        self.assertIn("event_description", event)
+        self.assertIn("user", event["event_organiser"])
+
+    def test_ticket_availability_reads_the_shards(self):
+        response, queries = self.get(
+            reverse("tickets-list"), {"fields": "id,availability"}
+        )
+
+        self.assertEqual(
+            response.data["results"], [{"id": self.ticket.id, "availability": 100}]
+        )
+        select = [sql for sql in queries if 'FROM "ebs_app_ticket"' in sql][-1]
+        self.assertNotIn('"price"', select)
+
+    def test_booking_sub_bookings_only_fetched_when_requested(self):
+        response, queries = self.get(
+            reverse("bookings-list"), {"fields": "id,status,customer"}
+        )
+
+        self.assertEqual(
+            response.data["results"],
+            [{"id": self.booking.id, "status": "BOOKED", "customer": self.customer.id}],
+        )
+        self.assertFalse(any("ebs_app_subbooking" in sql for sql in queries))
+
+        response, queries = self.get(
+            reverse("bookings-list"),
+            {"fields": "id,customer,sub_bookings", "expand": "customer"},
+        )
+        booking = response.data["results"][0]
+        self.assertEqual(booking["customer"]["user"]["username"], "customer")
+        self.assertEqual(len(booking["sub_bookings"]), 1)
+
+    def test_unknown_fields_are_rejected(self):
+        for params in (
+            {"fields": "id,password"},
+            {"fields": ""},
+            {"expand": "venue"},
+        ):
+            response, _ = self.get(reverse("events-list"), params)
+            self.assertEqual(response.status_code, 400, params)
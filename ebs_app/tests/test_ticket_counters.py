@@ -0,0 +1,315 @@
+from datetime import timedelta
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.models.availability import EventAvailability
+from ebs_app.models.bookings import Booking
+from ebs_app.models.choices import TicketChoices
+from ebs_app.models.events import Event
+from ebs_app.models.tickets import Ticket
+from ebs_app.services import event_availability
+from ebs_app.services.cancellations import (
+    run_event_cancellation,
+    start_event_cancellation,
+)
+from ebs_app.services.holds import release_expired_holds
+from ebs_app.services.reservations import configure_shards
+from ebs_app.tasks import refresh_event_availability
+from ebs_app.tests.factories import CustomerFactory, EventOrganiserFactory
+from ebs_app.views.tickets_views import TicketViewSet
+
+
+@patch("ebs_app.views.bookings_views.send_booking_confirmation_email.delay")
+class TicketCountersTestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory(
+            user=User.objects.create_user(username="organiser")
+        )
+        self.customer = CustomerFactory(user=User.objects.create_user(username="fan"))
+        self.event = Event.objects.create(
+            event_name="Friday Party",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+            event_organiser=self.organiser,
+        )
+        self.ticket = Ticket.objects.create(
+            event=self.event, total_allotment=20, availability=20, price=10
+        )
+        self.sharded = Ticket.objects.create(
+            event=self.event,
+            ticket_type=TicketChoices.VIP,
+            total_allotment=20,
+            availability=20,
+            price=50,
+        )
+        configure_shards(self.sharded.id, 4)
+
+    def book(self, *lines, confirm=True):
+        self.client.force_authenticate(user=self.customer.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("bookings-list"),
+                {
+                    "sub_bookings": [
+                        {"ticket": ticket.id, "count": count} for ticket, count in lines
+                    ]
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        if confirm:
+            response = self.client.post(
+                reverse("bookings-confirm", kwargs={"pk": response.data["id"]})
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["id"]
+
+    def cancel(self, booking_id):
+        self.client.force_authenticate(user=self.customer.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("cancel_booking", kwargs={"pk": booking_id})
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def counters(self, ticket):
+        ticket = Ticket.objects.with_availability().get(id=ticket.id)
+        return ticket.current_availability, ticket.current_held, ticket.sold
+
+    def test_holds_confirmations_and_cancellations(self, _mock_email):
+        held = self.book((self.ticket, 3), (self.sharded, 2), confirm=False)
+        self.assertEqual(self.counters(self.ticket), (17, 3, 0))
+        self.assertEqual(self.counters(self.sharded), (18, 2, 0))
+
+        booked = self.book((self.ticket, 4), (self.sharded, 5))
+        self.assertEqual(self.counters(self.ticket), (13, 3, 4))
+        self.assertEqual(self.counters(self.sharded), (13, 2, 5))
+
+        self.cancel(held)
+        self.cancel(booked)
+        self.assertEqual(self.counters(self.ticket), (20, 0, 0))
+        self.assertEqual(self.counters(self.sharded), (20, 0, 0))
+
+    def test_expired_holds(self, _mock_email):
+        self.book((self.ticket, 3), (self.sharded, 2))
+        expired = self.book((self.ticket, 1), (self.sharded, 6), confirm=False)
+        Booking.objects.filter(id=expired).update(
+            hold_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(release_expired_holds(), 1)
+        self.assertEqual(self.counters(self.ticket), (17, 0, 3))
+        self.assertEqual(self.counters(self.sharded), (18, 0, 2))
+
+    def test_resharding_keeps_held_seats(self, _mock_email):
+        self.book((self.sharded, 6), confirm=False)
+        configure_shards(self.sharded.id, 1)
+        self.sharded.refresh_from_db()
+        self.assertEqual((self.sharded.availability, self.sharded.held), (14, 6))
+
+    @patch("ebs_app.services.bulk_bookings.send_bulk_booking_confirmation_emails.delay")
+    def test_bulk_bookings_are_sold(self, _mock_bulk, _mock_email):
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="boxoffice", is_staff=True)
+        )
+        response = self.client.post(
+            reverse("bookings-bulk"),
+            {
+                "bookings": [
+                    {
+                        "customer": self.customer.id,
+                        "sub_bookings": [
+                            {"ticket": self.ticket.id, "count": 2},
+                            {"ticket": self.sharded.id, "count": 3},
+                        ],
+                    }
+                ]
+                * 2
+            },
+            format="json",
+        )
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(self.counters(self.ticket), (16, 0, 4))
+        self.assertEqual(self.counters(self.sharded), (14, 0, 6))
+
+    @patch("ebs_app.services.cancellations.send_event_cancelled_email.delay")
+    @patch("ebs_app.services.cancellations.cancel_event_bookings.delay")
+    def test_event_cancellation(self, _mock_job, _mock_cancelled, _mock_email):
+        for _ in range(3):
+            self.book((self.ticket, 2), (self.sharded, 1))
+        self.book((self.sharded, 4), confirm=False)
+        job = start_event_cancellation(self.event, self.organiser)
+        run_event_cancellation(job.id, chunk_size=2)
+        self.assertEqual(self.counters(self.ticket), (20, 0, 0))
+        self.assertEqual(self.counters(self.sharded), (20, 0, 0))
+
+    def test_counters_are_read_only(self, _mock_email):
+        self.book((self.ticket, 3))
+        self.book((self.ticket, 2), confirm=False)
+        self.client.force_authenticate(user=self.organiser.user)
+        url = reverse("tickets-detail", kwargs={"pk": self.ticket.id})
+        response = self.client.patch(
+            url, {"availability": 50, "sold": 0, "held": 0}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.counters(self.ticket), (50, 2, 3))
+
+        response = self.client.get(
+            reverse("tickets-detail", kwargs={"pk": self.sharded.id})
+        )
+        self.assertEqual(response.data["held"], 0)
+        self.book((self.sharded, 4), confirm=False)
+        response = self.client.get(reverse("tickets-list"), {"fields": "id,held,sold"})
+        self.assertEqual(
+            [(row["held"], row["sold"]) for row in response.data["results"]],
+            [(2, 3), (4, 0)],
+        )
+
+    def test_edits_keep_concurrent_bookings(self, _mock_email):
+        perform_update = TicketViewSet.perform_update
+
+        def book_then_update(view, serializer):
+            # A booking lands after the ticket of the edit was read.
+            self.book((self.ticket, 3), confirm=False)
+            self.book((self.ticket, 2))
+            perform_update(view, serializer)
+
+        self.client.force_authenticate(user=self.organiser.user)
+        with patch.object(
+            TicketViewSet,
+            "perform_update",
+            autospec=True,
+            side_effect=book_then_update,
+        ):
+            response = self.client.patch(
+                reverse("tickets-detail", kwargs={"pk": self.ticket.id}),
+                {"price": 20},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.counters(self.ticket), (15, 3, 2))
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.price, 20)
+
+
+@override_settings(EBS_EVENT_CACHE={"ENABLED": False})
+@patch("ebs_app.views.bookings_views.send_booking_confirmation_email.delay")
+class EventAvailabilityTestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory(
+            user=User.objects.create_user(username="organiser")
+        )
+        self.customer = CustomerFactory(user=User.objects.create_user(username="fan"))
+        self.client.force_authenticate(user=self.organiser.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("events-list"),
+                {
+                    "event_name": "Friday Party",
+                    "event_date_time": "2023-08-25T20:00Z",
+                    "venue": "CP",
+                },
+                format="json",
+            )
+        self.event = Event.objects.get(id=response.data["id"])
+        self.cheap = self.create_ticket(availability=2, price=10)
+        self.dear = self.create_ticket(
+            availability=8, price=50, ticket_type=TicketChoices.VIP, shard_count=4
+        )
+
+    def create_ticket(self, **data):
+        self.client.force_authenticate(user=self.organiser.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("tickets-list"),
+                {"event": self.event.id, "total_allotment": 10, **data},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Ticket.objects.get(id=response.data["id"])
+
+    def book(self, ticket, count):
+        self.client.force_authenticate(user=self.customer.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("bookings-list"),
+                {"sub_bookings": [{"ticket": ticket.id, "count": count}]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["id"]
+
+    def rollup(self):
+        availability = EventAvailability.objects.get(event=self.event)
+        return (
+            availability.remaining,
+            availability.cheapest_price,
+            availability.sold_out,
+        )
+
+    def test_rollup_follows_the_bookings(self, _mock_email):
+        self.assertEqual(self.rollup(), (10, 10, False))
+        booking_id = self.book(self.cheap, 2)
+        self.assertEqual(self.rollup(), (8, 50, False))
+        self.book(self.dear, 8)
+        self.assertEqual(self.rollup(), (0, None, True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse("cancel_booking", kwargs={"pk": booking_id}))
+        self.assertEqual(self.rollup(), (2, 10, False))
+
+    def test_rollup_follows_the_tickets(self, _mock_email):
+        self.client.force_authenticate(user=self.organiser.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse("tickets-detail", kwargs={"pk": self.dear.id}),
+                {"price": 5},
+                format="json",
+            )
+        self.assertEqual(self.rollup(), (10, 5, False))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("tickets-detail", kwargs={"pk": self.dear.id}))
+        self.assertEqual(self.rollup(), (2, 10, False))
+
+    def test_events_without_tickets_are_not_sold_out(self, _mock_email):
+        Ticket.objects.filter(event=self.event).delete()
+        event_availability.refresh([self.event.id])
+        self.assertEqual(self.rollup(), (0, None, False))
+
+    def test_rebuild_repairs_lost_refreshes(self, _mock_email):
+        with override_settings(EBS_EVENT_AVAILABILITY={"ENABLED": False}):
+            self.book(self.cheap, 2)
+        EventAvailability.objects.all().delete()
+        self.assertEqual(refresh_event_availability(), 1)
+        self.assertEqual(self.rollup(), (8, 50, False))
+
+    def test_event_detail(self, _mock_email):
+        self.book(self.dear, 3)
+        self.client.force_authenticate(user=self.customer.user)
+        url = reverse("events-detail", kwargs={"pk": self.event.id})
+        response = self.client.get(url)
+        self.assertNotIn("availability", response.data)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {"expand": "availability"})
+        self.assertEqual(response.data["availability"]["remaining"], 7)
+        self.assertFalse(response.data["availability"]["sold_out"])
+
+        # Bookings change the rollup, a conditional GET sees it.
+        etag = response["ETag"]
+        self.book(self.cheap, 2)
+        self.client.force_authenticate(user=self.customer.user)
+        response = self.client.get(
+            url, {"expand": "availability"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["availability"]["cheapest_price"], 50)
+
+        EventAvailability.objects.all().delete()
+        response = self.client.get(url, {"expand": "availability"})
+        self.assertIsNone(response.data["availability"])
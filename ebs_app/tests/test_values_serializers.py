@@ -0,0 +1,157 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.serializers import ModelSerializer, SerializerMethodField
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.models.bookings import Booking, SubBooking
+from ebs_app.models.choices import BookingStatus, TicketChoices
+from ebs_app.models.events import Event
+from ebs_app.models.tickets import Ticket
+from ebs_app.serializers.booking_serializers import BookingSerializer
+from ebs_app.serializers.ticket_serializers import TicketSerializer
+from ebs_app.serializers.values_serializers import (
+    BookingValuesSerializer,
+    TicketValuesSerializer,
+    ValuesSerializer,
+)
+from ebs_app.services.reservations import configure_shards
+from ebs_app.tests.factories import CustomerFactory, EventOrganiserFactory
+
+
+class ValuesSerializerParityTestCase(APITestCase):
+    """
+    The values serializers give the same output as the ModelSerializers.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.organiser = EventOrganiserFactory(
+            user=User.objects.create_user(username="organiser", email="o@example.com")
+        )
+        self.customer = CustomerFactory(
+            user=User.objects.create_user(
+                username="customer", first_name="Ada", email="c@example.com"
+            )
+        )
+        self.other_customer = CustomerFactory(
+            user=User.objects.create_user(username="other")
+        )
+        self.tickets = []
+        for index in range(2):
+            event = Event.objects.create(
+                event_name=f"Event {index}",
+                event_date_time="2023-08-25T20:00Z",
+                venue="CP",
+                event_organiser=self.organiser,
+            )
+            for ticket_type in (TicketChoices.GENERAL_ADMISSION, TicketChoices.PREMIUM):
+                self.tickets.append(
+                    Ticket.objects.create(
+                        event=event,
+                        ticket_type=ticket_type,
+                        total_allotment=100,
+                        availability=100,
+                        price=100,
+                    )
+                )
+        configure_shards(self.tickets[1].id, 4)
+        Ticket.objects.filter(id=self.tickets[2].id).update(availability=0)
+
+        for index, customer in enumerate([self.customer] * 3 + [self.other_customer]):
+            booking = Booking.objects.create(
+                customer=customer,
+                status=BookingStatus.PENDING if index % 2 else BookingStatus.BOOKED,
+                total_price=100 * index,
+                hold_expires_at=timezone.now() + timedelta(minutes=index)
+                if index % 2
+                else None,
+            )
+            parity = index % 2
+            for ticket in self.tickets[parity::2]:
+                SubBooking.objects.create(
+                    booking=booking, ticket=ticket, count=index + 1
+                )
+        # A booking without lines.
+        Booking.objects.create(customer=self.customer, status=BookingStatus.CANCELLED)
+
+    def assertSameOutput(self, values_serializer_class, serializer_class, queryset):
+        serializer = serializer_class(queryset, many=True)
+        values_serializer = values_serializer_class(serializer_class())
+        rows = values_serializer.get_queryset(queryset)
+        self.assertEqual(values_serializer.serialize(rows), serializer.data)
+
+    def test_bookings(self):
+        self.assertSameOutput(
+            BookingValuesSerializer,
+            BookingSerializer,
+            Booking.objects.order_by("id"),
+        )
+
+    def test_tickets(self):
+        self.assertSameOutput(
+            TicketValuesSerializer,
+            TicketSerializer,
+            Ticket.objects.with_availability().order_by("id"),
+        )
+
+    def test_no_rows(self):
+        self.assertSameOutput(
+            BookingValuesSerializer, BookingSerializer, Booking.objects.none()
+        )
+
+    def test_fields_not_read_from_columns_are_rejected(self):
+        class MethodSerializer(ModelSerializer):
+            label = SerializerMethodField()
+
+            class Meta:
+                model = Ticket
+                fields = ["id", "label"]
+
+        with self.assertRaises(ImproperlyConfigured):
+            ValuesSerializer(MethodSerializer())
+
+    def get_both(self, user, url):
+        # A fresh user per request, as the authentication would load it.
+        self.client.force_authenticate(user=User.objects.get(pk=user.pk))
+        fast = self.client.get(url)
+        with override_settings(EBS_VALUES_SERIALIZERS={"ENABLED": False}):
+            slow = self.client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        return fast, slow
+
+    def test_endpoints(self):
+        bookings = reverse("bookings-list")
+        tickets = reverse("tickets-list")
+        event = self.tickets[0].event_id
+        cases = [
+            (self.customer.user, bookings),
+            (self.customer.user, f"{bookings}?status=BOOKED"),
+            (self.customer.user, f"{bookings}?page_size=2"),
+            (self.customer.user, f"{bookings}?fields=id,status,customer"),
+            (
+                self.customer.user,
+                f"{bookings}?fields=id,customer,sub_bookings&expand=customer",
+            ),
+            (self.organiser.user, f"{bookings}?event={event}&ticket_type=PREMIUM"),
+            (self.customer.user, tickets),
+            (self.customer.user, f"{tickets}?fields=id,availability"),
+            (self.customer.user, f"{tickets}?fields=id,price"),
+        ]
+        for user, url in cases:
+            with self.subTest(url=url):
+                fast, slow = self.get_both(user, url)
+                # Byte for byte, key order included.
+                self.assertEqual(fast.content, slow.content)
+
+    def test_following_pages(self):
+        url = f"{reverse('bookings-list')}?page_size=2"
+        pages = 0
+        while url:
+            fast, slow = self.get_both(self.customer.user, url)
+            self.assertEqual(fast.content, slow.content)
+            url = fast.data["next"]
+            pages += 1
+        self.assertEqual(pages, 2)
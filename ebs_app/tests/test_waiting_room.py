@@ -0,0 +1,114 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from ebs_app.models.bookings import Booking
+from ebs_app.models.events import Event
+from ebs_app.models.tickets import Ticket
+from ebs_app.services import waiting_room
+from ebs_app.tests.factories import CustomerFactory
+from ebs_app.exceptions import (
+    InvalidWaitingRoomTokenAPIException,
+    WaitingRoomTokenRequiredAPIException,
+    NotAdmittedYetAPIException,
+    AdmissionExpiredAPIException,
+)
+
+
+class WaitingRoomTestCase(APITestCase):
+    def setUp(self):
+        waiting_room.get_backend().clear()
+        self.users = [User.objects.create_user(username=f"queue{i}") for i in range(3)]
+        for user in self.users:
+            CustomerFactory(user=user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.users[0])
+        self.event = Event.objects.create(
+            event_name="On Sale",
+            event_date_time="2023-08-25T20:00Z",
+            venue="CP",
+            admission_rate=1,
+        )
+        self.ticket = Ticket.objects.create(
+            event=self.event, total_allotment=10, availability=10, price=100
+        )
+        self.open_ticket = Ticket.objects.create(
+            event=Event.objects.create(
+                event_name="Open Sale", event_date_time="2023-08-25T20:00Z", venue="CP"
+            ),
+            total_allotment=10,
+            availability=10,
+            price=100,
+        )
+        self.waiting_room_url = reverse(
+            "events-waiting-room", kwargs={"pk": self.event.id}
+        )
+
+    def tearDown(self):
+        waiting_room.get_backend().clear()
+
+    def book(self, ticket, token=None):
+        headers = {"HTTP_X_WAITING_ROOM_TOKEN": token} if token else {}
+        return self.client.post(
+            reverse("bookings-list"),
+            {"sub_bookings": [{"ticket": ticket.id, "count": 1}]},
+            format="json",
+            **headers,
+        )
+
+    def test_slots_are_spaced_by_admission_rate(self):
+        self.event.admission_rate = 30
+        statuses = [
+            waiting_room.join(self.event, user, now=1000) for user in self.users
+        ]
+        self.assertEqual([s["wait_seconds"] for s in statuses], [0, 2, 4])
+        self.assertEqual([s["ahead"] for s in statuses], [0, 1, 2])
+        self.assertEqual([s["admitted"] for s in statuses], [True, False, False])
+
+    def test_booking_requires_admitted_token(self):
+        response = self.book(self.ticket)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(
+            response.data["detail"], WaitingRoomTokenRequiredAPIException.default_detail
+        )
+
+        response = self.client.post(self.waiting_room_url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data["admitted"])
+        self.assertEqual(
+            self.book(self.ticket, response.data["token"]).status_code, 201
+        )
+
+        # One admission per minute, the next customer has to wait.
+        self.client.force_authenticate(user=self.users[1])
+        token = self.client.post(self.waiting_room_url).data["token"]
+        response = self.client.get(self.waiting_room_url, {"token": token})
+        self.assertFalse(response.data["admitted"])
+        self.assertEqual(response.data["ahead"], 0)
+        response = self.book(self.ticket, token)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(
+            response.data["detail"], NotAdmittedYetAPIException.default_detail
+        )
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_events_without_admission_rate_are_not_gated(self):
+        self.assertEqual(self.book(self.open_ticket).status_code, 201)
+
+    def test_admission_expires(self):
+        token = waiting_room.join(self.event, self.users[0], now=1000)["token"]
+        waiting_room.check_admission([self.ticket.id], token, self.users[0], now=1000)
+        with self.assertRaises(AdmissionExpiredAPIException):
+            waiting_room.check_admission(
+                [self.ticket.id], token, self.users[0], now=1601
+            )
+
+    def test_token_of_another_customer_is_rejected(self):
+        token = waiting_room.join(self.event, self.users[1])["token"]
+        response = self.book(self.ticket, token)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["detail"], InvalidWaitingRoomTokenAPIException.default_detail
+        )
+        response = self.client.get(self.waiting_room_url, {"token": "forged"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter
 from ebs_app.views.events_views import EventViewSet
 from ebs_app.views.bookings_views import BookingViewSet, CancelBooking
 from ebs_app.views.tickets_views import TicketViewSet
+from ebs_app.views.sales_views import SalesSummaryViewSet
 
 # Create a router for automatic URL routing
 router = DefaultRouter()
@@ -11,6 +12,7 @@ router = DefaultRouter()
 router.register("events", EventViewSet, basename="events")
 router.register("bookings", BookingViewSet, basename="bookings")
 router.register("tickets", TicketViewSet, basename="tickets")
+router.register("sales", SalesSummaryViewSet, basename="sales")
 
 # Define URL patterns
 urlpatterns = [
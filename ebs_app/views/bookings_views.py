@@ -12,6 +12,8 @@ Contents:
   - Allows creation and retrieval of bookings with proper permissions.
   - Retrieves booking data based on user roles.
   - Custom methods to perform booking creation and retrieve filtered queries.
+  - Confirms the seat hold of a pending booking.
+  - Creates bookings in bulk for box-office and partner channels.
 
 - CancelBooking: A custom view for cancelling bookings.
   - Allows cancellation of bookings by customers.
@@ -19,30 +21,39 @@ Contents:
 
 Note: This module is part of the ebs_app package and should be imported accordingly.
 """
-from django.db import transaction
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
-from ebs_app.models.bookings import Booking
-from ebs_app.models.tickets import Ticket
+from ebs_app.models.bookings import Booking, SubBooking
+from ebs_app.models.choices import BookingStatus, TicketChoices
+from ebs_app.pagination import BookingCursorPagination
+from ebs_app.sparse_fields import SparseFieldsViewMixin
 from users.customer.models import Customer
 from users.permissions import IsCustomer
-from ebs_app.serializers.booking_serializers import BookingSerializer, SubBookingSerializer
+from ebs_app.serializers.booking_serializers import BookingSerializer
+from ebs_app.serializers.values_serializers import (
+    BookingValuesSerializer,
+    ValuesListViewMixin,
+)
 from ebs_app.tasks import send_booking_confirmation_email
+from ebs_app.services import waiting_room
+from ebs_app.services.bulk_bookings import create_bulk_bookings
+from ebs_app.services.cancellations import cancel_booking
+from ebs_app.services.holds import confirm_hold, hold_expiry
+from ebs_app.services.idempotency import run_idempotent
+from ebs_app.services.reservations import booking_transaction, reserve_seats
 from ebs_app.exceptions import (
     NoCustomerAPIException,
-    TicketNotAvailableAPIException,
-    BookedMoreSeatAPIException,
+    NoTicketAPIException,
     NotAValidUserAPIException,
-    CancellationNotAllowedAPIException,
     ContentNotFoundAPIException,
     InvalidSubBookingDataAPIException,
-    TicketNotFoundAPIException,
-    AlreadyCancelledAPIException
+    InvalidBookingFilterAPIException,
 )
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(SparseFieldsViewMixin, ValuesListViewMixin, viewsets.ModelViewSet):
     """
     Booking View:
 
@@ -54,20 +65,46 @@ class BookingViewSet(viewsets.ModelViewSet):
     - POST: Exclusive to Customers.
       Creates a booking with the provided payload:
         payload: {
-            "ticket": <ticket_id>,
-            "count": <INT>
+            "sub_bookings": [
+                {"ticket": <ticket_id>, "count": <INT>},
+            ]
         }
+      Holds the seats in a PENDING booking until its hold_expires_at.
+      Events with an admission_rate require the X-Waiting-Room-Token header,
+      see POST /events/<id>/waiting_room/.
+      Retries sending the same Idempotency-Key header get the first response back.
       Returns Booking object.
 
+    - POST /bookings/<id>/confirm/: Exclusive to Customers.
+      Confirms the hold of a pending booking, the booking becomes BOOKED.
+
+    - POST /bookings/bulk/: Exclusive to staff accounts of box-office and partner channels.
+      Creates up to EBS_BULK_BOOKING_MAX_ITEMS BOOKED bookings on behalf of customers:
+        payload: {
+            "bookings": [
+                {"customer": <customer_id>, "sub_bookings": [{"ticket": <ticket_id>, "count": <INT>}]},
+            ]
+        }
+      Returns one result per booking, each booking succeeds or fails on its own.
+      Supports the Idempotency-Key header as well.
+
     - GET: Accessible by both Event Organizers and Customers.
-      Returns filtered booking data based on the user role:
+      Returns filtered booking data based on the user role, latest first,
+      in pages of ?page_size= bookings following the "next" cursor link:
         - If the user is a Customer, retrieves all bookings made by the requesting customer.
         - If the user is an Event Organizer,
           retrieves booking details for events organized by the requesting event organizer.
+      Filters: ?event=<event_id>, ?ticket_type=<TicketChoices>, ?status=<BookingStatus>.
+      ?fields= and ?expand=customer pick the fields of the bookings, only the
+      customer is joined and the sub bookings fetched when asked for,
+      see ebs_app.sparse_fields.
+      Lists are serialised from values() rows, see ebs_app.serializers.values_serializers.
     """
 
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
+    values_serializer_class = BookingValuesSerializer
+    pagination_class = BookingCursorPagination
     http_method_names = ["get", "post"]
 
     def get_permissions(self):
@@ -75,49 +112,74 @@ class BookingViewSet(viewsets.ModelViewSet):
         Get the list of permission classes based on the action.
 
         This method dynamically assigns permission classes based on the action being performed.
-        - For the "create" action, only authenticated customers are allowed.
+        - For the "create" and "confirm" actions, only authenticated customers are allowed.
+        - For the "bulk" action, only staff users are allowed.
         - For other actions, authentication is required for all users.
 
         Returns:
             list: A list of permission classes based on the action.
         """
-        if self.action in ["create"]:
+        if self.action in ["create", "confirm"]:
             permission_classes = [permissions.IsAuthenticated, IsCustomer]
+        elif self.action == "bulk":
+            permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
         else:
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
 
 
-    @transaction.atomic
+    def create(self, request, *args, **kwargs):
+        """
+        Create a booking, at most once per Idempotency-Key header.
+
+        See ebs_app.services.idempotency.
+        """
+        return run_idempotent(
+            request, lambda: super(BookingViewSet, self).create(request, *args, **kwargs)
+        )
+
+    @booking_transaction()
     def perform_create(self, serializer):
         """
         Custom method for creating a booking through the API.
 
         This method performs the booking creation process, including:
         - Retrieving the customer associated with the request user.
-        - Fetching the selected ticket and its availability.
-        - Checking and updating ticket availability based on booking count.
-        - Sending a booking confirmation email asynchronously.
-        - Saving the booking data and updating ticket availability.
+        - Validating the requested sub bookings, lines for the same ticket are merged.
+        - Checking the waiting room admission of events with an admission_rate.
+        - Locking all the requested tickets in one query ordered by id.
+        - Claiming the seats of every sub booking with a guarded decrement,
+          all lines are rolled back together if one of them fails.
+        - Saving the booking data as a PENDING hold, the confirmation email is sent
+          once the hold is confirmed.
+        - Inserting the sub bookings of the booking with a single bulk insert.
 
         Args:
             serializer: The serializer instance used to validate and create the booking.
 
         Payload Structure:
         {
-            "ticket": 123,   # ID of the ticket to be booked
-            "count": 2       # Number of tickets to be booked
+            "sub_bookings": [
+                {
+                    "ticket": 123,   # ID of the ticket to be booked
+                    "count": 2       # Number of tickets to be booked
+                }
+            ]
         }
 
         Raises:
             NoCustomerAPIException: When someone who is not a customer,
                 tries to do the things authorised for customer only.
+            InvalidSubBookingDataAPIException: If the sub bookings are missing or malformed.
             NoTicketAPIException: When ticket is not provided and it is a required field.
+            TicketNotFoundAPIException: If the selected ticket does not exist.
             TicketNotAvailableAPIException: If the selected ticket is not available for booking.
             BookedMoreSeatAPIException: If the booking count exceeds the available ticket count.
+            WaitingRoomTokenRequiredAPIException: If the event is gated by a waiting room
+                and no X-Waiting-Room-Token was sent for it.
+            NotAdmittedYetAPIException: If the waiting room has not admitted the token yet.
+            AdmissionExpiredAPIException: If the admission of the token has expired.
 
-        Returns:
-            Response: The response after performing the booking creation process.
         """
         customer = Customer.objects.get(user=self.request.user)
         if customer is None:
@@ -125,55 +187,104 @@ class BookingViewSet(viewsets.ModelViewSet):
 
         sub_bookings = self.request.data.get("sub_bookings")
 
-        if not isinstance(sub_bookings, list):
+        if not isinstance(sub_bookings, list) or not sub_bookings:
             raise InvalidSubBookingDataAPIException()
 
-        validated_sub_bookings = []
+        lines = []
         for sub_booking in sub_bookings:
+            if not isinstance(sub_booking, dict):
+                raise InvalidSubBookingDataAPIException()
+
             ticket_id = sub_booking.get("ticket")
             count = sub_booking.get("count")
 
-            if not ticket_id or count is None or count <= 0:
+            if not ticket_id:
+                raise NoTicketAPIException()
+
+            if not isinstance(ticket_id, int) or not isinstance(count, int) or count <= 0:
                 raise InvalidSubBookingDataAPIException()
 
-            # select_for_update() should be used with the database which must support transactions and locks.
-            ticket = Ticket.objects.select_for_update().filter(id=ticket_id).first()
-            
-            if not ticket:
-                raise TicketNotFoundAPIException()
+            lines.append((ticket_id, count))
 
-            validated_sub_bookings.append({'ticket': ticket, 'count': count})
+        waiting_room.check_admission(
+            [ticket_id for ticket_id, _ in lines],
+            self.request.headers.get(waiting_room.TOKEN_HEADER),
+            self.request.user,
+        )
 
-        for sub_booking in validated_sub_bookings:
-            ticket = sub_booking['ticket']
-            count = sub_booking['count']
+        # All tickets are locked in one query ordered by id, lines for the same ticket are merged.
+        merged_lines, tickets = reserve_seats(lines)
 
-            ticket_current_count = ticket.availability
+        if serializer.is_valid(raise_exception=True):
+            booking = serializer.save(
+                customer=customer,
+                status=BookingStatus.PENDING,
+                hold_expires_at=hold_expiry(),
+                total_price=sum(
+                    tickets[ticket_id].price * count
+                    for ticket_id, count in merged_lines.items()
+                ),
+            )
+            SubBooking.objects.bulk_create(
+                [
+                    SubBooking(
+                        booking=booking,
+                        ticket=tickets[ticket_id],
+                        count=count,
+                        price=tickets[ticket_id].price,
+                    )
+                    for ticket_id, count in merged_lines.items()
+                ]
+            )
+
+    @action(detail=True, methods=["post"])
+    def confirm(self, request, pk=None):
+        """
+        Confirm the seat hold of a pending booking.
 
-            if ticket_current_count == 0:
-                raise TicketNotAvailableAPIException()
+        The booking is flipped from PENDING to BOOKED with a guarded update,
+        so a hold released by the expiry sweeper cannot be confirmed anymore.
 
-            if count > ticket_current_count:
-                raise BookedMoreSeatAPIException()
+        Raises:
+            BookingNotPendingAPIException: If the booking is not pending.
+            HoldExpiredAPIException: If the hold has expired.
 
-            available_tickets = ticket_current_count - count
-            ticket.availability = available_tickets
-            ticket.save()
+        Returns:
+            Response: The confirmed booking.
+        """
+        booking = self.get_object()
+        confirm_hold(booking)
 
-        sub_booking_serializer = SubBookingSerializer(data=sub_bookings, many=True)
-        sub_booking_serializer.is_valid(raise_exception=True)
-        saved_sub_bookings = sub_booking_serializer.save()
-        sub_booking_id_list = [i.id for i in saved_sub_bookings]
-        price_list = [i.ticket.price*i.count for i in saved_sub_bookings]
+        ticket_id = booking.sub_bookings.values_list("ticket", flat=True).first()
+        send_booking_confirmation_email.delay(ticket_id, request.user.email)
+        return Response(self.get_serializer(booking).data)
 
-        if serializer.is_valid(raise_exception=True):
-            booking = serializer.save(customer=customer, status="BOOKED", total_price=sum(price_list))
-            booking.sub_bookings.set(sub_booking_id_list)
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Create many bookings in a single request.
 
-        user_email = "test@email.com"
-        send_booking_confirmation_email.delay(ticket_id, user_email)
-        return super().perform_create(serializer)
+        All bookings are validated together, seats are taken with set based updates
+        and the rows are inserted with bulk_create. The confirmations of all created
+        bookings are sent by one batched Celery task.
 
+        Raises:
+            InvalidSubBookingDataAPIException: If the bookings are missing.
+            TooManyBookingsAPIException: If the request holds too many bookings.
+
+        Returns:
+            Response: One result per requested booking, in request order.
+        """
+        return run_idempotent(request, lambda: self._create_bulk(request))
+
+    def _create_bulk(self, request):
+        items = request.data.get("bookings") if hasattr(request.data, "get") else None
+        results = create_bulk_bookings(items)
+        created = sum(1 for result in results if result["status_code"] == 201)
+        return Response(
+            {"created": created, "failed": len(results) - created, "results": results},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
 
     def get_queryset(self):
         """
@@ -182,22 +293,64 @@ class BookingViewSet(viewsets.ModelViewSet):
         This method determines the user's role (either a customer or an event organizer),
         and returns a filtered queryset of bookings associated with that role.
 
+        The customer, its user and the sub bookings of the bookings are fetched along
+        with them, so serialising a list of bookings takes the same number of queries
+        whatever its length. Event organisers only get the bookings with a line of
+        their own events, see BookingQuerySet.with_lines.
+
+        Lists can be filtered by event, ticket type and status.
+
         Returns:
             QuerySet: A filtered queryset of bookings based on the user's role.
 
         Raises:
             NotAValidUserAPIException: If the user's role cannot be determined or is invalid.
+            InvalidBookingFilterAPIException: If a filter has an invalid value.
         """
-        event_organiser = hasattr(self.request.user, "eventorganiser")
-        customer = hasattr(self.request.user, "customer")
-        if customer:
-            customer = Customer.objects.get(user=self.request.user)
-            return Booking.objects.filter(customer=customer)
-        elif event_organiser:
-            # event_organiser = EventOrganiser.objects.get(user=self.request.user)
-            return Booking.objects.all()
+        filters = self.get_filters() if self.action == "list" else {}
+        status_filter = filters.pop("status", None)
+        bookings = Booking.objects.select_related("customer__user").prefetch_related(
+            "sub_bookings"
+        )
+        if hasattr(self.request.user, "customer"):
+            bookings = bookings.filter(customer=self.request.user.customer)
+            if filters:
+                bookings = bookings.with_lines(**filters, by_booking=True)
+        elif hasattr(self.request.user, "eventorganiser"):
+            bookings = bookings.with_lines(
+                organiser=self.request.user.eventorganiser, **filters
+            )
         else:
             raise NotAValidUserAPIException()
+        if status_filter is not None:
+            bookings = bookings.filter(status=status_filter)
+        return bookings
+
+    def get_filters(self):
+        """
+        Read the booking filters of the query string.
+
+        Returns:
+            dict: The event, ticket_type and status filters given.
+
+        Raises:
+            InvalidBookingFilterAPIException: If a filter has an invalid value.
+        """
+        params = self.request.query_params
+        filters = {}
+        if "event" in params:
+            if not params["event"].isdigit():
+                raise InvalidBookingFilterAPIException()
+            filters["event"] = int(params["event"])
+        if "ticket_type" in params:
+            if params["ticket_type"] not in TicketChoices.values:
+                raise InvalidBookingFilterAPIException()
+            filters["ticket_type"] = params["ticket_type"]
+        if "status" in params:
+            if params["status"] not in BookingStatus.values:
+                raise InvalidBookingFilterAPIException()
+            filters["status"] = params["status"]
+        return filters
 
 
 class CancelBooking(GenericAPIView):
@@ -205,7 +358,8 @@ class CancelBooking(GenericAPIView):
     API endpoint to cancel a booking.
 
     This view allows a customer to cancel their booking. The booking status is changed to "CANCELLED",
-    and the availability of the associated ticket is updated accordingly.
+    and the availability of the associated tickets is updated accordingly, in a single transaction
+    (see ebs_app.services.cancellations). Concurrent cancellations give the seats back only once.
 
     Permissions:
     - Requires the user to be authenticated and identified as a customer.
@@ -217,6 +371,7 @@ class CancelBooking(GenericAPIView):
         CancellationNotAllowedAPIException: If the current user is not the owner of the booking.
         NoCustomerAPIException: If the current user is not identified as a customer.
         ContentNotFoundAPIException: If the specified booking does not exist.
+        AlreadyCancelledAPIException: If the booking is already cancelled.
 
     Returns:
         Response: A response indicating the success of the cancellation.
@@ -228,27 +383,9 @@ class CancelBooking(GenericAPIView):
 
     def patch(self, request, pk):
         user_is_customer = hasattr(self.request.user, "customer")
-        if user_is_customer:
-            customer = Customer.objects.get(user=self.request.user)
-            try:
-                booking = Booking.objects.get(id=pk)
-                if booking.customer == customer:
-                    if booking.status == "CANCELLED":
-                        raise AlreadyCancelledAPIException()
-                    sub_bookings = booking.sub_bookings.all()
-                    for i in sub_bookings:
-                        count = i.count
-                        ticket = i.ticket
-                        new_availability = ticket.availability + count
-                        ticket.availability = new_availability
-                        ticket.save()
-                    booking.status = "CANCELLED"
-                    booking.is_cancelled = True
-                    booking.save()
-                else:
-                    raise CancellationNotAllowedAPIException()
-            except Booking.DoesNotExist:
-                raise ContentNotFoundAPIException()
-        else:
+        if not user_is_customer:
             raise NoCustomerAPIException()
+        if not str(pk).isdigit():
+            raise ContentNotFoundAPIException()
+        cancel_booking(int(pk), self.request.user.customer)
         return Response({"status": "Cancelled Successfully"})
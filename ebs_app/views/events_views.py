@@ -11,48 +11,117 @@ Contents:
   - Allows creation, updating, and deleting events with proper permissions.
   - Retrieves event data based on user roles.
   - Custom methods to create and update events while handling permissions and notifications.
+  - Serves the list and the detail of events from a versioned response cache.
+  - Lets clients pick the fields of the events with ?fields= and ?expand=.
+  - Filters the events by date window, and lists the upcoming events.
+  - Searches events by name, venue and description in a full-text index.
+  - Lets customers join and poll the waiting room of an event going on sale.
+  - Lets organisers cancel all the bookings of an event called off, as a background job.
+  - Lets organisers export the bookings of an event as a streamed CSV or NDJSON file.
 
 Note: This module is part of the ebs_app package and should be imported accordingly.
 """
 
 
 from copy import copy
-from rest_framework import viewsets, permissions
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from ebs_app.models.events import Event
 from ebs_app.models.bookings import Booking
-from users.permissions import IsEventOrganiser
+from ebs_app.pagination import EventCursorPagination
+from ebs_app.sparse_fields import SparseFieldsViewMixin
+from users.permissions import IsCustomer, IsEventOrganiser
 from users.event_organiser.models import EventOrganiser
-from ebs_app.serializers.event_serializers import EventSerializer
+from ebs_app.serializers.event_serializers import (
+    EventSerializer,
+    EventCancellationSerializer,
+)
 from ebs_app.tasks import send_event_update_email
+from ebs_app.services import (
+    booking_export,
+    conditional_get,
+    date_windows,
+    event_availability,
+    event_cache,
+    event_search,
+    waiting_room,
+)
+from ebs_app.services.cancellations import start_event_cancellation
 
-from ebs_app.exceptions import NotAuthorisedAPIException
+from ebs_app.exceptions import (
+    NotAuthorisedAPIException,
+    ContentNotFoundAPIException,
+    InvalidExportFormatAPIException,
+)
 
+# Fields changing with every booking, served uncached, with the columns telling when
+# they last changed.
+LIVE_FIELDS = {
+    "tickets": ["ticket__updated_at", "ticket__shards__updated_at"],
+    "availability": ["availability__updated_at"],
+}
 
-class EventViewSet(viewsets.ModelViewSet):
+
+class EventViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     """
     Event ViewSet:
 
     This viewset manages event-related operations.
 
     Attributes:
-    - queryset: A queryset containing all Event objects.
+    - queryset: A queryset containing all Event objects, with their organiser and its user.
     - serializer_class: The serializer class for Event objects.
+    - pagination_class: Events are listed soonest first, by cursor.
 
     Permissions:
     - For actions "create", "update", "partial_update", and "delete",
       only authenticated Event Organizers are allowed.
+    - For the "waiting_room" action, only authenticated Customers are allowed.
+    - For the "cancellation" and "bookings_export" actions, only authenticated
+      Event Organizers are allowed.
     - For other actions, authentication is required for all users.
 
     Methods:
+    - list(request), retrieve(request, pk): Served from the versioned event cache,
+      see ebs_app.services.event_cache. Conditional GETs of unchanged events get
+      304 Not Modified, see ebs_app.services.conditional_get.
+      ?fields= and ?expand=event_organiser pick the fields of the events,
+      see ebs_app.sparse_fields. ?expand=tickets embeds the tickets of every
+      event, prefetched in one query, and ?expand=availability the availability
+      rollup of every event, joined in the same query, see
+      ebs_app.services.event_availability. Both are served uncached.
+      ?date_from=, ?date_to=, ?on= and ?days= filter the list by date window,
+      see ebs_app.services.date_windows.
+
+    - upcoming(request): The list of the events which have not started yet,
+      with the same parameters as the list.
+
     - perform_create(serializer): Custom method to create an event.
       Requires the user to be an authenticated Event Organizer.
 
     - perform_update(serializer): Custom method to update an event.
       Sends email notifications to customers who have booked the event.
+
+    - search(request): Full-text search of the events, ranked, see
+      ebs_app.services.event_search. The index is updated by perform_create,
+      perform_update and perform_destroy.
+
+    - waiting_room(request, pk): Joins (POST) or polls (GET ?token=<token>)
+      the waiting room of an event with an admission_rate.
+
+    - cancellation(request, pk): Starts (POST) or polls (GET) the job cancelling
+      all the bookings of an event called off.
+
+    - bookings_export(request, pk): Streams the booking lines of an event as CSV or
+      NDJSON, see ebs_app.services.booking_export.
     """
 
-    queryset = Event.objects.all()
+    queryset = Event.objects.select_related("event_organiser__user")
     serializer_class = EventSerializer
+    pagination_class = EventCursorPagination
 
     def get_permissions(self):
         """
@@ -61,8 +130,17 @@ class EventViewSet(viewsets.ModelViewSet):
         Returns:
             list: A list of permission classes based on the action.
         """
-        if self.action in ["create", "update", "partial_update", "delete"]:
+        if self.action in [
+            "create",
+            "update",
+            "partial_update",
+            "delete",
+            "cancellation",
+            "bookings_export",
+        ]:
             permission_classes = [permissions.IsAuthenticated, IsEventOrganiser]
+        elif self.action == "waiting_room":
+            permission_classes = [permissions.IsAuthenticated, IsCustomer]
         else:
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
@@ -91,7 +169,10 @@ class EventViewSet(viewsets.ModelViewSet):
             serializer.save(
                 event_organiser=event_organiser,
             )
-        return super().perform_create(serializer)
+        event_cache.bump()
+        super().perform_create(serializer)
+        event_search.index_events([serializer.instance.id])
+        event_availability.events_changed([serializer.instance.id])
 
     def perform_update(self, serializer):
         """
@@ -104,7 +185,7 @@ class EventViewSet(viewsets.ModelViewSet):
         """
         event = self.get_object()
         event_bookings = (
-            Booking.objects.filter(ticket__event=event)
+            Booking.objects.filter(sub_bookings__ticket__event=event)
             .values_list("customer__user__email")
             .distinct()
         )
@@ -119,4 +200,222 @@ class EventViewSet(viewsets.ModelViewSet):
             "event_time": updated_event["event_date_time"],
         }
         send_event_update_email.delay(event_dict, customer_email_list)
-        return super().perform_update(serializer)
+        event_cache.bump(event.id)
+        super().perform_update(serializer)
+        event_search.index_events([event.id])
+
+    def perform_destroy(self, instance):
+        event_cache.bump(instance.id)
+        event_search.remove_events([instance.id])
+        return super().perform_destroy(instance)
+
+    def get_queryset(self):
+        """
+        Get the events, within the date window of the request for the lists.
+
+        The window is a range of the (event_date_time, id) index, which the cursor
+        pagination orders by as well.
+
+        Raises:
+            InvalidDateWindowAPIException: If a window parameter is invalid.
+        """
+        queryset = super().get_queryset()
+        if self.action not in ("list", "upcoming"):
+            return queryset
+        start, end = self.get_date_window()
+        if start is not None:
+            queryset = queryset.filter(event_date_time__gte=start)
+        if end is not None:
+            queryset = queryset.filter(event_date_time__lt=end)
+        return queryset
+
+    def get_date_window(self):
+        if not hasattr(self, "_date_window"):
+            # Whole minutes, so the windows relative to now are cached for a minute.
+            now = timezone.now().replace(second=0, microsecond=0)
+            self._date_window = date_windows.get_window(
+                self.request.query_params, upcoming=self.action == "upcoming", now=now
+            )
+        return self._date_window
+
+    def get_modified_fields(self):
+        fields = ["updated_at"]
+        for name in self.expanded_live_fields():
+            fields += LIVE_FIELDS[name]
+        return fields
+
+    def expanded_live_fields(self):
+        selection = self.get_field_selection()
+        if selection is None:
+            return []
+        return [name for name in LIVE_FIELDS if name in selection.expand]
+
+    def list(self, request, *args, **kwargs):
+        def view():
+            return conditional_get.conditional_response(
+                request,
+                self.filter_queryset(self.get_queryset()),
+                lambda: super(EventViewSet, self).list(request, *args, **kwargs),
+                self.get_modified_fields(),
+                list_view=self,
+            )
+
+        # Ticket availability is not cached, bookings do not bump the event cache.
+        if self.expanded_live_fields():
+            return view()
+        variant = ":".join(str(moment) for moment in self.get_date_window())
+        return event_cache.cached_response(request, view, variant=variant)
+
+    @action(detail=False, methods=["get"])
+    def upcoming(self, request):
+        """
+        List the events which have not started yet, soonest first.
+
+        Takes the same parameters as the list, ?days=7 lists the events of the
+        coming week.
+        """
+        return self.list(request)
+
+    def retrieve(self, request, *args, **kwargs):
+        def view():
+            if not str(kwargs["pk"]).isdigit():
+                return super(EventViewSet, self).retrieve(request, *args, **kwargs)
+            return conditional_get.conditional_response(
+                request,
+                self.get_queryset().filter(pk=kwargs["pk"]),
+                lambda: super(EventViewSet, self).retrieve(request, *args, **kwargs),
+                self.get_modified_fields(),
+            )
+
+        if self.expanded_live_fields():
+            return view()
+        return event_cache.cached_response(request, view, event_id=kwargs["pk"])
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        Search the events by name, venue and description.
+
+        Every word of ?q= has to match, the last one as a prefix. Results are ranked
+        best first and can be filtered with ?date_from=, ?date_to= (ISO 8601 dates or
+        datetimes) and ?venue=. ?limit= caps the number of results, ?fields= and
+        ?expand= pick their fields.
+
+        Response Structure:
+        {
+            "results": [<event>, ...]   # Best match first
+        }
+
+        Raises:
+            InvalidSearchQueryAPIException: If ?q= is missing or a filter is invalid.
+        """
+        event_ids = event_search.search(
+            **event_search.parse_query(request.query_params)
+        )
+        events = self.filter_queryset(self.get_queryset().filter(id__in=event_ids))
+        events_by_id = {event.id: event for event in events}
+        ranked = [events_by_id[pk] for pk in event_ids if pk in events_by_id]
+        return Response({"results": self.get_serializer(ranked, many=True).data})
+
+    @action(detail=True, methods=["get", "post"])
+    def waiting_room(self, request, pk=None):
+        """
+        Join or poll the waiting room of an event.
+
+        POST gives the customer the next admission slot of the event and a token.
+        GET ?token=<token> tells whether the token is admitted. Once admitted, the
+        token is sent with the booking in the X-Waiting-Room-Token header.
+
+        Response Structure:
+        {
+            "token": "<token>",         # Only returned when joining
+            "admitted": false,          # Whether the booking can be made
+            "wait_seconds": 12.5,       # Seconds left until admission
+            "ahead": 25,                # Customers admitted before this one
+            "expires_at": 1693000000.0  # UNIX time the admission is accepted until
+        }
+
+        Raises:
+            InvalidWaitingRoomTokenAPIException: If the polled token is not valid.
+        """
+        event = self.get_object()
+        if request.method == "POST":
+            return Response(
+                waiting_room.join(event, request.user), status=status.HTTP_201_CREATED
+            )
+        token = request.query_params.get("token", "")
+        return Response(waiting_room.get_status(event, token, request.user))
+
+    @action(detail=True, methods=["get", "post"])
+    def cancellation(self, request, pk=None):
+        """
+        Cancel all the bookings of an event called off.
+
+        POST queues a background job cancelling the bookings in chunks, restoring
+        the seats and notifying the customers, and returns the job (202).
+        GET returns the latest job of the event to follow its progress.
+
+        Response Structure:
+        {
+            "id": 1,
+            "event": 12,
+            "status": "RUNNING",        # QUEUED, RUNNING, DONE or FAILED
+            "total": 500000,            # Bookings to be cancelled
+            "cancelled": 125000,        # Bookings cancelled so far
+            "progress": 25.0,           # Percentage of bookings cancelled
+            ...
+        }
+
+        Raises:
+            NotAuthorisedAPIException: If the event belongs to another organiser.
+            CancellationInProgressAPIException: If a job is already running for the event.
+            ContentNotFoundAPIException: If no job was started for the event.
+        """
+        event = self.get_object()
+        if event.event_organiser_id != request.user.eventorganiser.id:
+            raise NotAuthorisedAPIException()
+        if request.method == "POST":
+            job = start_event_cancellation(event, request.user.eventorganiser)
+            return Response(
+                EventCancellationSerializer(job).data, status=status.HTTP_202_ACCEPTED
+            )
+        job = event.cancellations.order_by("-id").first()
+        if job is None:
+            raise ContentNotFoundAPIException()
+        return Response(EventCancellationSerializer(job).data)
+
+    @action(detail=True, methods=["get"])
+    def bookings_export(self, request, pk=None):
+        """
+        Stream the booking lines of an event, for door lists and accounting.
+
+        ?export_format=csv (the default) or ?export_format=ndjson picks the format.
+        The file is streamed chunk by chunk, whatever the number of bookings.
+
+        Row Structure:
+        {
+            "booking": 1042,                      # ID of the booking
+            "customer_email": "fan@example.com",  # Email of the customer
+            "ticket_type": "VIP",                 # Type of the booked ticket
+            "count": 2,                           # Seats booked
+            "price": 50,                          # Price of a seat
+            "status": "BOOKED"                    # Status of the booking
+        }
+
+        Raises:
+            NotAuthorisedAPIException: If the event belongs to another organiser.
+            InvalidExportFormatAPIException: If the export format is unknown.
+        """
+        event = self.get_object()
+        if event.event_organiser_id != request.user.eventorganiser.id:
+            raise NotAuthorisedAPIException()
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format not in booking_export.FORMATS:
+            raise InvalidExportFormatAPIException()
+        response = StreamingHttpResponse(
+            booking_export.stream(event.id, export_format),
+            content_type=booking_export.FORMATS[export_format],
+        )
+        filename = f"event-{event.id}-bookings.{export_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
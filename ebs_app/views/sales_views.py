@@ -0,0 +1,89 @@
+"""
+Module: ebs_app.views.sales_views
+
+This module contains the sales dashboard of event organisers within the Event Booking System (EBS) application.
+
+The dashboard reads the sales summaries kept up to date by the booking paths, see
+ebs_app.services.sales_summary, so it answers with the same queries whatever the
+number of bookings of the events.
+
+Contents:
+- SalesSummaryViewSet: A read-only viewset of the sales of the events of an organiser.
+  - Lists the sold seats, revenue and cancellations per event and ticket type.
+  - Filters them by event and ticket type.
+
+Note: This module is part of the ebs_app package and should be imported accordingly.
+"""
+
+from rest_framework import viewsets, permissions
+from ebs_app.models.choices import TicketChoices
+from ebs_app.models.sales import SalesSummary
+from ebs_app.pagination import SalesCursorPagination
+from ebs_app.serializers.sales_serializers import SalesSummarySerializer
+from ebs_app.services import conditional_get
+from users.permissions import IsEventOrganiser
+from ebs_app.exceptions import InvalidSalesFilterAPIException
+
+
+class SalesSummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Sales Summary ViewSet:
+
+    [Authentication Required, Event Organizers only]
+
+    Allowed Methods:
+    - GET /sales/: The sales of the events of the organiser, by event and ticket type,
+      in pages following the "next" cursor link:
+        {
+            "id": 1,
+            "event": 12,
+            "event_name": "Friday Party",
+            "ticket_type": "VIP",
+            "sold": 120,                # Seats of the booked bookings
+            "revenue": 18000,           # Price of the sold seats
+            "cancelled": 8,             # Seats cancelled after confirmation
+            "cancellation_rate": 6.2,   # Percentage of the confirmed seats cancelled
+            "updated_at": "2023-08-25T20:00:00Z"
+        }
+      Filters: ?event=<event_id>, ?ticket_type=<TicketChoices>.
+      Conditional GETs of unchanged sales get 304 Not Modified,
+      see ebs_app.services.conditional_get.
+
+    - GET /sales/<id>/: The sales of a ticket type of an event.
+    """
+
+    serializer_class = SalesSummarySerializer
+    pagination_class = SalesCursorPagination
+    permission_classes = [permissions.IsAuthenticated, IsEventOrganiser]
+
+    def get_queryset(self):
+        """
+        Get the sales summaries of the events of the requesting organiser.
+
+        Returns:
+            QuerySet: The summaries, with their event.
+
+        Raises:
+            InvalidSalesFilterAPIException: If a filter has an invalid value.
+        """
+        summaries = SalesSummary.objects.select_related("event").filter(
+            event__event_organiser=self.request.user.eventorganiser
+        )
+        params = self.request.query_params if self.action == "list" else {}
+        if "event" in params:
+            if not params["event"].isdigit():
+                raise InvalidSalesFilterAPIException()
+            summaries = summaries.filter(event_id=int(params["event"]))
+        if "ticket_type" in params:
+            if params["ticket_type"] not in TicketChoices.values:
+                raise InvalidSalesFilterAPIException()
+            summaries = summaries.filter(ticket_type=params["ticket_type"])
+        return summaries
+
+    def list(self, request, *args, **kwargs):
+        return conditional_get.conditional_response(
+            request,
+            self.filter_queryset(self.get_queryset()),
+            lambda: super(SalesSummaryViewSet, self).list(request, *args, **kwargs),
+            list_view=self,
+        )
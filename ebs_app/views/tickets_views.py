@@ -19,11 +19,26 @@ from ebs_app.models.tickets import Ticket
 from ebs_app.models.events import Event
 from users.permissions import IsEventOrganiser
 from ebs_app.exceptions import NoEventAPIException
+from ebs_app.services import (
+    availability_push,
+    conditional_get,
+    event_availability,
+    inventory_front,
+)
+from ebs_app.services.reservations import configure_shards
+from ebs_app.sparse_fields import SparseFieldsViewMixin
 
 from ebs_app.serializers.ticket_serializers import TicketSerializer
+from ebs_app.serializers.values_serializers import (
+    TicketValuesSerializer,
+    ValuesListViewMixin,
+)
 
+# The availability of a sharded ticket changes with the updated_at of its shards.
+MODIFIED_FIELDS = ("updated_at", "shards__updated_at")
 
-class TicketViewSet(viewsets.ModelViewSet):
+
+class TicketViewSet(SparseFieldsViewMixin, ValuesListViewMixin, viewsets.ModelViewSet):
     """
     Ticket ViewSet:
 
@@ -32,18 +47,30 @@ class TicketViewSet(viewsets.ModelViewSet):
     Attributes:
     - queryset: A queryset containing all Ticket objects.
     - serializer_class: The serializer class for Ticket objects.
+    - values_serializer_class: Serialises the list from values() rows,
+      see ebs_app.serializers.values_serializers.
+    - Tickets are listed by id, by cursor (the default pagination).
 
     Permissions:
     - For actions "create" and "delete", only authenticated Event Organizers are allowed.
     - For other actions, authentication is required for all users.
 
     Methods:
+    - list(request), retrieve(request, pk): Conditional GETs of unchanged tickets get
+      304 Not Modified, see ebs_app.services.conditional_get.
+      ?fields= picks the fields of the tickets, see ebs_app.sparse_fields.
     - perform_create(serializer): Custom method to create a ticket through the API.
     - perform_update(serializer): Custom method to update a ticket through the API.
+    - perform_destroy(instance): Deletes a ticket and refreshes the availability of
+      its event.
+
+    The held and sold counters of the tickets are read only, they are kept by the
+    booking engine.
     """
 
-    queryset = Ticket.objects.all()
+    queryset = Ticket.objects.with_availability()
     serializer_class = TicketSerializer
+    values_serializer_class = TicketValuesSerializer
 
     def get_permissions(self):
         """
@@ -80,7 +107,8 @@ class TicketViewSet(viewsets.ModelViewSet):
                 "ticket_type": "PREMIUM",     # Type of the ticket (e.g., PREMIUM, STANDARD)
                 "availability": 125,          # Number of available tickets
                 "total_allotment": 150,       # Total number of tickets allotted
-                "price": 149                  # Price of the ticket
+                "price": 149,                 # Price of the ticket
+                "shard_count": 16             # Optional, splits the availability across shards
             }
 
         Raises:
@@ -100,18 +128,58 @@ class TicketViewSet(viewsets.ModelViewSet):
             raise NoEventAPIException()
 
         if serializer.is_valid(raise_exception=True):
-            serializer.save(
+            ticket = serializer.save(
                 event=event,
             )
-        return super().perform_create(serializer)
+            if ticket.is_sharded:
+                serializer.instance = configure_shards(ticket.id, ticket.shard_count)
+            event_availability.tickets_changed([ticket.id])
 
     def perform_update(self, serializer):
         """
         Custom method for updating a ticket through the API.
 
+        For a sharded ticket, or a ticket whose shard_count changes, the seats are
+        spread over the shards again. A provided availability is the new total
+        availability. Only the edited columns are saved, the seat counters written by
+        concurrent bookings are kept. The inventory front counter of the ticket and the
+        availability of its event are refreshed from the database.
+
         Args:
             serializer: The serializer instance used to validate and update the ticket.
         """
+        was_sharded = serializer.instance.is_sharded
+        ticket = serializer.save()
+        if was_sharded or ticket.is_sharded:
+            serializer.instance = configure_shards(
+                ticket.id,
+                ticket.shard_count,
+                availability=serializer.validated_data.get("availability"),
+            )
+        inventory_front.refresh([ticket.id])
+        availability_push.tickets_changed([ticket.id])
+        event_availability.tickets_changed([ticket.id])
+
+    def perform_destroy(self, instance):
+        event_availability.events_changed([instance.event_id])
+        super().perform_destroy(instance)
+
+    def list(self, request, *args, **kwargs):
+        return conditional_get.conditional_response(
+            request,
+            self.filter_queryset(self.get_queryset()),
+            lambda: super(TicketViewSet, self).list(request, *args, **kwargs),
+            modified_fields=MODIFIED_FIELDS,
+            list_view=self,
+        )
 
-        serializer.save()
-        return super().perform_update(serializer)
+    def retrieve(self, request, *args, **kwargs):
+        view = super().retrieve
+        if not str(kwargs["pk"]).isdigit():
+            return view(request, *args, **kwargs)
+        return conditional_get.conditional_response(
+            request,
+            self.get_queryset().filter(pk=kwargs["pk"]),
+            lambda: view(request, *args, **kwargs),
+            modified_fields=MODIFIED_FIELDS,
+        )
@@ -31,6 +31,7 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
+    "daphne",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "ebs_app.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -75,6 +77,13 @@ TEMPLATES = [
 WSGI_APPLICATION = "project_ebs.wsgi.application"
 ASGI_APPLICATION = "project_ebs.asgi.application"
 
+# WebSocket pushes, use channels_redis when running several web workers.
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels.layers.InMemoryChannelLayer",
+    }
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -88,6 +97,134 @@ DATABASES = {
 
 CELERY_BROKER_URL = "redis://redis:6379/0"
 
+CELERY_BEAT_SCHEDULE = {
+    "flush-inventory-front": {
+        "task": "ebs_app.tasks.flush_inventory_front",
+        "schedule": 2.0,
+    },
+    "reconcile-inventory-front": {
+        "task": "ebs_app.tasks.reconcile_inventory_front",
+        "schedule": 300.0,
+    },
+    "release-expired-holds": {
+        "task": "ebs_app.tasks.release_expired_holds",
+        "schedule": 15.0,
+    },
+    "reconcile-sales-summary": {
+        "task": "ebs_app.tasks.reconcile_sales_summary",
+        "schedule": 3600.0,
+    },
+    "refresh-event-availability": {
+        "task": "ebs_app.tasks.refresh_event_availability",
+        "schedule": 900.0,
+    },
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "ebs",
+    }
+}
+
+# Versioned response cache of the event list and detail,
+# see ebs_app.services.event_cache.
+EBS_EVENT_CACHE = {
+    "ENABLED": True,
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": 300,
+}
+
+# Cursor pagination of all list endpoints, see ebs_app.pagination,
+# and the faster JSON renderer of the API, see ebs_app.renderers.
+REST_FRAMEWORK = {
+    "DEFAULT_PAGINATION_CLASS": "ebs_app.pagination.IdCursorPagination",
+    "PAGE_SIZE": 50,
+    "DEFAULT_RENDERER_CLASSES": [
+        "ebs_app.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
+# JSON encoder of the API responses, orjson when installed,
+# see ebs_app.renderers.
+EBS_JSON_RENDERER = {
+    "ENCODER": "ebs_app.renderers.OrjsonEncoder",
+}
+
+# Compression of the responses negotiated with Accept-Encoding,
+# brotli is offered when installed, see ebs_app.middleware.
+EBS_COMPRESSION = {
+    "ENABLED": True,
+    "MIN_SIZE": 1024,
+    "ENCODINGS": ["br", "gzip"],
+    "BROTLI_QUALITY": 5,
+}
+
+# Full-text search of the events, see ebs_app.services.event_search.
+# PostgreSQL deployments use "ebs_app.services.event_search.PostgreSQLSearchBackend".
+EBS_EVENT_SEARCH = {
+    "BACKEND": "ebs_app.services.event_search.SQLiteSearchBackend",
+    "LIMIT": 20,
+    "MAX_LIMIT": 100,
+    "MAX_TERMS": 8,
+}
+
+# Availability of tickets pushed to the WebSocket clients of their event,
+# see ebs_app.services.availability_push.
+EBS_AVAILABILITY_PUSH = {
+    "ENABLED": True,
+    "WINDOW": 0.5,
+}
+
+# Read-only fast path of the booking and ticket lists,
+# see ebs_app.serializers.values_serializers.
+EBS_VALUES_SERIALIZERS = {
+    "ENABLED": True,
+}
+
+# Largest page size a client can ask for with ?page_size=.
+EBS_MAX_PAGE_SIZE = 500
+
+# How long a new booking holds its seats before it has to be confirmed.
+EBS_BOOKING_HOLD_SECONDS = 600
+
+# Maximum number of bookings accepted by one bulk booking request.
+EBS_BULK_BOOKING_MAX_ITEMS = 500
+
+# Bookings cancelled per transaction when an event is called off.
+EBS_EVENT_CANCELLATION_CHUNK_SIZE = 1000
+
+# Bookings read per query by the streamed booking exports of an event,
+# see ebs_app.services.booking_export.
+EBS_BOOKING_EXPORT_CHUNK_SIZE = 2000
+
+# Replay of retried booking requests sending an Idempotency-Key header,
+# see ebs_app.services.idempotency.
+EBS_IDEMPOTENCY = {
+    "CACHE_ALIAS": "default",
+    "TTL": 86400,
+    "LOCK_TIMEOUT": 30,
+    "WAIT_TIMEOUT": 10,
+}
+
+# Admission control of events with an admission_rate,
+# see ebs_app.services.waiting_room.
+EBS_WAITING_ROOM = {
+    "BACKEND": "ebs_app.services.waiting_room.LocalWaitingRoomBackend",
+    "CACHE_ALIAS": "default",
+    "ADMISSION_WINDOW": 600,
+}
+
+# Optional in-memory tier claiming seats ahead of the database,
+# see ebs_app.services.inventory_front.
+EBS_INVENTORY_FRONT = {
+    "ENABLED": False,
+    "BACKEND": "ebs_app.services.inventory_front.LocalInventoryBackend",
+    "CACHE_ALIAS": "default",
+    "BATCH_SIZE": 500,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators